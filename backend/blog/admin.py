@@ -1,6 +1,6 @@
 # backend/blog/admin.py - WORDPRESS СТИЛЬ АДМИНКИ - ЧАСТЬ 1 из 3
 from django.contrib import admin
-from django.utils.html import format_html
+from django.utils.html import escape, format_html
 from django.urls import reverse, path
 from django.utils import timezone
 from django.utils.safestring import mark_safe
@@ -8,9 +8,18 @@ from django.shortcuts import render, redirect
 from django.http import JsonResponse, HttpResponse
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib import messages
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
 from parler.admin import TranslatableAdmin, TranslatableTabularInline
 from .models import BlogPost, Category, BlogImage, BlogComment
+from .cache import schedule_cache_invalidation
+from .comments import requeue_comments, risk_level
+from .counters import refresh_post_counters
+from .navigation import schedule_navigation_update
+from .related import schedule_related_update
 from filer.fields.image import FilerImageField
+from core.admin import MediaInfoAdminMixin
+from core.derivatives import thumbnail_url
 import json
 
 
@@ -413,9 +422,11 @@ class CategoryAdmin(TranslatableAdmin, WordPressStyleAdminMixin):
 # ЧАСТЬ 2 из 3 - BlogPost Admin (продолжение admin.py)
 
 @admin.register(BlogPost)
-class BlogPostAdmin(TranslatableAdmin, WordPressStyleAdminMixin):
+class BlogPostAdmin(MediaInfoAdminMixin, TranslatableAdmin, WordPressStyleAdminMixin):
     """WordPress-стиль админка для постов - главная жемчужина"""
     
+    media_info_field = 'featured_image'
+    
     list_display = (
         'post_thumbnail', 'get_title_with_status', 'author_info', 
         'category_info', 'post_stats', 'seo_score', 'post_actions'
@@ -493,8 +504,8 @@ class BlogPostAdmin(TranslatableAdmin, WordPressStyleAdminMixin):
         if obj.featured_image:
             return format_html(
                 '<div class="wp-post-thumbnail" style="position: relative; '
-                'border-radius: 6px; overflow: hidden; box-shadow: 0 2px 8px rgba(0,0,0,0.15);">'
-                '<img src="{}" style="width: 70px; height: 52px; '
+                'border-radius: 6px; overflow: hidden; box-shadow: 0 2px 8px rgba(0,0,0,0.15); background: {};">'
+                '<img src="{}" loading="lazy" style="width: 70px; height: 52px; '
                 'object-fit: cover; transition: all 0.3s ease;" '
                 'onmouseover="this.style.transform=\'scale(1.1)\';"'
                 'onmouseout="this.style.transform=\'scale(1)\';" />'
@@ -503,7 +514,8 @@ class BlogPostAdmin(TranslatableAdmin, WordPressStyleAdminMixin):
                 'padding: 1px 4px; font-size: 9px; font-weight: bold;">IMG</div>'
                 '{}'
                 '</div>',
-                obj.featured_image.url,
+                getattr(obj.featured_image_info, 'dominant_color', '') or '#f1f1f1',
+                thumbnail_url(obj.featured_image, obj.featured_image_info),
                 '<div style="position: absolute; bottom: 2px; left: 2px; right: 2px; '
                 'background: linear-gradient(transparent, rgba(0,0,0,0.7)); '
                 'color: white; font-size: 8px; padding: 2px; text-align: center; '
@@ -537,8 +549,8 @@ class BlogPostAdmin(TranslatableAdmin, WordPressStyleAdminMixin):
         # Обрезаем длинные заголовки
         display_title = title[:50] + '...' if len(title) > 50 else title
         
-        # Добавляем индикатор комментариев
-        comment_count = obj.comments.filter(is_approved=True).count()
+        # Добавляем индикатор комментариев (денормализованный счетчик)
+        comment_count = obj.approved_comments_count
         comment_indicator = f' <span style="color: #82878c;">({comment_count} 💬)</span>' if comment_count > 0 else ''
         
         return format_html(
@@ -623,8 +635,8 @@ class BlogPostAdmin(TranslatableAdmin, WordPressStyleAdminMixin):
     def post_stats(self, obj):
         """Статистика поста как в WordPress Analytics"""
         views = obj.views_count
-        comments = obj.comments.filter(is_approved=True).count()
-        images = obj.images.count()
+        comments = obj.approved_comments_count
+        images = obj.images_count
         
         # Определяем "популярность"
         if views > 1000:
@@ -657,6 +669,7 @@ class BlogPostAdmin(TranslatableAdmin, WordPressStyleAdminMixin):
             popularity_color, views, comments, images, popularity_color, popularity_text
         )
     post_stats.short_description = 'Stats'
+    post_stats.admin_order_field = 'approved_comments_count'
     
     def seo_score(self, obj):
         """SEO Score как в Yoast WordPress"""
@@ -884,9 +897,9 @@ class BlogPostAdmin(TranslatableAdmin, WordPressStyleAdminMixin):
         # Собираем статистику
         total_views = obj.views_count
         total_comments = obj.comments.count()
-        approved_comments = obj.comments.filter(is_approved=True).count()
+        approved_comments = obj.approved_comments_count
         pending_comments = total_comments - approved_comments
-        total_images = obj.images.count()
+        total_images = obj.images_count
         
         # Примерные данные для демонстрации
         reading_time = obj.reading_time or 5
@@ -932,12 +945,25 @@ class BlogPostAdmin(TranslatableAdmin, WordPressStyleAdminMixin):
     post_analytics_dashboard.short_description = 'Analytics Dashboard'
     
     # WordPress-стиль действия
+    def _schedule_navigation(self, queryset):
+        """update() не шлет сигналы - пересчитываем навигацию, похожие и кэш затронутых статей сами"""
+        rows = list(queryset.values_list(
+            'pk', 'navigation__previous_post_id', 'navigation__next_post_id'
+        ))
+        for post_id, previous_id, next_id in rows:
+            schedule_navigation_update(post_id, (previous_id, next_id))
+        post_ids = [post_id for post_id, _previous, _next in rows]
+        schedule_related_update(post_ids=post_ids)
+        schedule_cache_invalidation(post_ids)
+    
     def publish_posts(self, request, queryset):
+        self._schedule_navigation(queryset)
         count = queryset.update(status='published', published_at=timezone.now())
         messages.success(request, f'🚀 {count} post{"s" if count != 1 else ""} published successfully!')
     publish_posts.short_description = "🚀 Publish selected posts"
     
     def draft_posts(self, request, queryset):
+        self._schedule_navigation(queryset)
         count = queryset.update(status='draft')
         messages.warning(request, f'📝 {count} post{"s" if count != 1 else ""} moved to draft.')
     draft_posts.short_description = "📝 Move to draft"
@@ -1009,7 +1035,8 @@ class BlogPostAdmin(TranslatableAdmin, WordPressStyleAdminMixin):
                 'meta_keywords': post.safe_translation_getter('meta_keywords', any_language=True),
                 'tags': [tag.name for tag in post.tags.all()],
                 'comments_count': post.comments.count(),
-                'images_count': post.images.count(),
+                'approved_comments_count': post.approved_comments_count,
+                'images_count': post.images_count,
             }
             posts_data.append(post_data)
         
@@ -1192,12 +1219,14 @@ class BlogCommentAdmin(admin.ModelAdmin, WordPressStyleAdminMixin):
     """WordPress-стиль админка для комментариев - как в WP Comments"""
     list_display = (
         'comment_avatar', 'get_author_info', 'get_post_info', 
-        'content_preview', 'approval_status', 'comment_meta', 'comment_actions'
+        'content_preview', 'spam_score_badge', 'approval_status', 'comment_meta', 'comment_actions'
     )
     list_filter = (
         'is_approved', 'created_at', 'post__category', 
         'post__status', 'post__is_featured'
     )
+    # Самые подозрительные сверху - по сохраненной оценке (индекс spam_score, created_at)
+    ordering = ('-spam_score', '-created_at')
     search_fields = (
         'name', 'email', 'content', 
         'post__translations__title', 'post__author__username'
@@ -1208,11 +1237,36 @@ class BlogCommentAdmin(admin.ModelAdmin, WordPressStyleAdminMixin):
     )
     actions = [
         'approve_comments', 'unapprove_comments', 'mark_as_spam', 
-        'bulk_delete', 'export_comments', 'author_whitelist'
+        'bulk_delete', 'export_comments', 'author_whitelist', 'rescore_comments'
     ]
     list_per_page = 25
     date_hierarchy = 'created_at'
     
+    def get_queryset(self, request):
+        """Статистика автора и данные поста - в том же запросе, без запросов на строку"""
+        author_comments = BlogComment.objects.filter(email=OuterRef('email')).order_by().values('email')
+        return super().get_queryset(request).select_related(
+            'post', 'post__author'
+        ).prefetch_related('post__translations').annotate(
+            author_total=Coalesce(
+                Subquery(author_comments.annotate(total=Count('id')).values('total'), output_field=IntegerField()),
+                Value(0),
+            ),
+            author_approved=Coalesce(
+                Subquery(
+                    author_comments.filter(is_approved=True).annotate(total=Count('id')).values('total'),
+                    output_field=IntegerField(),
+                ),
+                Value(0),
+            ),
+        )
+    
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        # Текст поправили - оценка устарела, комментарий снова в очереди
+        if change and 'content' in form.changed_data:
+            requeue_comments(BlogComment.objects.filter(pk=obj.pk))
+    
     # WordPress-стиль fieldsets
     fieldsets = (
         ('💬 Comment Details', {
@@ -1283,10 +1337,9 @@ class BlogCommentAdmin(admin.ModelAdmin, WordPressStyleAdminMixin):
     
     def get_author_info(self, obj):
         """Информация об авторе комментария"""
-        # Подсчитываем статистику автора
-        author_comments = BlogComment.objects.filter(email=obj.email) if obj.email else BlogComment.objects.filter(name=obj.name)
-        total_comments = author_comments.count()
-        approved_comments = author_comments.filter(is_approved=True).count()
+        # Статистика автора посчитана в get_queryset
+        total_comments = getattr(obj, 'author_total', 0)
+        approved_comments = getattr(obj, 'author_approved', 0)
         
         # Определяем статус автора
         if approved_comments > 10:
@@ -1319,7 +1372,7 @@ class BlogCommentAdmin(admin.ModelAdmin, WordPressStyleAdminMixin):
     def get_post_info(self, obj):
         """Информация о посте"""
         post_title = obj.post.safe_translation_getter('title', any_language=True) or f'Post {obj.post.pk}'
-        post_comments_count = obj.post.comments.filter(is_approved=True).count()
+        post_comments_count = obj.post.approved_comments_count
         
         # Статус поста
         status_config = {
@@ -1402,6 +1455,20 @@ class BlogCommentAdmin(admin.ModelAdmin, WordPressStyleAdminMixin):
         )
     content_preview.short_description = 'Comment Content'
     
+    def spam_score_badge(self, obj):
+        """Сохраненная оценка спама"""
+        level, color, icon = risk_level(obj.spam_score)
+        return format_html(
+            '<div style="text-align: center;">'
+            '<div style="font-size: 16px;">{}</div>'
+            '<div style="font-size: 11px; font-weight: bold; color: {};">{}</div>'
+            '<div style="font-size: 9px; color: #999;">{}</div>'
+            '</div>',
+            icon, color, obj.spam_score if obj.spam_score is not None else '—', level
+        )
+    spam_score_badge.short_description = 'Spam'
+    spam_score_badge.admin_order_field = 'spam_score'
+    
     def approval_status(self, obj):
         """Статус одобрения с дополнительной информацией"""
         if obj.is_approved:
@@ -1436,10 +1503,10 @@ class BlogCommentAdmin(admin.ModelAdmin, WordPressStyleAdminMixin):
     def comment_meta(self, obj):
         """Мета-информация комментария"""
         # IP-адрес (если есть)
-        ip_display = getattr(obj, 'ip_address', 'Unknown IP')
+        ip_display = obj.ip_address or 'Unknown IP'
         
         # User Agent (если есть)
-        user_agent = getattr(obj, 'user_agent', '')
+        user_agent = obj.user_agent or ''
         browser_info = 'Unknown Browser'
         if 'Chrome' in user_agent:
             browser_info = '🌐 Chrome'
@@ -1533,41 +1600,10 @@ class BlogCommentAdmin(admin.ModelAdmin, WordPressStyleAdminMixin):
         if not obj.pk:
             return format_html('<p style="color: #999;">Save comment to see spam check results</p>')
         
-        # Простая проверка на спам (в реальном проекте используйте Akismet или подобные сервисы)
-        spam_indicators = []
-        spam_score = 0
-        
-        # Проверяем подозрительные паттерны
-        content_lower = obj.content.lower()
-        
-        # Много ссылок
-        link_count = obj.content.count('http')
-        if link_count > 2:
-            spam_indicators.append(f'Multiple links ({link_count})')
-            spam_score += 30
-        
-        # Подозрительные слова
-        spam_words = ['free', 'buy now', 'click here', 'make money', 'casino', 'pills']
-        found_spam_words = [word for word in spam_words if word in content_lower]
-        if found_spam_words:
-            spam_indicators.append(f'Spam keywords: {", ".join(found_spam_words)}')
-            spam_score += 20 * len(found_spam_words)
-        
-        # Много заглавных букв
-        caps_ratio = sum(1 for c in obj.content if c.isupper()) / len(obj.content) if obj.content else 0
-        if caps_ratio > 0.3:
-            spam_indicators.append('Excessive caps')
-            spam_score += 25
-        
-        # Определяем уровень риска
-        if spam_score >= 50:
-            risk_level, risk_color, risk_icon = 'High Risk', '#dc3232', '🚨'
-        elif spam_score >= 25:
-            risk_level, risk_color, risk_icon = 'Medium Risk', '#f56e28', '⚠️'
-        elif spam_score > 0:
-            risk_level, risk_color, risk_icon = 'Low Risk', '#ffb900', '🟡'
-        else:
-            risk_level, risk_color, risk_icon = 'Clean', '#46b450', '✅'
+        # Оценка посчитана в фоне (blog.comments, команда score_comments)
+        spam_indicators = obj.spam_flags or []
+        spam_score = obj.spam_score if obj.spam_score is not None else '—'
+        level, risk_color, risk_icon = risk_level(obj.spam_score)
         
         return format_html(
             '<div class="wp-spam-check" style="background: white; padding: 15px; '
@@ -1582,11 +1618,15 @@ class BlogCommentAdmin(admin.ModelAdmin, WordPressStyleAdminMixin):
             '</div>'
             '{}'
             '</div>',
-            risk_icon, risk_color, risk_level, spam_score,
-            '<div style="background: #f9f9f9; padding: 10px; border-radius: 4px; '
+            risk_icon, risk_color, level, spam_score,
+            mark_safe('<div style="background: #f9f9f9; padding: 10px; border-radius: 4px; '
             'font-size: 12px; color: #666;"><strong>Issues found:</strong><br>{}</div>'.format(
-                '<br>'.join(f'• {indicator}' for indicator in spam_indicators)
-            ) if spam_indicators else '<div style="color: #46b450; font-size: 12px;">✅ No spam indicators detected</div>'
+                '<br>'.join(f'• {escape(indicator)}' for indicator in spam_indicators)
+            )) if spam_indicators else mark_safe(
+                '<div style="color: #82878c; font-size: 12px;">⏳ Queued for spam check</div>'
+                if obj.spam_score is None else
+                '<div style="color: #46b450; font-size: 12px;">✅ No spam indicators detected</div>'
+            )
         )
     spam_check_results.short_description = 'Spam Check'
     
@@ -1677,12 +1717,17 @@ class BlogCommentAdmin(admin.ModelAdmin, WordPressStyleAdminMixin):
     
     # WordPress-стиль действия
     def approve_comments(self, request, queryset):
+        # update() не шлет сигналов - счетчики статей пересчитываем сами
+        post_ids = set(queryset.values_list('post_id', flat=True))
         count = queryset.update(is_approved=True)
+        refresh_post_counters(post_ids)
         messages.success(request, f'✅ {count} comment{"s" if count != 1 else ""} approved!')
     approve_comments.short_description = "✅ Approve selected comments"
     
     def unapprove_comments(self, request, queryset):
+        post_ids = set(queryset.values_list('post_id', flat=True))
         count = queryset.update(is_approved=False)
+        refresh_post_counters(post_ids)
         messages.warning(request, f'❌ {count} comment{"s" if count != 1 else ""} unapproved.')
     unapprove_comments.short_description = "❌ Unapprove selected comments"
     
@@ -1732,13 +1777,18 @@ class BlogCommentAdmin(admin.ModelAdmin, WordPressStyleAdminMixin):
         messages.info(request, f'📋 {len(unique_emails)} unique author{"s" if len(unique_emails) != 1 else ""} would be added to whitelist. Feature requires implementation.')
     author_whitelist.short_description = "📋 Add authors to whitelist"
     
+    def rescore_comments(self, request, queryset):
+        count = requeue_comments(queryset)
+        messages.info(request, f'🛡️ {count} comment{"s" if count != 1 else ""} queued for a new spam check.')
+    rescore_comments.short_description = "🛡️ Re-run spam check"
+    
     class Media:
         css = {'all': ('/static/admin/css/custom_admin.css',)}
         js = ('/static/admin/js/custom_admin.js',)
 
 
 @admin.register(BlogImage)
-class BlogImageAdmin(admin.ModelAdmin, WordPressStyleAdminMixin):
+class BlogImageAdmin(MediaInfoAdminMixin, admin.ModelAdmin, WordPressStyleAdminMixin):
     """WordPress-стиль админка для изображений - как WordPress Media Library"""
     list_display = (
         'image_thumbnail', 'get_image_info', 'get_post_info', 
@@ -1749,6 +1799,12 @@ class BlogImageAdmin(admin.ModelAdmin, WordPressStyleAdminMixin):
     readonly_fields = ('image_large_preview', 'image_technical_info', 'created_at')
     list_per_page = 30
     
+    def get_queryset(self, request):
+        """Статья, ее автор и заголовки - в том же запросе (счетчик изображений - поле статьи)"""
+        return super().get_queryset(request).select_related(
+            'post', 'post__author'
+        ).prefetch_related('post__translations')
+    
     # WordPress-стиль fieldsets
     fieldsets = (
         ('🖼️ Image Upload', {
@@ -1773,8 +1829,8 @@ class BlogImageAdmin(admin.ModelAdmin, WordPressStyleAdminMixin):
         if obj.image:
             return format_html(
                 '<div class="wp-media-thumbnail" style="position: relative; border-radius: 8px; '
-                'overflow: hidden; box-shadow: 0 2px 8px rgba(0,0,0,0.15); background: white;">'
-                '<img src="{}" style="width: 80px; height: 60px; object-fit: cover; '
+                'overflow: hidden; box-shadow: 0 2px 8px rgba(0,0,0,0.15); background: {};">'
+                '<img src="{}" loading="lazy" style="width: 80px; height: 60px; object-fit: cover; '
                 'transition: all 0.3s ease;" '
                 'onmouseover="this.style.transform=\'scale(1.05)\';"'
                 'onmouseout="this.style.transform=\'scale(1)\';" />'
@@ -1786,7 +1842,8 @@ class BlogImageAdmin(admin.ModelAdmin, WordPressStyleAdminMixin):
                 'color: white; font-size: 8px; padding: 4px 2px; text-align: center; '
                 'border-radius: 0 0 6px 6px;">{}</div>'
                 '</div>',
-                obj.image.url,
+                getattr(obj.image_info, 'dominant_color', '') or 'white',
+                thumbnail_url(obj.image, obj.image_info),
                 obj.alt_text[:20] + '...' if obj.alt_text and len(obj.alt_text) > 20 else obj.alt_text or 'No alt text'
             )
         return format_html(
@@ -1800,44 +1857,37 @@ class BlogImageAdmin(admin.ModelAdmin, WordPressStyleAdminMixin):
     image_thumbnail.short_description = ''
     
     def get_image_info(self, obj):
-        """Информация об изображении"""
+        """Информация об изображении - из таблицы медиа, файл не открывается"""
         if obj.image:
-            try:
-                # Получаем размеры изображения
-                from PIL import Image
-                import os
-                
-                image_path = obj.image.path
-                if os.path.exists(image_path):
-                    with Image.open(image_path) as img:
-                        width, height = img.size
-                        file_size = os.path.getsize(image_path)
-                        file_size_mb = file_size / (1024 * 1024)
-                        
-                        # Определяем качество изображения
-                        total_pixels = width * height
-                        if total_pixels > 2000000:  # > 2MP
-                            quality_color, quality_text = '#46b450', 'High Res'
-                        elif total_pixels > 500000:  # > 0.5MP
-                            quality_color, quality_text = '#0073aa', 'Good'
-                        else:
-                            quality_color, quality_text = '#f56e28', 'Low Res'
-                else:
-                    width = height = 0
-                    file_size_mb = 0
-                    quality_color, quality_text = '#dc3232', 'Missing'
-            except Exception:
+            info = getattr(obj, 'image_info', None)
+            if info is None:
                 width = height = 0
                 file_size_mb = 0
-                quality_color, quality_text = '#82878c', 'Unknown'
+                quality_color, quality_text = '#82878c', 'Pending'
+            elif not info.exists:
+                width = height = 0
+                file_size_mb = 0
+                quality_color, quality_text = '#dc3232', 'Missing'
+            else:
+                width, height = info.width or 0, info.height or 0
+                file_size_mb = (info.size or 0) / (1024 * 1024)
+                
+                # Определяем качество изображения
+                total_pixels = width * height
+                if total_pixels > 2000000:  # > 2MP
+                    quality_color, quality_text = '#46b450', 'High Res'
+                elif total_pixels > 500000:  # > 0.5MP
+                    quality_color, quality_text = '#0073aa', 'Good'
+                else:
+                    quality_color, quality_text = '#f56e28', 'Low Res'
             
             return format_html(
                 '<div class="wp-image-info" style="display: flex; flex-direction: column; gap: 3px;">'
                 '<div style="font-weight: bold; color: #0073aa; font-size: 13px;">{} × {}</div>'
-                '<div style="font-size: 11px; color: #666;">{:.1f} MB</div>'
+                '<div style="font-size: 11px; color: #666;">{} MB</div>'
                 '<div>{}</div>'
                 '</div>',
-                width, height, file_size_mb,
+                width, height, f'{file_size_mb:.1f}',
                 self.get_wordpress_badge(quality_text, quality_color.replace('#', ''), '🖼️')
             )
         return format_html('<span style="color: #dc3232;">No image</span>')
@@ -1847,7 +1897,7 @@ class BlogImageAdmin(admin.ModelAdmin, WordPressStyleAdminMixin):
         """Информация о посте"""
         if obj.post:
             post_title = obj.post.safe_translation_getter('title', any_language=True) or f'Post {obj.post.pk}'
-            post_images_count = obj.post.images.count()
+            post_images_count = obj.post.images_count
             
             return format_html(
                 '<div class="wp-image-post" style="display: flex; flex-direction: column; gap: 3px;">'
@@ -1991,34 +2041,17 @@ class BlogImageAdmin(admin.ModelAdmin, WordPressStyleAdminMixin):
     image_large_preview.short_description = 'Large Preview'
     
     def image_technical_info(self, obj):
-        """Техническая информация об изображении"""
+        """Техническая информация об изображении (сохранена при загрузке)"""
         if not obj.image:
             return format_html('<p style="color: #999;">No image uploaded</p>')
         
-        try:
-            from PIL import Image
-            import os
-            
-            image_path = obj.image.path
-            if os.path.exists(image_path):
-                with Image.open(image_path) as img:
-                    width, height = img.size
-                    format_name = img.format
-                    mode = img.mode
-                    
-                file_size = os.path.getsize(image_path)
-                file_size_mb = file_size / (1024 * 1024)
-                
-                # Вычисляем aspect ratio
-                gcd = math.gcd(width, height) if width and height else 1
-                aspect_w = width // gcd if gcd else width
-                aspect_h = height // gcd if gcd else height
-                
-            else:
-                return format_html('<p style="color: #dc3232;">Image file not found</p>')
-                
-        except Exception as e:
-            return format_html('<p style="color: #dc3232;">Error reading image: {}</p>', str(e))
+        info = getattr(obj, 'image_info', None)
+        if info is None:
+            return format_html('<p style="color: #82878c;">⏳ Metadata is being collected, refresh in a moment</p>')
+        if not info.exists:
+            return format_html('<p style="color: #dc3232;">Image file not found</p>')
+        if info.error:
+            return format_html('<p style="color: #dc3232;">Error reading image: {}</p>', info.error)
         
         return format_html(
             '<div class="wp-image-technical" style="background: white; padding: 20px; '
@@ -2031,13 +2064,22 @@ class BlogImageAdmin(admin.ModelAdmin, WordPressStyleAdminMixin):
             '{}'
             '{}'
             '{}'
+            '{}'
             '</div>'
             '</div>',
-            self.get_wordpress_stat_card(f'{width}×{height}', 'Dimensions', 'blue', '📐'),
-            self.get_wordpress_stat_card(f'{file_size_mb:.1f}MB', 'File Size', 'green', '💾'),
-            self.get_wordpress_stat_card(format_name or 'Unknown', 'Format', 'orange', '🖼️'),
-            self.get_wordpress_stat_card(mode or 'Unknown', 'Color Mode', 'gray', '🎨'),
-            self.get_wordpress_stat_card(f'{aspect_w}:{aspect_h}', 'Aspect Ratio', 'blue', '📏'),
+            self.get_wordpress_stat_card(info.dimensions or 'Unknown', 'Dimensions', 'blue', '📐'),
+            self.get_wordpress_stat_card(f'{(info.size or 0) / (1024 * 1024):.1f}MB', 'File Size', 'green', '💾'),
+            self.get_wordpress_stat_card(info.format or 'Unknown', 'Format', 'orange', '🖼️'),
+            self.get_wordpress_stat_card(info.mode or 'Unknown', 'Color Mode', 'gray', '🎨'),
+            self.get_wordpress_stat_card(info.aspect_ratio or 'Unknown', 'Aspect Ratio', 'blue', '📏'),
+            self.get_wordpress_stat_card(
+                format_html(
+                    '<span style="display: inline-block; width: 18px; height: 18px; border-radius: 3px; '
+                    'vertical-align: middle; border: 1px solid #ddd; background: {};"></span> {}',
+                    info.dominant_color or 'transparent', info.dominant_color or '—'
+                ),
+                'Dominant Color', 'gray', '🎨'
+            ),
             self.get_wordpress_stat_card(obj.image.url.split('/')[-1][:15] + '...', 'Filename', 'gray', '📄')
         )
     image_technical_info.short_description = 'Technical Info'
@@ -0,0 +1,129 @@
+# backend/blog/cache.py
+"""
+Кэш публичных страниц блога и его точечная инвалидация.
+
+Списки (итоги keyset пагинации), страницы архивов категорий и тегов,
+RSS/Atom и sitemap читают кэш и не фильтруют по текущему времени,
+поэтому кэшируются целиком. Когда статья публикуется, снимается с
+публикации или меняется, сбрасываются только ключи, которые от нее
+зависят: общий список, ее категория, ее теги, лента и sitemap (см.
+invalidate_post_caches).
+
+Лента и sitemap кэшируются по языку: их URL без языкового префикса, а
+статьи parler в кэше хранят перевод языка, на котором были загружены.
+
+Страницы архива кэшируются по (категория/тег, курсор, язык). Все ключи
+архива содержат его версию; удаление ключа версии сбрасывает сразу все
+страницы архива (старые ключи просто истекают).
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import translation
+from taggit.models import Tag, TaggedItem
+
+from .models import BlogPost
+
+logger = logging.getLogger("blog.cache")
+
+PUBLIC_CACHE_TIMEOUT = getattr(settings, "BLOG_PUBLIC_CACHE_TIMEOUT", 60 * 60 * 6)
+ARCHIVE_CACHE_TIMEOUT = getattr(settings, "BLOG_ARCHIVE_CACHE_TIMEOUT", 60 * 60)
+
+LIST_TOTAL_KEY = "blog:total:list"
+FEED_ITEMS_KEY = "blog:feed:items"
+SITEMAP_ITEMS_KEY = "blog:sitemap:items"
+
+
+def _languages():
+    return [code for code, _name in settings.LANGUAGES]
+
+
+def language_items_key(key, language=None):
+    """Ключ списка статей для языка (по умолчанию - активного)"""
+    return f"{key}:{language or translation.get_language() or settings.LANGUAGE_CODE}"
+
+
+def category_total_key(category_id):
+    return f"blog:total:category:{category_id}"
+
+
+def tag_total_key(tag_slug):
+    return f"blog:total:tag:{tag_slug}"
+
+
+def archive_version_key(kind, value):
+    """kind: 'category' (value - id) или 'tag' (value - slug)"""
+    return f"blog:archive:{kind}:{value}"
+
+
+def archive_page_key(kind, value, language, cursor=""):
+    version_key = archive_version_key(kind, value)
+    version = cache.get(version_key)
+    if version is None:
+        cache.add(version_key, time.time_ns(), None)
+        version = cache.get(version_key)
+    return f"{version_key}:{version}:{language}:{cursor}"
+
+
+def cached_items(key, build, timeout=PUBLIC_CACHE_TIMEOUT):
+    """Список объектов из кэша; build() - список при промахе"""
+    items = cache.get(key)
+    if items is None:
+        items = list(build())
+        cache.set(key, items, timeout)
+    return items
+
+
+def post_tag_ids(post_ids):
+    return set(
+        TaggedItem.objects.filter(
+            content_type=ContentType.objects.get_for_model(BlogPost),
+            object_id__in=post_ids,
+        ).values_list("tag_id", flat=True)
+    )
+
+
+def affected_cache_keys(post_ids, tag_ids=()):
+    """Ключи кэша, которые зависят от статей post_ids (и тегов tag_ids)"""
+    post_ids = {pk for pk in post_ids if pk}
+    keys = {LIST_TOTAL_KEY}
+    for language in _languages():
+        keys.update(
+            (language_items_key(FEED_ITEMS_KEY, language), language_items_key(SITEMAP_ITEMS_KEY, language))
+        )
+    category_ids = BlogPost.objects.filter(pk__in=post_ids).exclude(category=None).values_list(
+        "category_id", flat=True
+    )
+    for category_id in set(category_ids):
+        keys.update((category_total_key(category_id), archive_version_key("category", category_id)))
+
+    tag_ids = set(tag_ids) | post_tag_ids(post_ids)
+    for slug in Tag.objects.filter(pk__in=tag_ids).values_list("slug", flat=True):
+        keys.update((tag_total_key(slug), archive_version_key("tag", slug)))
+    return keys
+
+
+def invalidate_post_caches(post_ids, tag_ids=(), extra_keys=()):
+    keys = affected_cache_keys(post_ids, tag_ids) | set(extra_keys)
+    cache.delete_many(list(keys))
+    logger.info(f"🧹 Сброшен кэш блога для статей {sorted(post_ids)}: {len(keys)} ключей")
+    return keys
+
+
+def schedule_cache_invalidation(post_ids, tag_ids=(), extra_keys=()):
+    """invalidate_post_caches после коммита транзакции"""
+    post_ids = {pk for pk in post_ids if pk}
+    tag_ids = set(tag_ids)
+    extra_keys = set(extra_keys)
+
+    def invalidate():
+        try:
+            invalidate_post_caches(post_ids, tag_ids, extra_keys)
+        except Exception as e:
+            logger.error(f"❌ Ошибка сброса кэша блога для статей {sorted(post_ids)}: {e}")
+
+    transaction.on_commit(invalidate)
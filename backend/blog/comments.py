@@ -0,0 +1,178 @@
+# backend/blog/comments.py
+"""
+Очередь комментариев и фоновая оценка спама.
+
+Публичная форма только сохраняет комментарий (не одобренным, со
+spam_score = NULL) и сразу отвечает - ничего не считает. Очередь - сама
+таблица BlogComment: неоцененные комментарии выбираются по индексу
+(scored_at, id) командой score_comments (воркер в docker-compose) с
+select_for_update(skip_locked), поэтому несколько воркеров не берут одни
+и те же строки.
+
+Оценка (0-100) складывается из эвристик, которые раньше считала админка
+на каждый просмотр (ссылки, спам-слова, капс), и двух проверок по БД:
+
+- лимит частоты: больше RATE_LIMIT комментариев с того же email или IP
+  за RATE_WINDOW;
+- дубликат: такой же текст (content_hash нормализованного текста) уже
+  отправляли.
+
+Оценка и список причин хранятся в комментарии, админка сортирует по
+spam_score и показывает сохраненные причины.
+"""
+import hashlib
+import ipaddress
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import BlogComment
+
+logger = logging.getLogger("blog.comments")
+
+BATCH_SIZE = 100
+
+RATE_WINDOW = timedelta(minutes=getattr(settings, "BLOG_COMMENT_RATE_WINDOW_MINUTES", 10))
+RATE_LIMIT = getattr(settings, "BLOG_COMMENT_RATE_LIMIT", 3)
+
+SPAM_WORDS = ["free", "buy now", "click here", "make money", "casino", "pills"]
+MAX_LINKS = 2
+CAPS_RATIO = 0.3
+
+LINKS_SCORE = 30
+SPAM_WORD_SCORE = 20
+CAPS_SCORE = 25
+RATE_LIMIT_SCORE = 30
+DUPLICATE_SCORE = 40
+MAX_SCORE = 100
+
+SCORED_FIELDS = ["spam_score", "spam_flags", "scored_at"]
+
+
+def content_fingerprint(content):
+    """Хэш текста без учета регистра и пробелов - для поиска дубликатов"""
+    normalized = " ".join((content or "").lower().split())
+    return hashlib.md5(normalized.encode("utf-8")).hexdigest() if normalized else ""
+
+
+def content_flags(content):
+    """[(причина, баллы)] по самому тексту"""
+    content = content or ""
+    flags = []
+
+    link_count = content.count("http")
+    if link_count > MAX_LINKS:
+        flags.append((f"Multiple links ({link_count})", LINKS_SCORE))
+
+    content_lower = content.lower()
+    found = [word for word in SPAM_WORDS if word in content_lower]
+    if found:
+        flags.append((f"Spam keywords: {', '.join(found)}", SPAM_WORD_SCORE * len(found)))
+
+    caps_ratio = sum(1 for char in content if char.isupper()) / len(content) if content else 0
+    if caps_ratio > CAPS_RATIO:
+        flags.append(("Excessive caps", CAPS_SCORE))
+    return flags
+
+
+def rate_flags(comment):
+    """Лимит частоты: комментарии с того же email или IP за RATE_WINDOW до этого"""
+    sender = Q(email__iexact=comment.email) if comment.email else Q()
+    if comment.ip_address:
+        sender |= Q(ip_address=comment.ip_address)
+    if not sender:
+        return []
+    recent = (
+        BlogComment.objects.filter(sender)
+        .filter(created_at__gte=comment.created_at - RATE_WINDOW, created_at__lte=comment.created_at)
+        .exclude(pk=comment.pk)
+        .count()
+    )
+    if recent >= RATE_LIMIT:
+        minutes = int(RATE_WINDOW.total_seconds() // 60)
+        return [(f"Rate limit: {recent + 1} comments in {minutes} min", RATE_LIMIT_SCORE)]
+    return []
+
+
+def duplicate_flags(comment, copies):
+    """copies - сколько комментариев с таким же content_hash (включая этот)"""
+    if comment.content_hash and copies > 1:
+        return [(f"Duplicate content ({copies} copies)", DUPLICATE_SCORE)]
+    return []
+
+
+def risk_level(score):
+    """(уровень, цвет, иконка) для админки; None - еще не оценен"""
+    if score is None:
+        return "Queued", "#82878c", "⏳"
+    if score >= 50:
+        return "High Risk", "#dc3232", "🚨"
+    if score >= 25:
+        return "Medium Risk", "#f56e28", "⚠️"
+    if score > 0:
+        return "Low Risk", "#ffb900", "🟡"
+    return "Clean", "#46b450", "✅"
+
+
+def score_comment(comment, copies=1):
+    """Посчитать оценку и причины (без сохранения)"""
+    flags = content_flags(comment.content) + rate_flags(comment) + duplicate_flags(comment, copies)
+    comment.spam_score = min(MAX_SCORE, sum(points for _reason, points in flags))
+    comment.spam_flags = [reason for reason, _points in flags]
+    comment.scored_at = timezone.now()
+    return comment
+
+
+def pending_comments():
+    """Очередь: еще не оцененные комментарии (индекс scored_at, id)"""
+    return BlogComment.objects.filter(scored_at__isnull=True).order_by("id")
+
+
+def score_pending_comments(limit=BATCH_SIZE):
+    """Оценить пачку комментариев из очереди; возвращает их число"""
+    with transaction.atomic():
+        comments = list(
+            pending_comments().select_for_update(skip_locked=True)
+            .only("pk", "email", "ip_address", "content", "content_hash", "created_at")[:limit]
+        )
+        if not comments:
+            return 0
+
+        hashes = {comment.content_hash for comment in comments if comment.content_hash}
+        copies = dict(
+            BlogComment.objects.filter(content_hash__in=hashes).order_by()
+            .values("content_hash").annotate(total=Count("id"))
+            .values_list("content_hash", "total")
+        )
+        for comment in comments:
+            score_comment(comment, copies.get(comment.content_hash, 1))
+        BlogComment.objects.bulk_update(comments, SCORED_FIELDS)
+
+    flagged = sum(1 for comment in comments if comment.spam_score)
+    logger.info(f"🛡️ Оценено комментариев: {len(comments)}, с признаками спама: {flagged}")
+    return len(comments)
+
+
+def requeue_comments(queryset):
+    """Вернуть комментарии в очередь (например, после правки текста)"""
+    return queryset.update(spam_score=None, spam_flags=[], scored_at=None)
+
+
+def client_ip(request):
+    """
+    IP отправителя: X-Real-IP от nginx ($remote_addr), иначе последний адрес
+    X-Forwarded-For (его дописывает nginx; первые задает сам клиент), иначе
+    REMOTE_ADDR.
+    """
+    address = request.META.get("HTTP_X_REAL_IP", "").strip()
+    if not address:
+        forwarded = request.META.get("HTTP_X_FORWARDED_FOR", "")
+        address = forwarded.split(",")[-1].strip() if forwarded else request.META.get("REMOTE_ADDR", "")
+    try:
+        return str(ipaddress.ip_address(address))
+    except ValueError:
+        return None
@@ -0,0 +1,367 @@
+# backend/blog/content.py
+"""
+Производные данные контента статьи, посчитанные при сохранении перевода.
+
+HTML из CKEditor разбирается один раз (pre_translation_save), в переводе
+сохраняются:
+
+- rendered_content - очищенный HTML для страницы (без <script>/<style>,
+  анимаций SVG, on* атрибутов и ссылок со схемами не из URL_SCHEMES;
+  у заголовков h2-h4 есть id для оглавления);
+- plain_text, word_count, reading_minutes, auto_excerpt;
+- toc - оглавление [{level, id, text}];
+- content_images - картинки контента [{src, alt, width, height}].
+
+Картинки из медиатеки переписываются под адаптивную загрузку: srcset из
+WebP-вариантов (алиасы CONTENT_IMAGE_ALIASES в THUMBNAIL_ALIASES, уже,
+чем оригинал), sizes, loading="lazy", decoding="async" и width/height
+оригинала (из core.media_health) - без скачков верстки. Варианты
+создаются тут же, при сохранении; готовый HTML хранится в
+rendered_content и отдается страницей как есть.
+
+Шаблоны, RSS и фильтры читают готовые поля и не гоняют регулярные
+выражения по большому HTML на каждый запрос. content_hash - хэш исходного
+HTML: если контент не менялся, разбор пропускается.
+"""
+import hashlib
+import html
+import logging
+from html.parser import HTMLParser
+from urllib.parse import unquote
+
+from django.conf import settings
+from django.utils.text import slugify
+from easy_thumbnails.alias import aliases
+from easy_thumbnails.files import get_thumbnailer
+
+from core.media_health import media_info, record_media
+
+logger = logging.getLogger("blog.content")
+
+WORDS_PER_MINUTE = 200
+EXCERPT_LENGTH = 300
+TOC_LEVELS = {"h2": 2, "h3": 3, "h4": 4}
+
+# Содержимое этих тегов выбрасывается целиком
+DROPPED_TAGS = {"script", "style"}
+# Сами теги выбрасываются, содержимое остается: анимации SVG подменяют
+# атрибуты (attributeName="href" values="javascript:..."), object/embed/base
+# загружают или перенаправляют внешние ресурсы
+STRIPPED_TAGS = {"animate", "animatemotion", "animatetransform", "set", "object", "embed", "base"}
+BLOCK_TAGS = {
+    "p", "div", "br", "li", "ul", "ol", "table", "tr", "td", "th",
+    "blockquote", "section", "article", "figure", "figcaption",
+    "h1", "h2", "h3", "h4", "h5", "h6",
+}
+# Атрибуты со ссылками (плюс все *href и *src, например xlink:href)
+URL_ATTRIBUTES = {"href", "src", "action", "formaction", "poster", "background", "cite", "data"}
+# Схемы, разрешенные в ссылках; относительные ссылки и якоря без схемы разрешены
+URL_SCHEMES = {"http", "https", "mailto", "tel"}
+DROPPED_ATTRIBUTES = {"srcdoc"}
+
+# Ширины вариантов картинок контента (см. THUMBNAIL_ALIASES)
+CONTENT_IMAGE_ALIASES = getattr(
+    settings,
+    "BLOG_CONTENT_IMAGE_ALIASES",
+    ("blog_content_sm", "blog_content_md", "blog_content_lg"),
+)
+CONTENT_IMAGE_EXTENSION = "webp"
+# Колонка статьи (col-lg-8) не шире ~800px
+CONTENT_IMAGE_SIZES = "(max-width: 800px) 100vw, 800px"
+
+DERIVED_FIELDS = (
+    "rendered_content",
+    "plain_text",
+    "word_count",
+    "reading_minutes",
+    "auto_excerpt",
+    "toc",
+    "content_images",
+    "content_hash",
+)
+
+
+def content_hash(content):
+    return hashlib.md5((content or "").encode("utf-8")).hexdigest()
+
+
+def _is_url_attribute(name):
+    return name in URL_ATTRIBUTES or name.endswith(("href", "src"))
+
+
+def _safe_url(name, value):
+    """
+    Ссылка допустима, если у нее нет схемы или схема из URL_SCHEMES
+    (data: - только картинки в src). Значение уже без HTML-сущностей
+    (convert_charrefs); пробелы и управляющие символы браузер внутри схемы
+    игнорирует ("java&#x09;script:"), поэтому они удаляются до проверки.
+    """
+    compact = "".join(char for char in value if char > " " and not "\x7f" <= char <= "\x9f").lower()
+    scheme, colon, _rest = compact.partition(":")
+    if not colon or any(char in scheme for char in "/?#"):
+        return True
+    if scheme == "data":
+        return name == "src" and compact.startswith("data:image/") and not compact.startswith("data:image/svg")
+    return scheme in URL_SCHEMES
+
+
+def _safe_attrs(attrs):
+    safe = []
+    for name, value in attrs:
+        name = name.lower()
+        if name.startswith("on") or name in DROPPED_ATTRIBUTES:
+            continue
+        if value and _is_url_attribute(name) and not _safe_url(name, value):
+            continue
+        safe.append((name, value))
+    return safe
+
+
+def _render_attrs(attrs):
+    return "".join(
+        f" {name}" if value is None else f' {name}="{html.escape(value, quote=True)}"'
+        for name, value in attrs
+    )
+
+
+class ContentParser(HTMLParser):
+    """Один проход по HTML: очищенный HTML, текст, оглавление, картинки"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.output = []
+        self.text = []
+        self.toc = []
+        self.images = []
+        self.image_tags = []
+        self._dropped = 0
+        self._heading = None
+        self._ids = set()
+        # Заголовки без id: id выдаются после разбора, когда известны все явные id
+        self._pending_ids = []
+
+    def handle_starttag(self, tag, attrs, closed=False):
+        if tag in DROPPED_TAGS:
+            if not closed:
+                self._dropped += 1
+            return
+        if self._dropped or tag in STRIPPED_TAGS:
+            return
+        attrs = _safe_attrs(attrs)
+        attrs = self._reserve_id(tag, attrs)
+        if tag in BLOCK_TAGS:
+            self.text.append("\n")
+        if tag == "img":
+            values = dict(attrs)
+            if values.get("src"):
+                self.images.append(
+                    {
+                        "src": values["src"],
+                        "alt": values.get("alt") or "",
+                        "width": values.get("width") or "",
+                        "height": values.get("height") or "",
+                    }
+                )
+                # Тег перепишем после разбора (rewrite_images)
+                self.image_tags.append((len(self.output), attrs, closed))
+        if tag in TOC_LEVELS and not closed and self._heading is None:
+            # id подставим в конце заголовка, когда будет известен текст
+            self._heading = (tag, attrs, len(self.output), len(self.text))
+            self.output.append("")
+            return
+        self.output.append(f"<{tag}{_render_attrs(attrs)}{' /' if closed else ''}>")
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs, closed=True)
+
+    def handle_endtag(self, tag):
+        if tag in DROPPED_TAGS:
+            self._dropped = max(0, self._dropped - 1)
+            return
+        if self._dropped or tag in STRIPPED_TAGS:
+            return
+        if self._heading and self._heading[0] == tag:
+            self._close_heading()
+        if tag in BLOCK_TAGS:
+            self.text.append("\n")
+        self.output.append(f"</{tag}>")
+
+    def _reserve_id(self, tag, attrs):
+        """Явный id занимается сразу; повтор у заголовка получает суффикс"""
+        anchor = dict(attrs).get("id")
+        if not anchor:
+            return attrs
+        if tag in TOC_LEVELS and anchor in self._ids:
+            anchor = self._unique_id(anchor)
+            attrs = _set_attr(attrs, "id", anchor)
+        self._ids.add(anchor)
+        return attrs
+
+    def _close_heading(self):
+        tag, attrs, position, text_start = self._heading
+        self._heading = None
+        text = " ".join("".join(self.text[text_start:]).split())
+        entry = {"level": TOC_LEVELS[tag], "id": dict(attrs).get("id"), "text": text}
+        if text:
+            self.toc.append(entry)
+        if entry["id"]:
+            self.output[position] = f"<{tag}{_render_attrs(attrs)}>"
+        else:
+            base = slugify(text) or f"section-{len(self._pending_ids) + 1}"
+            self._pending_ids.append((tag, attrs, position, base, entry))
+
+    def _assign_ids(self):
+        for tag, attrs, position, base, entry in self._pending_ids:
+            entry["id"] = self._unique_id(base)
+            self._ids.add(entry["id"])
+            self.output[position] = f"<{tag}{_render_attrs([*attrs, ('id', entry['id'])])}>"
+        self._pending_ids = []
+
+    def _unique_id(self, base):
+        anchor, index = base, 2
+        while anchor in self._ids:
+            anchor = f"{base}-{index}"
+            index += 1
+        return anchor
+
+    def close(self):
+        super().close()
+        if self._heading:
+            self._close_heading()
+        self._assign_ids()
+
+    def handle_data(self, data):
+        if self._dropped:
+            return
+        self.text.append(data)
+        self.output.append(html.escape(data, quote=False))
+
+    def handle_comment(self, data):
+        # Комментарии (в т.ч. условные комментарии Word) не выводим
+        pass
+
+
+# --- Картинки контента ----------------------------------------------------------
+
+
+def media_name(src):
+    """/media/uploads/a.jpg -> uploads/a.jpg (None - картинка не из медиатеки)"""
+    if src and src.startswith(settings.MEDIA_URL) and ".." not in src:
+        return unquote(src[len(settings.MEDIA_URL):].split("?", 1)[0])
+    return None
+
+
+def _variants(name, width):
+    """[(url, ширина)] WebP-вариантов уже оригинала (создаются при отсутствии)"""
+    thumbnailer = get_thumbnailer(name)
+    thumbnailer.thumbnail_extension = CONTENT_IMAGE_EXTENSION
+    thumbnailer.thumbnail_preserve_extensions = None
+    variants = []
+    for alias in CONTENT_IMAGE_ALIASES:
+        options = aliases.get(alias)
+        if not options:
+            continue
+        target = options["size"][0]
+        if width and target >= width:
+            continue
+        thumbnail = thumbnailer.get_thumbnail(options)
+        variants.append((thumbnail.url, thumbnail.width))
+    return variants
+
+
+def _set_attr(attrs, name, value, replace=True):
+    if not replace and any(key == name for key, _value in attrs):
+        return attrs
+    return [(key, current) for key, current in attrs if key != name] + [(name, value)]
+
+
+def rewrite_images(parser):
+    """
+    Переписать <img> в выводе парсера: lazy/async у всех, width/height,
+    srcset и sizes - у картинок из медиатеки.
+    """
+    names = {media_name(dict(attrs).get("src")) for _position, attrs, _closed in parser.image_tags}
+    names.discard(None)
+    info = media_info(names)
+    missing = names - set(info)
+    if missing:
+        info.update(record_media(missing))
+
+    for position, attrs, closed in parser.image_tags:
+        values = dict(attrs)
+        attrs = _set_attr(attrs, "loading", "lazy", replace=False)
+        attrs = _set_attr(attrs, "decoding", "async")
+
+        name = media_name(values.get("src"))
+        media = info.get(name) if name else None
+        if media is not None and media.exists and media.width and media.height:
+            if not values.get("width") and not values.get("height"):
+                attrs = _set_attr(attrs, "width", str(media.width))
+                attrs = _set_attr(attrs, "height", str(media.height))
+            try:
+                variants = _variants(name, media.width)
+            except Exception as e:
+                logger.error(f"❌ Не удалось создать варианты картинки {name}: {e}")
+                variants = []
+            if variants:
+                srcset = [f"{url} {width}w" for url, width in variants]
+                srcset.append(f"{values['src']} {media.width}w")
+                attrs = _set_attr(attrs, "srcset", ", ".join(srcset))
+                attrs = _set_attr(attrs, "sizes", CONTENT_IMAGE_SIZES, replace=False)
+
+        parser.output[position] = f"<img{_render_attrs(attrs)}{' /' if closed else ''}>"
+
+
+def _excerpt(text, length=EXCERPT_LENGTH):
+    if len(text) <= length:
+        return text
+    return text[:length].rsplit(" ", 1)[0] + "..."
+
+
+def derive_content(content):
+    """Все производные поля для HTML content"""
+    parser = ContentParser()
+    parser.feed(content or "")
+    parser.close()
+    rewrite_images(parser)
+
+    text = " ".join("".join(parser.text).split())
+    word_count = len(text.split())
+    return {
+        "rendered_content": "".join(parser.output),
+        "plain_text": text,
+        "word_count": word_count,
+        "reading_minutes": max(1, round(word_count / WORDS_PER_MINUTE)),
+        "auto_excerpt": _excerpt(text),
+        "toc": parser.toc,
+        "content_images": parser.images,
+        "content_hash": content_hash(content),
+    }
+
+
+def apply_derived_content(translation, force=False):
+    """Заполнить производные поля перевода; False - контент не менялся"""
+    digest = content_hash(translation.content)
+    if not force and translation.content_hash == digest:
+        return False
+    for field, value in derive_content(translation.content).items():
+        setattr(translation, field, value)
+    logger.info(
+        f"🧾 Контент статьи {translation.master_id} [{translation.language_code}]: "
+        f"{translation.word_count} слов, {len(translation.toc)} заголовков, "
+        f"{len(translation.content_images)} изображений"
+    )
+    return True
+
+
+def rebuild_post_content(force=False):
+    """Пересчитать производные поля всех переводов; возвращает число обновленных"""
+    from .models import BlogPost
+
+    model = BlogPost._parler_meta.root_model
+    updated = []
+    for translation in model.objects.all().iterator():
+        if apply_derived_content(translation, force=force):
+            updated.append(translation)
+    model.objects.bulk_update(updated, DERIVED_FIELDS, batch_size=200)
+    return len(updated)
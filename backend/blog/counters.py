@@ -0,0 +1,72 @@
+# backend/blog/counters.py
+"""
+Денормализованные счетчики статьи: одобренные комментарии и изображения.
+
+BlogPost.approved_comments_count и images_count обновляются сигналами
+(blog.signals) при сохранении и удалении комментариев и изображений, а
+также массовыми действиями админки (queryset.update сигналов не шлет).
+Счетчик не увеличивается на единицу, а пересчитывается одним UPDATE с
+подзапросом COUNT по индексу внешнего ключа - одновременные изменения не
+приводят к расхождению.
+
+Админка и публичные страницы читают готовые поля вместо COUNT на каждую
+строку. Если счетчики все же разошлись (правка в обход ORM), их
+выравнивает команда reconcile_post_counters.
+"""
+import logging
+
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import BlogComment, BlogImage, BlogPost
+
+logger = logging.getLogger("blog.counters")
+
+
+def _count(queryset):
+    return Coalesce(
+        Subquery(
+            queryset.filter(post_id=OuterRef("pk")).order_by().values("post_id")
+            .annotate(total=Count("id")).values("total"),
+            output_field=IntegerField(),
+        ),
+        Value(0),
+    )
+
+
+def counter_values():
+    """Выражения с фактическими значениями счетчиков"""
+    return {
+        "approved_comments_count": _count(BlogComment.objects.filter(is_approved=True)),
+        "images_count": _count(BlogImage.objects.all()),
+    }
+
+
+def refresh_post_counters(post_ids):
+    """Пересчитать счетчики статей post_ids одним UPDATE"""
+    post_ids = {pk for pk in post_ids if pk}
+    if not post_ids:
+        return 0
+    return BlogPost.objects.filter(pk__in=post_ids).update(**counter_values())
+
+
+def stale_post_ids():
+    """Статьи, у которых сохраненные счетчики не совпадают с фактическими"""
+    values = counter_values()
+    return set(
+        BlogPost.objects.annotate(
+            actual_comments=values["approved_comments_count"],
+            actual_images=values["images_count"],
+        ).exclude(
+            approved_comments_count=F("actual_comments"),
+            images_count=F("actual_images"),
+        ).values_list("pk", flat=True)
+    )
+
+
+def reconcile_post_counters():
+    """Выровнять расходящиеся счетчики; возвращает id исправленных статей"""
+    stale = stale_post_ids()
+    refresh_post_counters(stale)
+    logger.info(f"🔢 Счетчики статей сверены, исправлено: {len(stale)}")
+    return stale
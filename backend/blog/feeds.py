@@ -2,6 +2,7 @@
 from django.contrib.syndication.views import Feed
 from django.urls import reverse
 from django.utils.feedgenerator import Atom1Feed
+from .cache import FEED_ITEMS_KEY, cached_items, language_items_key
 from .models import BlogPost
 
 class BlogFeed(Feed):
@@ -10,13 +11,19 @@ class BlogFeed(Feed):
     description = "Latest travel guides and stories from Abroads Tours"
     
     def items(self):
-        return BlogPost.objects.filter(status='published').order_by('-published_at')[:10]
+        # Кэш сбрасывается при публикации/изменении статей (blog.cache)
+        return cached_items(language_items_key(FEED_ITEMS_KEY), lambda: (
+            BlogPost.objects.filter(status='published')
+            .prefetch_related('translations')
+            .order_by('-published_at')[:10]
+        ))
     
     def item_title(self, item):
-        return item.title
+        return item.get_display_title()
     
     def item_description(self, item):
-        return item.excerpt or item.content[:200] + '...'
+        # excerpt или готовое описание из текста статьи (blog.content)
+        return item.get_display_excerpt()
     
     def item_link(self, item):
         return item.get_absolute_url()
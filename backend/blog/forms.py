@@ -0,0 +1,23 @@
+# backend/blog/forms.py
+from django import forms
+
+from .models import BlogComment
+
+
+class CommentForm(forms.ModelForm):
+    """Публичная форма комментария (оценка спама - в фоне, см. blog.comments)"""
+
+    class Meta:
+        model = BlogComment
+        fields = ["name", "email", "content"]
+        widgets = {
+            "content": forms.Textarea(attrs={"rows": 5, "maxlength": 5000}),
+        }
+
+    def clean_content(self):
+        content = self.cleaned_data["content"].strip()
+        if not content:
+            raise forms.ValidationError("Comment is empty")
+        if len(content) > 5000:
+            raise forms.ValidationError("Comment is too long")
+        return content
@@ -1,7 +1,6 @@
 # backend/blog/management/commands/generate_seo_data.py
 from django.core.management.base import BaseCommand
 from blog.models import BlogPost
-import re
 
 class Command(BaseCommand):
     help = 'Generate SEO data for existing blog posts'
@@ -12,8 +11,8 @@ class Command(BaseCommand):
         
         for post in posts:
             # Генерируем meta description из content
-            if not post.meta_description and post.content:
-                clean_content = re.sub(r'<[^>]+>', '', post.content)
+            if not post.meta_description and post.plain_text:
+                clean_content = post.plain_text
                 post.meta_description = clean_content[:160].strip()
                 if len(clean_content) > 160:
                     post.meta_description += '...'
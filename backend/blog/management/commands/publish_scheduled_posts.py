@@ -0,0 +1,15 @@
+# backend/blog/management/commands/publish_scheduled_posts.py
+from django.core.management.base import BaseCommand
+
+from blog.publishing import publish_due_posts
+
+
+class Command(BaseCommand):
+    help = "Publish scheduled blog posts whose publication time has come"
+
+    def handle(self, *args, **options):
+        post_ids = publish_due_posts()
+        if post_ids:
+            self.stdout.write(self.style.SUCCESS(f"⏰ Published {len(post_ids)} scheduled posts: {post_ids}"))
+        else:
+            self.stdout.write("⏰ No scheduled posts are due")
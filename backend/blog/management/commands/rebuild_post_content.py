@@ -0,0 +1,20 @@
+# backend/blog/management/commands/rebuild_post_content.py
+from django.core.management.base import BaseCommand
+
+from blog.content import rebuild_post_content
+
+
+class Command(BaseCommand):
+    help = "Recompute derived content (clean HTML, text, reading time, excerpt, TOC, images) for blog post translations"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Recompute even translations whose content has not changed',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write("🧾 Rebuilding derived post content...")
+        count = rebuild_post_content(force=options['force'])
+        self.stdout.write(self.style.SUCCESS(f"✅ Derived content updated for {count} translations"))
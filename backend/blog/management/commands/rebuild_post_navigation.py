@@ -0,0 +1,13 @@
+# backend/blog/management/commands/rebuild_post_navigation.py
+from django.core.management.base import BaseCommand
+
+from blog.navigation import rebuild_post_navigation
+
+
+class Command(BaseCommand):
+    help = "Recompute stored previous/next links and related posts for all blog posts"
+
+    def handle(self, *args, **options):
+        self.stdout.write("🧭 Rebuilding post navigation...")
+        count = rebuild_post_navigation()
+        self.stdout.write(self.style.SUCCESS(f"✅ Navigation stored for {count} published posts"))
@@ -0,0 +1,16 @@
+# backend/blog/management/commands/rebuild_related_content.py
+from django.core.management.base import BaseCommand
+
+from blog.navigation import rebuild_post_navigation
+from blog.related import rebuild_related_content
+
+
+class Command(BaseCommand):
+    help = "Recompute TF-IDF related posts and tours for all published blog posts"
+
+    def handle(self, *args, **options):
+        self.stdout.write("🧠 Computing related content...")
+        post_ids = rebuild_related_content()
+        self.stdout.write(f"🧭 Refreshing navigation links for {len(post_ids)} posts...")
+        rebuild_post_navigation()
+        self.stdout.write(self.style.SUCCESS("✅ Related posts and tours stored"))
@@ -0,0 +1,23 @@
+# backend/blog/management/commands/reconcile_post_counters.py
+from django.core.management.base import BaseCommand
+
+from blog.counters import reconcile_post_counters, stale_post_ids
+
+
+class Command(BaseCommand):
+    help = "Check and fix denormalized approved comment and image counters on blog posts"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Only report posts with stale counters")
+
+    def handle(self, *args, **options):
+        if options["dry_run"]:
+            stale = stale_post_ids()
+            self.stdout.write(f"🔢 Posts with stale counters: {len(stale)} {sorted(stale)[:20]}")
+            return
+
+        fixed = reconcile_post_counters()
+        if fixed:
+            self.stdout.write(self.style.WARNING(f"🔢 Fixed counters for {len(fixed)} posts: {sorted(fixed)[:20]}"))
+        else:
+            self.stdout.write(self.style.SUCCESS("🔢 All post counters are up to date"))
@@ -0,0 +1,28 @@
+# backend/blog/management/commands/score_comments.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog.comments import BATCH_SIZE, score_pending_comments
+
+
+class Command(BaseCommand):
+    help = "Score queued blog comments for spam (rate limit, duplicates, content heuristics)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Comments per batch")
+        parser.add_argument("--loop", action="store_true", help="Keep polling the queue (worker mode)")
+        parser.add_argument("--interval", type=float, default=5, help="Seconds to sleep when the queue is empty")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        total = 0
+        while True:
+            scored = score_pending_comments(batch_size)
+            total += scored
+            if scored < batch_size:
+                if not options["loop"]:
+                    break
+                time.sleep(options["interval"])
+
+        self.stdout.write(self.style.SUCCESS(f"🛡️ Scored {total} comments"))
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.11 on 2026-10-19 06:42
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0003_alter_blogimage_image_alter_blogpost_featured_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogposttranslation',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='blogposttranslation',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='blogpost_search_gin'),
+        ),
+    ]
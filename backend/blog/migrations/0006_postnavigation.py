@@ -0,0 +1,29 @@
+# Generated by Django 4.2.11 on 2026-10-19 06:54
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0005_blogpost_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostNavigation',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='navigation', serialize=False, to='blog.blogpost')),
+                ('related_post_ids', models.JSONField(blank=True, default=list)),
+                ('links', models.JSONField(blank=True, default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('next_post', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='blog.blogpost')),
+                ('previous_post', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='blog.blogpost')),
+            ],
+            options={
+                'verbose_name': 'Post Navigation',
+                'verbose_name_plural': 'Post Navigation',
+            },
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 4.2.11 on 2026-10-19 06:55
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tours', '0009_tour_keyset_indexes'),
+        ('blog', '0006_postnavigation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostTourSimilarity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(default=0)),
+                ('rank', models.PositiveSmallIntegerField(default=0, help_text='0 = most similar')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tour_suggestions', to='blog.blogpost')),
+                ('tour', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='post_suggestions', to='tours.tour')),
+            ],
+            options={
+                'verbose_name': 'Post Tour Suggestion',
+                'verbose_name_plural': 'Post Tour Suggestions',
+                'ordering': ['post', 'rank'],
+                'indexes': [models.Index(fields=['post', 'rank'], name='blog_postto_post_id_2c00e1_idx')],
+                'unique_together': {('post', 'tour')},
+            },
+        ),
+        migrations.CreateModel(
+            name='PostSimilarity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(default=0)),
+                ('rank', models.PositiveSmallIntegerField(default=0, help_text='0 = most similar')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similarities', to='blog.blogpost')),
+                ('related_post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbour_links', to='blog.blogpost')),
+            ],
+            options={
+                'verbose_name': 'Post Similarity',
+                'verbose_name_plural': 'Post Similarities',
+                'ordering': ['post', 'rank'],
+                'indexes': [models.Index(fields=['post', 'rank'], name='blog_postsi_post_id_e88f0b_idx')],
+                'unique_together': {('post', 'related_post')},
+            },
+        ),
+    ]
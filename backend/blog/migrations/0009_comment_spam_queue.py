@@ -0,0 +1,76 @@
+# Generated by Django 4.2.11 on 2026-10-19 07:08
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def content_fingerprint(content):
+    # Копия blog.comments.content_fingerprint на момент миграции
+    normalized = ' '.join((content or '').lower().split())
+    return hashlib.md5(normalized.encode('utf-8')).hexdigest() if normalized else ''
+
+
+def fill_content_hash(apps, schema_editor):
+    BlogComment = apps.get_model('blog', 'BlogComment')
+    comments = list(BlogComment.objects.only('pk', 'content'))
+    for comment in comments:
+        comment.content_hash = content_fingerprint(comment.content)
+    BlogComment.objects.bulk_update(comments, ['content_hash'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0008_post_derived_content'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogcomment',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='blogcomment',
+            name='ip_address',
+            field=models.GenericIPAddressField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='blogcomment',
+            name='scored_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='blogcomment',
+            name='spam_flags',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.AddField(
+            model_name='blogcomment',
+            name='spam_score',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='blogcomment',
+            name='user_agent',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='blogcomment',
+            index=models.Index(fields=['scored_at', 'id'], name='blog_comment_queue_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='blogcomment',
+            index=models.Index(fields=['-spam_score', '-created_at'], name='blog_comment_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='blogcomment',
+            index=models.Index(fields=['email', 'created_at'], name='blog_comment_email_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='blogcomment',
+            index=models.Index(fields=['ip_address', 'created_at'], name='blog_comment_ip_idx'),
+        ),
+        migrations.RunPython(fill_content_hash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.11 on 2026-10-19 07:10
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def _count(queryset):
+    return Coalesce(
+        Subquery(
+            queryset.filter(post_id=OuterRef('pk')).order_by().values('post_id')
+            .annotate(total=Count('id')).values('total'),
+            output_field=IntegerField(),
+        ),
+        Value(0),
+    )
+
+
+def fill_counters(apps, schema_editor):
+    BlogPost = apps.get_model('blog', 'BlogPost')
+    BlogComment = apps.get_model('blog', 'BlogComment')
+    BlogImage = apps.get_model('blog', 'BlogImage')
+    BlogPost.objects.update(
+        approved_comments_count=_count(BlogComment.objects.filter(is_approved=True)),
+        images_count=_count(BlogImage.objects.all()),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0009_comment_spam_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogpost',
+            name='approved_comments_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='images_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
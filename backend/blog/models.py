@@ -1,9 +1,9 @@
 # backend/blog/models.py
 import logging
-import os
-import re
 import traceback
 
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.urls import reverse
 from django.utils import timezone
@@ -13,7 +13,10 @@ from ckeditor_uploader.fields import RichTextUploadingField
 from easy_thumbnails.fields import ThumbnailerImageField
 from parler.models import TranslatableModel, TranslatedFields
 from taggit.managers import TaggableManager
-from PIL import Image
+
+from core.image_changes import ImageChangeTrackingMixin
+from core.image_jobs import DERIVATIVES_PIPELINE, enqueue_image_job, run_job, schedule_image_job
+from core.url_cache import cached_absolute_url
 
 # Настройка логгера
 logger = logging.getLogger('blog.models')
@@ -59,8 +62,9 @@ class Category(TranslatableModel):
             super().save(*args, **kwargs)
 
 
-class BlogPost(TranslatableModel):
+class BlogPost(ImageChangeTrackingMixin, TranslatableModel):
     """Модель статьи блога с SEO и переводами"""
+    tracked_image_fields = ('featured_image',)
     
     STATUS_CHOICES = [
         ('draft', 'Draft'),
@@ -77,6 +81,10 @@ class BlogPost(TranslatableModel):
         blank=True, null=True,
         help_text="Recommended size: 1200x630px for social media"
     )
+    # Отпечаток файла: по нему видно, что изображение действительно заменили
+    featured_image_hash = models.CharField(max_length=64, blank=True, editable=False)
+    featured_image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    featured_image_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
     
     # Даты
     created_at = models.DateTimeField(auto_now_add=True)
@@ -89,6 +97,10 @@ class BlogPost(TranslatableModel):
     views_count = models.PositiveIntegerField(default=0)
     reading_time = models.PositiveIntegerField(default=5, help_text="Reading time in minutes")
     
+    # Денормализованные счетчики (обновляются сигналами, см. blog.counters)
+    approved_comments_count = models.PositiveIntegerField(default=0, editable=False)
+    images_count = models.PositiveIntegerField(default=0, editable=False)
+    
     # Теги
     tags = TaggableManager(blank=True)
     
@@ -144,6 +156,22 @@ class BlogPost(TranslatableModel):
             ],
             help_text="Schema.org article type"
         ),
+        
+        # Производные данные контента, считаются при сохранении (см. blog.content)
+        rendered_content=models.TextField(blank=True, editable=False),
+        plain_text=models.TextField(blank=True, editable=False),
+        word_count=models.PositiveIntegerField(default=0, editable=False),
+        reading_minutes=models.PositiveSmallIntegerField(default=1, editable=False),
+        auto_excerpt=models.TextField(blank=True, editable=False),
+        toc=models.JSONField(default=list, blank=True, editable=False),
+        content_images=models.JSONField(default=list, blank=True, editable=False),
+        content_hash=models.CharField(max_length=32, blank=True, editable=False),
+        
+        # Полнотекстовый поиск (см. core.search)
+        search_vector=SearchVectorField(null=True, editable=False),
+        meta={
+            'indexes': [GinIndex(fields=['search_vector'], name='blogpost_search_gin')],
+        },
     )
     
     class Meta:
@@ -153,82 +181,48 @@ class BlogPost(TranslatableModel):
         indexes = [
             models.Index(fields=['-published_at', 'status']),
             models.Index(fields=['status', 'is_featured']),
+            # Keyset пагинация списков: (published_at, id) внутри статуса/категории
+            models.Index(fields=['status', '-published_at', '-id'], name='blogpost_keyset_idx'),
+            models.Index(fields=['category', 'status', '-published_at', '-id'], name='blogpost_cat_keyset_idx'),
         ]
     
     def __str__(self):
         return self.safe_translation_getter('title', any_language=True) or f"Post {self.pk}"
     
     def get_absolute_url(self):
-        """Получаем URL статьи с правильной работой переводов"""
+        """Получаем URL статьи (из общего кэша путей)"""
+        return cached_absolute_url(self, self.build_absolute_url)
+    
+    def build_absolute_url(self):
+        """Вычисляем URL статьи для активного языка"""
         slug = self.safe_translation_getter('slug', any_language=True)
         if slug:
             return reverse('blog:post_detail', kwargs={'slug': slug})
         return '#'
     
     def save(self, *args, **kwargs):
-        logger.info(f"📝 ===== Начинаем сохранение поста ID={self.pk} =====")
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'featured_image' not in update_fields:
+            # Точечное сохранение (счетчики, статус) - без работы с файлами и slug
+            self._changed_images = []
+            super().save(*args, **kwargs)
+            return
         
-        # Проверяем изображение ДО сохранения
-        if self.featured_image:
-            logger.info(f"🖼️ Изображение в поле featured_image: {self.featured_image.name}")
-            
-            # Проверяем тип объекта
-            logger.info(f"🖼️ Тип объекта изображения: {type(self.featured_image)}")
-            
-            # Проверяем размер
-            try:
-                size = self.featured_image.size
-                logger.info(f"📏 Размер изображения: {size} bytes")
-            except Exception as e:
-                logger.warning(f"⚠️ Не удалось получить размер изображения: {e}")
-            
-            # Проверяем путь к файлу
-            if hasattr(self.featured_image, 'path'):
-                try:
-                    image_path = self.featured_image.path
-                    logger.info(f"📁 Путь к файлу: {image_path}")
-                    
-                    if os.path.exists(image_path):
-                        file_size = os.path.getsize(image_path)
-                        logger.info(f"✅ Файл существует до сохранения, размер: {file_size} bytes")
-                        
-                        # Проверяем права доступа
-                        logger.info(f"🔒 Права на файл: {oct(os.stat(image_path).st_mode)[-3:]}")
-                        logger.info(f"🔒 Доступен для чтения: {os.access(image_path, os.R_OK)}")
-                    else:
-                        logger.warning(f"⚠️ Файл НЕ существует до сохранения: {image_path}")
-                        
-                        # Проверяем директорию
-                        dir_path = os.path.dirname(image_path)
-                        logger.info(f"📁 Проверяем директорию: {dir_path}")
-                        logger.info(f"📁 Директория существует: {os.path.exists(dir_path)}")
-                        if os.path.exists(dir_path):
-                            logger.info(f"📁 Права на директорию: {oct(os.stat(dir_path).st_mode)[-3:]}")
-                            logger.info(f"📁 Доступна для записи: {os.access(dir_path, os.W_OK)}")
-                        else:
-                            logger.error(f"❌ Директория НЕ существует: {dir_path}")
-                            
-                except Exception as e:
-                    logger.error(f"❌ Ошибка при проверке пути файла: {e}")
-                    logger.error(f"📋 Traceback: {traceback.format_exc()}")
-            else:
-                logger.info(f"📁 У объекта изображения нет атрибута 'path'")
-                
-        else:
-            logger.info("❌ Нет изображения в поле featured_image")
+        logger.info(f"📝 ===== Начинаем сохранение поста ID={self.pk} =====")
         
-        # Проверяем основные настройки Django
-        from django.conf import settings
-        logger.info(f"⚙️ MEDIA_ROOT: {settings.MEDIA_ROOT}")
-        logger.info(f"⚙️ MEDIA_URL: {settings.MEDIA_URL}")
-        logger.info(f"⚙️ DEBUG: {settings.DEBUG}")
+        # Изображение обрабатываем, только если файл действительно новый
+        # (наличие и габариты файла записывает core.media_health после коммита)
+        changed_images = self._changed_images = self.detect_image_changes()
+        if update_fields is not None and changed_images:
+            kwargs['update_fields'] = {
+                *update_fields, 'featured_image_hash', 'featured_image_width', 'featured_image_height'
+            }
         
         # Сначала сохраняем объект, чтобы получить pk
         is_new = self.pk is None
         logger.info(f"🆕 Новый объект: {is_new}")
         
         try:
-            logger.info("💾 Вызываем super().save()...")
             super().save(*args, **kwargs)
             logger.info(f"✅ Объект сохранен успешно, ID={self.pk}")
         except Exception as e:
@@ -236,78 +230,6 @@ class BlogPost(TranslatableModel):
             logger.error(f"📋 Traceback: {traceback.format_exc()}")
             raise
         
-        # Проверяем изображение ПОСЛЕ сохранения
-        if self.featured_image:
-            logger.info(f"🖼️ После сохранения - проверяем изображение...")
-            logger.info(f"🖼️ Имя файла: {self.featured_image.name}")
-            logger.info(f"🖼️ URL: {self.featured_image.url}")
-            
-            if hasattr(self.featured_image, 'path'):
-                try:
-                    full_path = self.featured_image.path
-                    logger.info(f"🖼️ Полный путь: {full_path}")
-                    
-                    if os.path.exists(full_path):
-                        file_size = os.path.getsize(full_path)
-                        logger.info(f"✅ Файл существует после сохранения")
-                        logger.info(f"📏 Размер файла на диске: {file_size} bytes")
-                        
-                        # Проверяем права доступа
-                        logger.info(f"🔒 Права на файл: {oct(os.stat(full_path).st_mode)[-3:]}")
-                        logger.info(f"🔒 Доступен для чтения: {os.access(full_path, os.R_OK)}")
-                        
-                        # Проверяем, это ли действительно изображение
-                        try:
-                            with Image.open(full_path) as img:
-                                logger.info(f"🖼️ Размеры изображения: {img.width}x{img.height}")
-                                logger.info(f"🖼️ Режим изображения: {img.mode}")
-                                logger.info(f"🖼️ Формат изображения: {img.format}")
-                        except Exception as img_e:
-                            logger.error(f"❌ Ошибка при открытии как изображения: {img_e}")
-                            
-                    else:
-                        logger.error(f"❌ ФАЙЛ НЕ СУЩЕСТВУЕТ после сохранения: {full_path}")
-                        
-                        # Детальная проверка директории
-                        dir_path = os.path.dirname(full_path)
-                        logger.info(f"📁 Директория: {dir_path}")
-                        logger.info(f"📁 Директория существует: {os.path.exists(dir_path)}")
-                        
-                        if os.path.exists(dir_path):
-                            logger.info(f"📁 Содержимое директории: {os.listdir(dir_path)}")
-                            logger.info(f"📁 Права на директорию: {oct(os.stat(dir_path).st_mode)[-3:]}")
-                            logger.info(f"📁 Доступна для записи: {os.access(dir_path, os.W_OK)}")
-                        else:
-                            logger.error(f"❌ Директория НЕ существует: {dir_path}")
-                            
-                            # Попробуем создать директорию
-                            try:
-                                os.makedirs(dir_path, mode=0o755, exist_ok=True)
-                                logger.info(f"✅ Директория создана: {dir_path}")
-                            except Exception as dir_e:
-                                logger.error(f"❌ Не удалось создать директорию: {dir_e}")
-                        
-                        # Проверим родительские директории
-                        parent_paths = []
-                        current_path = dir_path
-                        while current_path != os.path.dirname(current_path):
-                            parent_paths.append(current_path)
-                            current_path = os.path.dirname(current_path)
-                        
-                        logger.info(f"🔍 Проверяем родительские директории:")
-                        for path in reversed(parent_paths):
-                            exists = os.path.exists(path)
-                            writable = os.access(path, os.W_OK) if exists else "N/A"
-                            logger.info(f"   {path}: exists={exists}, writable={writable}")
-                            
-                except Exception as path_e:
-                    logger.error(f"❌ Ошибка при работе с путем файла: {path_e}")
-                    logger.error(f"📋 Traceback: {traceback.format_exc()}")
-            else:
-                logger.warning(f"⚠️ У объекта изображения нет атрибута 'path' после сохранения")
-        else:
-            logger.warning(f"⚠️ После сохранения featured_image стало None")
-        
         # Работаем с переводимыми полями
         logger.info(f"📝 Обрабатываем переводимые поля...")
         current_title = self.safe_translation_getter('title', any_language=True)
@@ -315,7 +237,8 @@ class BlogPost(TranslatableModel):
         current_meta_title = self.safe_translation_getter('meta_title', any_language=True)
         current_meta_description = self.safe_translation_getter('meta_description', any_language=True)
         current_excerpt = self.safe_translation_getter('excerpt', any_language=True)
-        current_content = self.safe_translation_getter('content', any_language=True)
+        # Текст без HTML уже посчитан при сохранении перевода (blog.content)
+        current_text = self.safe_translation_getter('plain_text', any_language=True)
         
         logger.info(f"📝 Title: '{current_title}'")
         logger.info(f"🔗 Slug: '{current_slug}'")
@@ -343,11 +266,10 @@ class BlogPost(TranslatableModel):
                 self.meta_description = new_meta_desc
                 need_save = True
                 logger.info(f"📄 Meta description из excerpt: '{new_meta_desc}'")
-            elif current_content:
-                # Убираем HTML теги и берем первые 160 символов
-                clean_content = re.sub(r'<[^>]+>', '', current_content)
-                if clean_content:
-                    new_meta_desc = clean_content[:160] + '...' if len(clean_content) > 160 else clean_content
+            elif current_text:
+                # Первые 160 символов текста статьи
+                new_meta_desc = current_text[:160] + '...' if len(current_text) > 160 else current_text
+                if new_meta_desc:
                     self.meta_description = new_meta_desc
                     need_save = True
                     logger.info(f"📄 Meta description из content: '{new_meta_desc}'")
@@ -361,180 +283,53 @@ class BlogPost(TranslatableModel):
             except Exception as e:
                 logger.error(f"❌ Ошибка повторного сохранения: {e}")
         
-        # Оптимизация изображения
-        if self.featured_image:
-            logger.info("🖼️ Начинаем оптимизацию изображения")
-            try:
-                self.optimize_featured_image()
-                logger.info("✅ Оптимизация изображения завершена")
-            except Exception as e:
-                logger.error(f"❌ Ошибка оптимизации изображения: {e}")
-                logger.error(f"📋 Traceback: {traceback.format_exc()}")
+        # Оптимизация изображения - в фоне (core.image_jobs), запрос ее не ждет
+        if 'featured_image' in changed_images and self.featured_image:
+            if 'featured_image' in self._same_content_images:
+                # Контент уже оптимизирован - только манифест вариантов для нового пути
+                schedule_image_job(self.featured_image, DERIVATIVES_PIPELINE)
+            else:
+                schedule_image_job(self.featured_image)
+                logger.info("🖼️ Оптимизация изображения поставлена в очередь")
+        self.remember_images()
         
         logger.info(f"✅ ===== Сохранение поста завершено, ID={self.pk} =====")
     
     def optimize_featured_image(self):
-        """Оптимизация featured image с подробным логированием и исправлением формата"""
-        logger.info(f"🔧 Начинаем оптимизацию изображения для поста ID={self.pk}")
-        
+        """Оптимизировать featured image сразу (обычно это делает воркер process_image_jobs)"""
         if not self.featured_image:
-            logger.info("❌ Нет изображения для оптимизации")
-            return
-            
-        try:
-            image_path = self.featured_image.path
-            logger.info(f"🔧 Путь к изображению: {image_path}")
-            logger.info(f"🔧 Имя файла: {self.featured_image.name}")
-        except Exception as e:
-            logger.error(f"❌ Не удалось получить путь к изображению: {e}")
-            return
-        
-        if not os.path.exists(image_path):
-            logger.error(f"❌ Файл не существует для оптимизации: {image_path}")
-            return
-            
+            return None
+        job = enqueue_image_job(self.featured_image.name)
+        run_job(job)
+        return job
+    
+    def _get_navigation(self):
         try:
-            # Получаем информацию о файле до оптимизации
-            original_size = os.path.getsize(image_path)
-            logger.info(f"📏 Оригинальный размер файла: {original_size} bytes")
-            
-            # Проверяем, читается ли файл как изображение
-            try:
-                with Image.open(image_path) as img:
-                    logger.info(f"🖼️ Размеры изображения: {img.width}x{img.height}")
-                    logger.info(f"🖼️ Режим изображения: {img.mode}")
-                    logger.info(f"🖼️ Формат изображения: {img.format}")
-                    
-                    # Создаем копию изображения в памяти
-                    img_copy = img.copy()
-                    
-            except Exception as img_error:
-                logger.error(f"❌ Не удалось открыть изображение: {img_error}")
-                
-                # Попробуем прочитать первые байты файла для диагностики
-                try:
-                    with open(image_path, 'rb') as f:
-                        first_bytes = f.read(10)
-                        logger.info(f"🔍 Первые 10 байт файла: {first_bytes}")
-                        
-                        # Проверяем магические байты
-                        if first_bytes.startswith(b'\xff\xd8\xff'):
-                            logger.info("🔍 Файл начинается как JPEG")
-                        elif first_bytes.startswith(b'\x89PNG'):
-                            logger.info("🔍 Файл начинается как PNG")
-                        elif first_bytes.startswith(b'GIF'):
-                            logger.info("🔍 Файл начинается как GIF")
-                        else:
-                            logger.warning(f"🔍 Неизвестный формат файла: {first_bytes}")
-                except Exception as read_error:
-                    logger.error(f"❌ Не удалось прочитать файл: {read_error}")
-                
-                return
-            
-            # Обрабатываем изображение
-            processed_img = img_copy
-            
-            # Конвертируем в RGB если необходимо
-            if processed_img.mode in ('RGBA', 'P', 'LA'):
-                logger.info(f"🔄 Конвертируем из {processed_img.mode} в RGB")
-                # Создаем белый фон для прозрачных изображений
-                if processed_img.mode in ('RGBA', 'LA'):
-                    background = Image.new('RGB', processed_img.size, (255, 255, 255))
-                    background.paste(processed_img, mask=processed_img.split()[-1] if processed_img.mode == 'RGBA' else None)
-                    processed_img = background
-                else:
-                    processed_img = processed_img.convert('RGB')
-            
-            # Изменяем размер если больше 1200px по ширине
-            if processed_img.width > 1200:
-                ratio = 1200 / processed_img.width
-                new_height = int(processed_img.height * ratio)
-                logger.info(f"📐 Изменяем размер с {processed_img.width}x{processed_img.height} до 1200x{new_height}")
-                processed_img = processed_img.resize((1200, new_height), Image.Resampling.LANCZOS)
-            else:
-                logger.info(f"📐 Размер изображения оптимальный: {processed_img.width}x{processed_img.height}")
-            
-            # Создаем временный файл для проверки
-            import tempfile
-            with tempfile.NamedTemporaryFile(suffix='.jpg', delete=False) as temp_file:
-                temp_path = temp_file.name
-                
-                # Сохраняем оптимизированное изображение во временный файл
-                logger.info(f"💾 Сохраняем во временный файл: {temp_path}")
-                processed_img.save(temp_path, 'JPEG', quality=85, optimize=True)
-                
-                # Проверяем временный файл
-                if os.path.exists(temp_path):
-                    temp_size = os.path.getsize(temp_path)
-                    logger.info(f"✅ Временный файл создан, размер: {temp_size} bytes")
-                    
-                    # Перезаписываем оригинальный файл
-                    import shutil
-                    shutil.move(temp_path, image_path)
-                    logger.info(f"🔄 Заменили оригинальный файл")
-                    
-                    # Проверяем результат
-                    if os.path.exists(image_path):
-                        new_size = os.path.getsize(image_path)
-                        savings = original_size - new_size
-                        savings_percent = (savings / original_size * 100) if original_size > 0 else 0
-                        
-                        logger.info(f"📏 Новый размер файла: {new_size} bytes")
-                        logger.info(f"💾 Изменение размера: {savings} bytes ({savings_percent:.1f}%)")
-                        
-                        # Проверяем, что новый файл можно открыть
-                        try:
-                            with Image.open(image_path) as test_img:
-                                logger.info(f"✅ Оптимизированный файл корректен: {test_img.width}x{test_img.height}")
-                        except Exception as test_error:
-                            logger.error(f"❌ Оптимизированный файл поврежден: {test_error}")
-                    else:
-                        logger.error(f"❌ Файл исчез после замены!")
-                else:
-                    logger.error(f"❌ Временный файл не создался!")
-                    
-                # Удаляем временный файл если он остался
-                if os.path.exists(temp_path):
-                    os.unlink(temp_path)
-                
-        except Exception as e:
-            logger.error(f"❌ Ошибка оптимизации изображения: {e}")
-            logger.error(f"📋 Полный traceback: {traceback.format_exc()}")
-            
-            # Попробуем проанализировать ошибку
-            if "cannot identify image file" in str(e):
-                logger.error("💡 Возможно, файл поврежден или не является изображением")
-                logger.error("💡 Попробуйте загрузить изображение в формате PNG или JPG")
-            elif "Permission denied" in str(e):
-                logger.error("💡 Проблемы с правами доступа к файлу")
-            elif "No such file or directory" in str(e):
-                logger.error("💡 Файл не найден во время оптимизации")
+            return self.navigation
+        except PostNavigation.DoesNotExist:
+            return None
     
     def get_next_post(self):
-        """Следующая статья"""
-        return BlogPost.objects.filter(
-            published_at__gt=self.published_at,
-            status='published'
-        ).order_by('published_at').first()
+        """Следующая статья (посчитана заранее, см. blog.navigation)"""
+        navigation = self._get_navigation()
+        return navigation.next_post if navigation else None
     
     def get_previous_post(self):
-        """Предыдущая статья"""
-        return BlogPost.objects.filter(
-            published_at__lt=self.published_at,
-            status='published'
-        ).order_by('-published_at').first()
+        """Предыдущая статья (посчитана заранее, см. blog.navigation)"""
+        navigation = self._get_navigation()
+        return navigation.previous_post if navigation else None
     
     def increment_views(self):
-        """Увеличить счетчик просмотров"""
+        """Увеличить счетчик просмотров (UPDATE без save() и работы с файлами)"""
+        BlogPost.objects.filter(pk=self.pk).update(views_count=models.F('views_count') + 1)
         self.views_count += 1
-        self.save(update_fields=['views_count'])
     
     def get_related_posts(self, limit=3):
-        """Похожие статьи"""
-        return BlogPost.objects.filter(
-            category=self.category,
-            status='published'
-        ).exclude(pk=self.pk).order_by('-published_at')[:limit]
+        """Похожие статьи (id посчитаны заранее, см. blog.navigation)"""
+        navigation = self._get_navigation()
+        ids = navigation.related_post_ids[:limit] if navigation else []
+        posts = BlogPost.objects.in_bulk(ids)
+        return [posts[pk] for pk in ids if pk in posts]
     
     def get_display_title(self):
         """Получить заголовок для отображения"""
@@ -544,19 +339,25 @@ class BlogPost(TranslatableModel):
         """Получить контент для отображения"""
         return self.safe_translation_getter('content', any_language=True) or ''
     
+    def get_rendered_content(self):
+        """Очищенный HTML с якорями заголовков (посчитан при сохранении)"""
+        return (self.safe_translation_getter('rendered_content', any_language=True) or
+                self.get_display_content())
+    
     def get_display_excerpt(self):
-        """Получить описание для отображения"""
-        excerpt = self.safe_translation_getter('excerpt', any_language=True)
-        if excerpt:
-            return excerpt
-        
-        # Если нет excerpt, создаем из content
-        content = self.get_display_content()
-        if content:
-            clean_content = re.sub(r'<[^>]+>', '', content)
-            return clean_content[:300] + '...' if len(clean_content) > 300 else clean_content
-        
-        return ''
+        """Получить описание для отображения (без excerpt - из текста статьи)"""
+        return (self.safe_translation_getter('excerpt', any_language=True) or
+                self.safe_translation_getter('auto_excerpt', any_language=True) or '')
+    
+    def get_reading_time(self):
+        """Время чтения в минутах по числу слов перевода"""
+        if self.safe_translation_getter('word_count', any_language=True):
+            return self.safe_translation_getter('reading_minutes', any_language=True)
+        return self.reading_time
+    
+    def get_toc(self):
+        """Оглавление статьи [{level, id, text}]"""
+        return self.safe_translation_getter('toc', any_language=True) or []
     
     def get_display_meta_title(self):
         """Получить meta title для отображения"""
@@ -611,6 +412,73 @@ class BlogPost(TranslatableModel):
         return schema
 
 
+class PostNavigation(models.Model):
+    """
+    Навигация опубликованной статьи, посчитанная заранее (blog.navigation):
+    соседние статьи по (published_at, id), похожие статьи и готовые ссылки
+    на них (заголовки и slug на всех языках) для страницы статьи.
+    """
+    post = models.OneToOneField(
+        BlogPost, on_delete=models.CASCADE, primary_key=True, related_name='navigation'
+    )
+    previous_post = models.ForeignKey(
+        BlogPost, null=True, blank=True, on_delete=models.SET_NULL, related_name='+'
+    )
+    next_post = models.ForeignKey(
+        BlogPost, null=True, blank=True, on_delete=models.SET_NULL, related_name='+'
+    )
+    related_post_ids = models.JSONField(default=list, blank=True)
+    links = models.JSONField(default=dict, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = "Post Navigation"
+        verbose_name_plural = "Post Navigation"
+    
+    def __str__(self):
+        return f"Navigation for post {self.post_id}"
+
+
+class PostSimilarity(models.Model):
+    """Похожие статьи по TF-IDF (blog.related): top-K соседей каждой статьи"""
+    post = models.ForeignKey(BlogPost, on_delete=models.CASCADE, related_name='similarities')
+    related_post = models.ForeignKey(BlogPost, on_delete=models.CASCADE, related_name='neighbour_links')
+    score = models.FloatField(default=0)
+    rank = models.PositiveSmallIntegerField(default=0, help_text="0 = most similar")
+    
+    class Meta:
+        verbose_name = "Post Similarity"
+        verbose_name_plural = "Post Similarities"
+        ordering = ['post', 'rank']
+        unique_together = [('post', 'related_post')]
+        indexes = [
+            models.Index(fields=['post', 'rank']),
+        ]
+    
+    def __str__(self):
+        return f"{self.post_id} -> {self.related_post_id} ({self.score:.2f})"
+
+
+class PostTourSimilarity(models.Model):
+    """Туры для кросс-продажи на странице статьи (blog.related)"""
+    post = models.ForeignKey(BlogPost, on_delete=models.CASCADE, related_name='tour_suggestions')
+    tour = models.ForeignKey('tours.Tour', on_delete=models.CASCADE, related_name='post_suggestions')
+    score = models.FloatField(default=0)
+    rank = models.PositiveSmallIntegerField(default=0, help_text="0 = most similar")
+    
+    class Meta:
+        verbose_name = "Post Tour Suggestion"
+        verbose_name_plural = "Post Tour Suggestions"
+        ordering = ['post', 'rank']
+        unique_together = [('post', 'tour')]
+        indexes = [
+            models.Index(fields=['post', 'rank']),
+        ]
+    
+    def __str__(self):
+        return f"{self.post_id} -> tour {self.tour_id} ({self.score:.2f})"
+
+
 class BlogImage(models.Model):
     """Модель для изображений в статьях"""
     post = models.ForeignKey(BlogPost, on_delete=models.CASCADE, related_name='images')
@@ -647,16 +515,37 @@ class BlogComment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Данные отправки (публичная форма) - для лимита частоты
+    ip_address = models.GenericIPAddressField(null=True, blank=True)
+    user_agent = models.CharField(max_length=255, blank=True)
+    content_hash = models.CharField(max_length=32, blank=True, db_index=True)
+    
+    # Оценка спама считается в фоне (blog.comments); NULL - еще в очереди
+    spam_score = models.PositiveSmallIntegerField(null=True, blank=True, editable=False)
+    spam_flags = models.JSONField(default=list, blank=True, editable=False)
+    scored_at = models.DateTimeField(null=True, blank=True, editable=False)
+    
     class Meta:
         verbose_name = "Comment"
         verbose_name_plural = "Comments"
         ordering = ['-created_at']
+        indexes = [
+            # Очередь на оценку
+            models.Index(fields=['scored_at', 'id'], name='blog_comment_queue_idx'),
+            # Сортировка модерации по оценке
+            models.Index(fields=['-spam_score', '-created_at'], name='blog_comment_score_idx'),
+            # Лимит частоты по email и IP
+            models.Index(fields=['email', 'created_at'], name='blog_comment_email_idx'),
+            models.Index(fields=['ip_address', 'created_at'], name='blog_comment_ip_idx'),
+        ]
     
     def __str__(self):
         post_title = self.post.safe_translation_getter('title', any_language=True) or f"Post {self.post.pk}"
         return f"Comment by {self.name} on {post_title}"
     
     def save(self, *args, **kwargs):
-        logger.info(f"💬 Сохраняем комментарий от {self.name} к посту {self.post.pk if self.post else 'None'}")
+        logger.info(f"💬 Сохраняем комментарий от {self.name} к посту {self.post_id}")
+        from .comments import content_fingerprint
+        self.content_hash = content_fingerprint(self.content)
         super().save(*args, **kwargs)
         logger.info(f"✅ Комментарий сохранен, ID={self.pk}")
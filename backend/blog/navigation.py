@@ -0,0 +1,358 @@
+# backend/blog/navigation.py
+"""
+Навигация по статьям, посчитанная заранее: предыдущая/следующая статья,
+похожие статьи и туры для кросс-продажи.
+
+Порядок опубликованных статей - (published_at, id). Похожие статьи и туры
+берутся из PostSimilarity/PostTourSimilarity (blog.related), пока их нет -
+последние статьи той же категории. Для каждой опубликованной статьи в
+PostNavigation хранятся id соседей и похожих статей и готовые ссылки на
+них (заголовок и slug на всех языках, изображение). Страница статьи получает строку навигации тем же запросом
+(select_related) и строит ссылки без обращений к БД.
+
+Публикация, снятие с публикации или смена даты статьи затрагивает только
+ее саму и ближайших соседей (старых и новых) - пересчитываются только они.
+Полный пересчет - команда rebuild_post_navigation.
+"""
+import logging
+
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Q
+from django.urls import NoReverseMatch, reverse
+from django.utils import timezone, translation
+
+from tours.models import STATIC_TOUR_URL_NAMES, Tour
+
+from .models import BlogPost, PostNavigation, PostSimilarity, PostTourSimilarity
+
+logger = logging.getLogger("blog.navigation")
+
+RELATED_LIMIT = 3
+RELATED_TOURS_LIMIT = 3
+
+NAVIGATION_FIELDS = ["previous_post", "next_post", "related_post_ids", "links", "updated_at"]
+
+BATCH_SIZE = 500
+
+
+def _published():
+    return BlogPost.objects.filter(status="published")
+
+
+def _neighbour_ids(published_at, pk):
+    """(предыдущая, следующая) опубликованные статьи по (published_at, id)"""
+    before = Q(published_at__lt=published_at) | Q(published_at=published_at, pk__lt=pk)
+    after = Q(published_at__gt=published_at) | Q(published_at=published_at, pk__gt=pk)
+    previous_id = (
+        _published().filter(before).order_by("-published_at", "-id")
+        .values_list("pk", flat=True).first()
+    )
+    next_id = (
+        _published().filter(after).order_by("published_at", "id")
+        .values_list("pk", flat=True).first()
+    )
+    return previous_id, next_id
+
+
+def _similar_ids(post_ids):
+    """{post_id: ([похожие статьи], [туры])} из таблиц похожести по рангу"""
+    similar = {pk: ([], []) for pk in post_ids}
+    rows = (
+        PostSimilarity.objects.filter(post_id__in=post_ids, related_post__status="published")
+        .order_by("post_id", "rank").values_list("post_id", "related_post_id")
+    )
+    for post_id, related_id in rows:
+        if len(similar[post_id][0]) < RELATED_LIMIT:
+            similar[post_id][0].append(related_id)
+    rows = (
+        PostTourSimilarity.objects.filter(post_id__in=post_ids, tour__status="published")
+        .order_by("post_id", "rank").values_list("post_id", "tour_id")
+    )
+    for post_id, tour_id in rows:
+        if len(similar[post_id][1]) < RELATED_TOURS_LIMIT:
+            similar[post_id][1].append(tour_id)
+    return similar
+
+
+def _related_ids(post):
+    """Последние статьи той же категории (без категории - просто последние)"""
+    queryset = _published().exclude(pk=post.pk)
+    if post.category_id:
+        queryset = queryset.filter(category_id=post.category_id)
+    return list(
+        queryset.order_by("-published_at", "-id").values_list("pk", flat=True)[:RELATED_LIMIT]
+    )
+
+
+def _links(ids):
+    """{id: ссылка} - заголовки и slug статей на всех языках одним запросом"""
+    links = {}
+    posts = BlogPost.objects.filter(pk__in=set(ids)).prefetch_related("translations")
+    for post in posts:
+        titles, slugs = {}, {}
+        for item in post.translations.all():
+            if item.title:
+                titles[item.language_code] = item.title
+            if item.slug:
+                slugs[item.language_code] = item.slug
+        links[post.pk] = {
+            "id": post.pk,
+            "titles": titles,
+            "slugs": slugs,
+            "image": post.featured_image.name if post.featured_image else "",
+        }
+    return links
+
+
+def _tour_links(ids):
+    """{id: ссылка} - заголовки и slug туров на всех языках одним запросом"""
+    links = {}
+    tours = Tour.objects.filter(pk__in=set(ids)).prefetch_related("translations")
+    for tour in tours:
+        titles, slugs = {}, {}
+        for item in tour.translations.all():
+            if item.title:
+                titles[item.language_code] = item.title
+            if item.slug:
+                slugs[item.language_code] = item.slug
+        links[tour.pk] = {
+            "id": tour.pk,
+            "titles": titles,
+            "slugs": slugs,
+            "image": tour.featured_image.name if tour.featured_image else "",
+            "price": f"{tour.price_adult:.0f}",
+        }
+    return links
+
+
+def _links_payload(previous_id, next_id, related_ids, tour_ids, links, tour_links):
+    return {
+        "previous": links.get(previous_id),
+        "next": links.get(next_id),
+        "related": [links[pk] for pk in related_ids if pk in links],
+        "tours": [tour_links[pk] for pk in tour_ids if pk in tour_links],
+    }
+
+
+def _plan_links(plan):
+    """Ссылки на все статьи и туры плана (два запроса)"""
+    links = _links(
+        pk
+        for previous_id, next_id, related, _tours in plan.values()
+        for pk in (previous_id, next_id, *related)
+        if pk
+    )
+    tour_links = _tour_links(pk for *_posts, tours in plan.values() for pk in tours)
+    return links, tour_links
+
+
+def _store(plan):
+    """plan: {post_id: (предыдущая, следующая, [похожие], [туры])} -> upsert строк навигации"""
+    links, tour_links = _plan_links(plan)
+    now = timezone.now()
+    rows = [
+        PostNavigation(
+            post_id=post_id,
+            previous_post_id=previous_id,
+            next_post_id=next_id,
+            related_post_ids=related,
+            links=_links_payload(previous_id, next_id, related, tours, links, tour_links),
+            updated_at=now,
+        )
+        for post_id, (previous_id, next_id, related, tours) in plan.items()
+    ]
+    PostNavigation.objects.bulk_create(
+        rows,
+        batch_size=BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=["post"],
+        update_fields=NAVIGATION_FIELDS,
+    )
+
+
+def refresh_posts(post_ids):
+    """Пересчитать соседей, похожие статьи и ссылки для статей post_ids"""
+    post_ids = {pk for pk in post_ids if pk}
+    if not post_ids:
+        return 0
+
+    published = list(
+        _published().filter(pk__in=post_ids).only("pk", "published_at", "category_id")
+    )
+    # Неопубликованным и удаленным навигация не нужна
+    PostNavigation.objects.filter(post_id__in=post_ids - {post.pk for post in published}).delete()
+
+    similar = _similar_ids([post.pk for post in published])
+    plan = {}
+    for post in published:
+        previous_id, next_id = _neighbour_ids(post.published_at, post.pk)
+        related, tours = similar[post.pk]
+        plan[post.pk] = (previous_id, next_id, related or _related_ids(post), tours)
+
+    _store(plan)
+    return len(post_ids)
+
+
+def update_post_navigation(post_id, old_neighbours=()):
+    """
+    Статья опубликована, снята с публикации или сменила дату: пересчитать
+    ее, ее прежних соседей и новых соседей - больше ничего не меняется.
+    """
+    affected = {post_id, *old_neighbours}
+    post = BlogPost.objects.filter(pk=post_id).only("pk", "status", "published_at").first()
+    if post is not None and post.status == "published":
+        affected.update(_neighbour_ids(post.published_at, post.pk))
+    else:
+        # Снятую с публикации статью убираем и из похожих у других статей
+        affected.update(posts_linking_to(post_id))
+    count = refresh_posts(affected)
+    logger.info(f"🧭 Навигация статьи {post_id} обновлена, затронуто статей: {count}")
+    return count
+
+
+def posts_linking_to(post_id):
+    """Статьи, в чьих ссылках есть post_id (соседи и похожие)"""
+    linked = set(
+        PostNavigation.objects.filter(Q(previous_post_id=post_id) | Q(next_post_id=post_id))
+        .values_list("post_id", flat=True)
+    )
+    # Похожие хранятся списком в JSON - переберем только пары (статья, ids)
+    linked.update(
+        pk for pk, related in PostNavigation.objects.values_list("post_id", "related_post_ids")
+        if related and post_id in related
+    )
+    linked.discard(post_id)
+    return linked
+
+
+def schedule_navigation_update(post_id, old_neighbours=()):
+    """update_post_navigation после коммита транзакции"""
+    old_neighbours = tuple(pk for pk in old_neighbours if pk)
+
+    def update():
+        try:
+            update_post_navigation(post_id, old_neighbours)
+        except Exception as e:
+            logger.error(f"❌ Ошибка обновления навигации статьи {post_id}: {e}")
+
+    transaction.on_commit(update)
+
+
+def schedule_links_refresh(post_id):
+    """Заголовок/slug статьи изменились - обновить ссылки, которые на нее ведут"""
+
+    def refresh():
+        try:
+            refresh_posts(posts_linking_to(post_id))
+        except Exception as e:
+            logger.error(f"❌ Ошибка обновления ссылок на статью {post_id}: {e}")
+
+    transaction.on_commit(refresh)
+
+
+def rebuild_post_navigation():
+    """Полный пересчет навигации всех статей; возвращает число статей"""
+    published = list(
+        _published().order_by("published_at", "id").only("pk", "published_at", "category_id")
+    )
+    by_category = {}
+    for post in reversed(published):
+        by_category.setdefault(post.category_id, []).append(post.pk)
+    latest = [post.pk for post in reversed(published)]
+    similar = _similar_ids([post.pk for post in published])
+
+    plan = {}
+    for index, post in enumerate(published):
+        previous_id = published[index - 1].pk if index > 0 else None
+        next_id = published[index + 1].pk if index + 1 < len(published) else None
+        related, tours = similar[post.pk]
+        if not related:
+            candidates = by_category[post.category_id] if post.category_id else latest
+            related = [pk for pk in candidates if pk != post.pk][:RELATED_LIMIT]
+        plan[post.pk] = (previous_id, next_id, related, tours)
+
+    PostNavigation.objects.exclude(post_id__in=plan).delete()
+    _store(plan)
+    logger.info(f"🧭 Навигация пересчитана: {len(published)} опубликованных статей")
+    return len(published)
+
+
+# --- Ссылки для шаблона ----------------------------------------------------------
+
+
+class PostLink:
+    """Ссылка на статью из сохраненной навигации (без запросов к БД)"""
+
+    def __init__(self, link, language):
+        self.id = self.pk = link["id"]
+        self.title = _pick(link.get("titles", {}), language) or f"Post {self.id}"
+        self.slug = _pick(link.get("slugs", {}), language)
+        self.image = link.get("image") or ""
+
+    def get_display_title(self):
+        return self.title
+
+    def get_absolute_url(self):
+        if not self.slug:
+            return "#"
+        try:
+            return reverse("blog:post_detail", kwargs={"slug": self.slug})
+        except NoReverseMatch:
+            return "#"
+
+    @property
+    def image_url(self):
+        return default_storage.url(self.image) if self.image else ""
+
+
+class TourLink:
+    """Ссылка на тур для блока "забронируйте этот тур" (без запросов к БД)"""
+
+    def __init__(self, link, language):
+        self.id = self.pk = link["id"]
+        self.title = _pick(link.get("titles", {}), language) or f"Tour {self.id}"
+        self.slug = _pick(link.get("slugs", {}), language)
+        self.image = link.get("image") or ""
+        self.price = link.get("price") or ""
+
+    def get_absolute_url(self):
+        if not self.slug:
+            return "#"
+        try:
+            if self.slug in STATIC_TOUR_URL_NAMES:
+                return reverse(STATIC_TOUR_URL_NAMES[self.slug])
+            return reverse("tour_detail", kwargs={"slug": self.slug})
+        except NoReverseMatch:
+            return "#"
+
+    def get_price_display(self):
+        return f"€{self.price}" if self.price else ""
+
+    @property
+    def image_url(self):
+        return default_storage.url(self.image) if self.image else ""
+
+
+def _pick(values, language):
+    """Значение на языке страницы, иначе на любом (как any_language у parler)"""
+    if language in values:
+        return values[language]
+    return next(iter(values.values()), "")
+
+
+def post_navigation(post, language=None):
+    """(предыдущая, следующая, [похожие], [туры]) как PostLink/TourLink для страницы статьи"""
+    language = language or translation.get_language()
+    try:
+        navigation = post.navigation.links
+    except PostNavigation.DoesNotExist:
+        navigation = {}
+    previous_link = navigation.get("previous")
+    next_link = navigation.get("next")
+    return (
+        PostLink(previous_link, language) if previous_link else None,
+        PostLink(next_link, language) if next_link else None,
+        [PostLink(link, language) for link in navigation.get("related", [])],
+        [TourLink(link, language) for link in navigation.get("tours", [])],
+    )
@@ -0,0 +1,58 @@
+# backend/blog/publishing.py
+"""
+Отложенная публикация статей.
+
+Статья со статусом 'scheduled' публикуется, когда наступает ее
+published_at: команда publish_scheduled_posts (cron раз в минуту) находит
+такие статьи одним запросом по индексу (status, published_at) и переводит
+их в 'published' одним UPDATE. После коммита для опубликованных статей
+обновляются только зависящие от них данные: навигация (новые соседи),
+похожий контент, подсказки поиска и ключи кэша списков, ленты и sitemap
+(blog.cache). Публичные страницы не фильтруют по текущему времени и
+остаются кэшируемыми.
+"""
+import logging
+
+from django.db import transaction
+from django.utils import timezone
+
+from core.autocomplete import schedule_autocomplete_update
+
+from .cache import post_tag_ids, schedule_cache_invalidation
+from .models import BlogPost
+from .navigation import schedule_navigation_update
+from .related import schedule_related_update
+
+logger = logging.getLogger("blog.publishing")
+
+
+def due_posts(now=None):
+    """Запланированные статьи, время которых наступило (индекс status, published_at)"""
+    now = now or timezone.now()
+    return BlogPost.objects.filter(status="scheduled", published_at__lte=now)
+
+
+def publish_due_posts(now=None):
+    """Опубликовать наступившие запланированные статьи; возвращает их id"""
+    with transaction.atomic():
+        post_ids = list(
+            due_posts(now).select_for_update(skip_locked=True)
+            .order_by("published_at", "id").values_list("pk", flat=True)
+        )
+        if not post_ids:
+            return []
+
+        # Только UPDATE статуса - без BlogPost.save и его побочной работы
+        BlogPost.objects.filter(pk__in=post_ids, status="scheduled").update(
+            status="published", updated_at=timezone.now()
+        )
+
+        for post_id in post_ids:
+            schedule_navigation_update(post_id)
+        schedule_related_update(post_ids=post_ids)
+        schedule_autocomplete_update("post", post_ids)
+        schedule_autocomplete_update("tag", post_tag_ids(post_ids))
+        schedule_cache_invalidation(post_ids)
+
+    logger.info(f"⏰ Опубликованы запланированные статьи: {post_ids}")
+    return post_ids
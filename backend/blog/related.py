@@ -0,0 +1,309 @@
+# backend/blog/related.py
+"""
+Офлайн-расчет похожего контента для статей: похожие статьи и туры для
+кросс-продажи ("забронируйте этот тур").
+
+Статьи и туры переводятся в TF-IDF векторы по очищенному тексту и тегам,
+отдельно для каждого языка (IDF считается по всем документам языка).
+Похожесть двух документов - косинус их векторов, лучший среди общих
+языков. Для каждой статьи top-K статей и top-K туров хранятся в
+PostSimilarity и PostTourSimilarity, страница статьи читает готовые
+ссылки из PostNavigation (blog.navigation).
+
+Векторы - разреженные словари без numpy: косинус считается через
+инвертированный индекс (термин -> документы), поэтому сравниваются только
+документы с общими терминами.
+
+После изменения статьи или тура сигналы только отмечают их в очереди
+core.recompute; воркер process_recompute_queue пересчитывает затронутые
+списки пачкой (update_related_content). IDF при этом сдвигается для всех
+документов, поэтому оценки остальных статей выравнивает ежесуточный
+полный пересчет (команда rebuild_related_content).
+"""
+import html
+import logging
+import math
+import re
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+
+from core.autocomplete import tokenize
+from core.recompute import mark_dirty, register
+from tours.models import Tour
+
+from .models import BlogPost, PostSimilarity, PostTourSimilarity
+
+logger = logging.getLogger("blog.related")
+
+TOP_K_POSTS = getattr(settings, "BLOG_RELATED_TOP_K", 6)
+TOP_K_TOURS = getattr(settings, "BLOG_RELATED_TOURS_TOP_K", 4)
+
+# Ниже этой оценки документы не считаются похожими
+MIN_SCORE = 0.05
+
+# Вес слов заголовка и тегов относительно текста
+TITLE_WEIGHT = 3
+TAG_WEIGHT = 3
+
+# У статей текст без HTML уже посчитан при сохранении (blog.content)
+POST_TEXT_FIELDS = ("excerpt", "plain_text")
+TOUR_TEXT_FIELDS = ("short_description", "tour_highlights", "what_experience", "why_unique")
+
+_TAGS = re.compile(r"<[^>]+>")
+
+
+def clean_text(text):
+    """HTML CKEditor -> текст"""
+    return html.unescape(_TAGS.sub(" ", text or ""))
+
+
+def _terms(text):
+    return [token for token in tokenize(clean_text(text)) if len(token) > 2 and not token.isdigit()]
+
+
+def _document(item, text_fields, tag_terms, extra=""):
+    counts = Counter()
+    for _ in range(TITLE_WEIGHT):
+        counts.update(_terms(item.title))
+    for field in text_fields:
+        counts.update(_terms(getattr(item, field, "")))
+    counts.update(_terms(extra))
+    for term in tag_terms:
+        counts[term] += TAG_WEIGHT
+    return counts
+
+
+def _tag_terms(obj):
+    return [f"tag:{tag.slug}" for tag in obj.tags.all()]
+
+
+def _load_documents():
+    """{('post'|'tour', id): {язык: Counter терминов}} опубликованных объектов"""
+    documents = {}
+    posts = BlogPost.objects.filter(status="published").prefetch_related("translations", "tags")
+    for post in posts:
+        tags = _tag_terms(post)
+        documents[("post", post.pk)] = {
+            item.language_code: _document(item, POST_TEXT_FIELDS, tags)
+            for item in post.translations.all()
+        }
+
+    tours = Tour.objects.filter(status="published").prefetch_related("translations", "tags")
+    for tour in tours:
+        tags = _tag_terms(tour)
+        documents[("tour", tour.pk)] = {
+            item.language_code: _document(item, TOUR_TEXT_FIELDS, tags, extra=tour.location)
+            for item in tour.translations.all()
+        }
+    return documents
+
+
+def vectorize(documents):
+    """TF-IDF (сублинейный tf) с L2 нормировкой, IDF - по документам языка"""
+    frequency = {}
+    totals = Counter()
+    for languages in documents.values():
+        for language, counts in languages.items():
+            totals[language] += 1
+            frequency.setdefault(language, Counter()).update(counts.keys())
+
+    vectors = {}
+    for key, languages in documents.items():
+        vectors[key] = {}
+        for language, counts in languages.items():
+            total = totals[language]
+            df = frequency[language]
+            weights = {
+                term: (1 + math.log(tf)) * (math.log((1 + total) / (1 + df[term])) + 1)
+                for term, tf in counts.items()
+            }
+            norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+            if norm:
+                vectors[key][language] = {term: weight / norm for term, weight in weights.items()}
+    return vectors
+
+
+def build_index(vectors):
+    """Инвертированный индекс: (язык, термин) -> [(ключ, вес), ...]"""
+    index = {}
+    for key, languages in vectors.items():
+        for language, vector in languages.items():
+            for term, weight in vector.items():
+                index.setdefault((language, term), []).append((key, weight))
+    return index
+
+
+def similarities(key, vectors, index):
+    """{другой ключ: косинус} - лучший по общим языкам"""
+    best = {}
+    for language, vector in vectors.get(key, {}).items():
+        scores = Counter()
+        for term, weight in vector.items():
+            for other, other_weight in index.get((language, term), ()):
+                scores[other] += weight * other_weight
+        for other, score in scores.items():
+            if score > best.get(other, 0):
+                best[other] = score
+    best.pop(key, None)
+    return best
+
+
+def _top(scores, kind, limit):
+    ranked = sorted(
+        ((key[1], score) for key, score in scores.items() if key[0] == kind and score >= MIN_SCORE),
+        key=lambda item: (-item[1], item[0]),
+    )
+    return ranked[:limit]
+
+
+def _store(post_id, related, tours):
+    PostSimilarity.objects.filter(post_id=post_id).delete()
+    PostSimilarity.objects.bulk_create(
+        [
+            PostSimilarity(post_id=post_id, related_post_id=related_id, score=score, rank=rank)
+            for rank, (related_id, score) in enumerate(related)
+        ]
+    )
+    PostTourSimilarity.objects.filter(post_id=post_id).delete()
+    PostTourSimilarity.objects.bulk_create(
+        [
+            PostTourSimilarity(post_id=post_id, tour_id=tour_id, score=score, rank=rank)
+            for rank, (tour_id, score) in enumerate(tours)
+        ]
+    )
+
+
+def _stored_lists():
+    """{post_id: ([(related_id, score)], [(tour_id, score)])} текущих списков"""
+    stored = {}
+    for post_id, related_id, score in PostSimilarity.objects.order_by("post_id", "rank").values_list(
+        "post_id", "related_post_id", "score"
+    ):
+        stored.setdefault(post_id, ([], []))[0].append((related_id, score))
+    for post_id, tour_id, score in PostTourSimilarity.objects.order_by("post_id", "rank").values_list(
+        "post_id", "tour_id", "score"
+    ):
+        stored.setdefault(post_id, ([], []))[1].append((tour_id, score))
+    return stored
+
+
+def _rounded(items):
+    return [(pk, round(score, 6)) for pk, score in items]
+
+
+def _recompute(post_ids, vectors, index, stored):
+    """Пересчитать списки статей; возвращает id статей, у которых они поменялись"""
+    changed = set()
+    for post_id in post_ids:
+        scores = similarities(("post", post_id), vectors, index)
+        related = _top(scores, "post", TOP_K_POSTS)
+        tours = _top(scores, "tour", TOP_K_TOURS)
+        old_related, old_tours = stored.get(post_id, ([], []))
+        if _rounded(related) != _rounded(old_related) or _rounded(tours) != _rounded(old_tours):
+            _store(post_id, related, tours)
+            changed.add(post_id)
+    return changed
+
+
+def rebuild_related_content():
+    """Полный пересчет для всех опубликованных статей; возвращает их id"""
+    vectors = vectorize(_load_documents())
+    index = build_index(vectors)
+    post_ids = {key[1] for key in vectors if key[0] == "post"}
+
+    with transaction.atomic():
+        PostSimilarity.objects.exclude(post_id__in=post_ids).delete()
+        PostTourSimilarity.objects.exclude(post_id__in=post_ids).delete()
+        changed = _recompute(post_ids, vectors, index, _stored_lists())
+
+    logger.info(
+        f"🧠 Похожий контент пересчитан: {len(post_ids)} статей, "
+        f"{sum(1 for key in vectors if key[0] == 'tour')} туров, изменено {len(changed)}"
+    )
+    return post_ids
+
+
+def _threshold(items, limit):
+    """Оценка, которую надо превысить, чтобы попасть в список"""
+    return items[-1][1] if len(items) >= limit else MIN_SCORE
+
+
+def update_related_content(post_ids=(), tour_ids=()):
+    """
+    Инкрементальный пересчет после изменения статей или туров.
+
+    Пересчитываются сами измененные статьи и только те статьи, в чьих
+    списках измененный документ был или может появиться (оценка выше
+    последнего места). Возвращает id статей, у которых поменялись списки.
+    """
+    changed_keys = {("post", pk) for pk in post_ids} | {("tour", pk) for pk in tour_ids}
+    if not changed_keys:
+        return set()
+
+    vectors = vectorize(_load_documents())
+    index = build_index(vectors)
+    present = {key[1] for key in vectors if key[0] == "post"}
+    stored = _stored_lists()
+
+    with transaction.atomic():
+        # Снятые с публикации или удаленные документы выпадают из списков
+        removed_posts = {pk for kind, pk in changed_keys if kind == "post"} - present
+        PostSimilarity.objects.filter(post_id__in=removed_posts).delete()
+        PostTourSimilarity.objects.filter(post_id__in=removed_posts).delete()
+
+        to_update = {pk for kind, pk in changed_keys if kind == "post"} & present
+        changed_posts = {pk for kind, pk in changed_keys if kind == "post"}
+        changed_tours = {pk for kind, pk in changed_keys if kind == "tour"}
+        for post_id, (related, tours) in stored.items():
+            if post_id not in present:
+                continue
+            if changed_posts & {pk for pk, _score in related} or changed_tours & {pk for pk, _score in tours}:
+                to_update.add(post_id)
+
+        # Статьи, в чьи списки измененный документ может войти
+        for key in changed_keys:
+            if key not in vectors:
+                continue
+            for other, score in similarities(key, vectors, index).items():
+                if other[0] != "post" or other[1] in to_update:
+                    continue
+                related, tours = stored.get(other[1], ([], []))
+                if key[0] == "post":
+                    threshold = _threshold(related, TOP_K_POSTS)
+                else:
+                    threshold = _threshold(tours, TOP_K_TOURS)
+                if score > threshold:
+                    to_update.add(other[1])
+
+        changed = _recompute(to_update, vectors, index, stored)
+
+    logger.info(
+        f"🧠 Похожий контент обновлен: статьи {sorted(post_ids)}, туры {sorted(tour_ids)}, "
+        f"пересчитано {len(to_update)}, изменено {len(changed)}"
+    )
+    return changed | removed_posts
+
+
+def _process_marked(marked):
+    """Обработчик очереди core.recompute: одна пересборка на пачку отметок"""
+    from .navigation import refresh_posts
+
+    changed = update_related_content(marked["related_post"], marked["related_tour"])
+    refresh_posts(changed | marked["related_refresh"])
+
+
+register("related", ("related_post", "related_tour", "related_refresh"), _process_marked)
+
+
+def schedule_related_update(post_ids=(), tour_ids=(), refresh=()):
+    """
+    Отметить статьи и туры для пересчета похожего контента (и статьи
+    refresh - например, те, где был удаленный тур - для обновления ссылок
+    навигации). Пересчет делает воркер process_recompute_queue; отметки
+    пишутся в текущей транзакции и пропадают при ее откате.
+    """
+    mark_dirty("related_post", post_ids)
+    mark_dirty("related_tour", tour_ids)
+    mark_dirty("related_refresh", refresh)
@@ -0,0 +1,43 @@
+# backend/blog/search.py
+"""Поиск по статьям блога (инфраструктура - core.search)"""
+from django.contrib.contenttypes.models import ContentType
+from taggit.models import TaggedItem
+
+from core.search import attach_headlines, ranked_search, update_search_vectors
+
+from .models import BlogPost
+
+# (поле перевода, вес, HTML?) - текст статьи уже очищен от HTML (blog.content)
+POST_SEARCH_FIELDS = [
+    ("title", "A", False),
+    ("excerpt", "B", False),
+    ("plain_text", "C", False),
+]
+
+
+def _post_tags(post_ids):
+    """Теги статей - общий текст для векторов всех языков"""
+    tags = {}
+    for object_id, name in TaggedItem.objects.filter(
+        content_type=ContentType.objects.get_for_model(BlogPost),
+        object_id__in=post_ids,
+    ).values_list("object_id", "tag__name"):
+        tags.setdefault(object_id, []).append(name)
+    return {post_id: [(" ".join(names), "B")] for post_id, names in tags.items()}
+
+
+def update_post_search_vectors(post_ids):
+    update_search_vectors(BlogPost, post_ids, POST_SEARCH_FIELDS, _post_tags)
+
+
+def search_posts(query):
+    """Опубликованные статьи по релевантности (по одной на статью)"""
+    return ranked_search(
+        BlogPost.objects.filter(status="published"),
+        query,
+        fallback_fields=("title", "excerpt"),
+    )
+
+
+def attach_post_headlines(posts, query, language):
+    return attach_headlines(posts, query, language, "plain_text", html_field=False)
@@ -0,0 +1,297 @@
+# backend/blog/signals.py
+import logging
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from parler.signals import post_translation_save, pre_translation_save
+
+from core.autocomplete import schedule_autocomplete_update
+from core.image_jobs import DERIVATIVES_PIPELINE, schedule_image_job
+from core.media_health import schedule_media_record
+from core.url_cache import invalidate_absolute_urls, warm_absolute_urls
+
+from tours.models import Tour
+
+from .cache import (
+    affected_cache_keys,
+    archive_version_key,
+    category_total_key,
+    schedule_cache_invalidation,
+)
+from .content import apply_derived_content
+from .counters import refresh_post_counters
+from .models import (
+    BlogComment,
+    BlogImage,
+    BlogPost,
+    Category,
+    PostNavigation,
+    PostSimilarity,
+    PostTourSimilarity,
+)
+from .navigation import (
+    refresh_posts,
+    schedule_links_refresh,
+    schedule_navigation_update,
+)
+from .related import schedule_related_update
+from .search import update_post_search_vectors
+
+logger = logging.getLogger("blog.signals")
+
+
+@receiver(pre_translation_save, sender=BlogPost)
+def post_translation_pre_save(sender, instance, **kwargs):
+    """Текст, время чтения, оглавление и картинки - один раз при сохранении"""
+    apply_derived_content(instance)
+
+
+@receiver(post_translation_save, sender=BlogPost)
+def post_translation_saved(sender, instance, **kwargs):
+    """Slug хранится в переводе - пересчитываем путь статьи"""
+    post_id = instance.master_id
+    transaction.on_commit(
+        lambda: warm_absolute_urls(BlogPost.objects.filter(pk=post_id))
+    )
+    update_post_search_vectors([post_id])
+    schedule_autocomplete_update("post", [post_id])
+    # Заголовок и slug статьи хранятся в ссылках соседей и похожих статей
+    schedule_links_refresh(post_id)
+    # Текст статьи поменялся - пересчитываем похожий контент
+    schedule_related_update(post_ids=[post_id])
+    # Заголовок и описание есть в RSS и sitemap
+    schedule_cache_invalidation([post_id])
+
+
+@receiver(pre_save, sender=BlogPost)
+def post_pre_save(sender, instance, **kwargs):
+    """Запоминаем то, от чего зависит навигация, до сохранения"""
+    instance._navigation_before = (
+        BlogPost.objects.filter(pk=instance.pk)
+        .values(
+            "status",
+            "published_at",
+            "category_id",
+            "navigation__previous_post_id",
+            "navigation__next_post_id",
+        )
+        .first()
+        if instance.pk
+        else None
+    )
+
+
+def _update_navigation(instance, before):
+    """Пересчитать навигацию только если статья сдвинулась в ленте"""
+    published = instance.status == "published"
+    if before is None:
+        if published:
+            schedule_navigation_update(instance.pk)
+            schedule_related_update(post_ids=[instance.pk])
+        return
+
+    was_published = before["status"] == "published"
+    moved = published != was_published or (
+        published and before["published_at"] != instance.published_at
+    )
+    if published != was_published:
+        schedule_related_update(post_ids=[instance.pk])
+    if moved:
+        schedule_navigation_update(
+            instance.pk,
+            (before["navigation__previous_post_id"], before["navigation__next_post_id"]),
+        )
+    elif published and before["category_id"] != instance.category_id:
+        post_id = instance.pk
+        transaction.on_commit(lambda: refresh_posts([post_id]))
+
+
+def _invalidate_caches(instance, before):
+    """Списки, лента и sitemap: статья в них появилась, ушла или изменилась"""
+    was_published = before is not None and before["status"] == "published"
+    if instance.status != "published" and not was_published:
+        return
+    old_category = before["category_id"] if before else None
+    schedule_cache_invalidation(
+        [instance.pk],
+        extra_keys=(
+            [category_total_key(old_category), archive_version_key("category", old_category)]
+            if old_category else ()
+        ),
+    )
+
+
+@receiver(post_save, sender=BlogPost)
+def post_saved(sender, instance, **kwargs):
+    """Статус статьи решает, есть ли она и ее теги в подсказках"""
+    before = instance.__dict__.pop("_navigation_before", None)
+    _update_navigation(instance, before)
+    _invalidate_caches(instance, before)
+    schedule_autocomplete_update("post", [instance.pk])
+    schedule_autocomplete_update("tag", instance.tags.values_list("pk", flat=True))
+    if "featured_image" in instance.__dict__.pop("_changed_images", ()):
+        schedule_media_record(instance.featured_image)
+
+
+@receiver(pre_save, sender=BlogComment)
+def comment_pre_save(sender, instance, **kwargs):
+    """Статья и одобрение до сохранения - от них зависит счетчик"""
+    instance._counted_before = (
+        BlogComment.objects.filter(pk=instance.pk).values_list("post_id", "is_approved").first()
+        if instance.pk
+        else None
+    )
+
+
+@receiver(post_save, sender=BlogComment)
+def comment_saved(sender, instance, **kwargs):
+    """Счетчик одобренных комментариев статьи (и прежней статьи при переносе)"""
+    before = instance.__dict__.pop("_counted_before", None)
+    after = (instance.post_id, instance.is_approved)
+    if before == after or (before is None and not instance.is_approved):
+        # Новый неодобренный комментарий (публичная форма) счетчик не меняет
+        return
+    refresh_post_counters([instance.post_id, before[0] if before else None])
+
+
+@receiver(post_delete, sender=BlogComment)
+def comment_deleted(sender, instance, **kwargs):
+    if instance.is_approved:
+        refresh_post_counters([instance.post_id])
+
+
+@receiver(pre_save, sender=BlogImage)
+def image_pre_save(sender, instance, **kwargs):
+    """Изображение могли перенести в другую статью; файл - загрузить заново"""
+    instance._image_uploaded = bool(instance.image) and not instance.image._committed
+    instance._counted_post_id = (
+        BlogImage.objects.filter(pk=instance.pk).values_list("post_id", flat=True).first()
+        if instance.pk
+        else None
+    )
+
+
+@receiver(post_save, sender=BlogImage)
+def image_saved(sender, instance, **kwargs):
+    schedule_media_record(instance.image)
+    if instance.__dict__.pop("_image_uploaded", False):
+        schedule_image_job(instance.image, DERIVATIVES_PIPELINE)
+    previous_post_id = instance.__dict__.pop("_counted_post_id", None)
+    if kwargs.get("created") or previous_post_id != instance.post_id:
+        refresh_post_counters([instance.post_id, previous_post_id])
+
+
+@receiver(post_delete, sender=BlogImage)
+def image_deleted(sender, instance, **kwargs):
+    refresh_post_counters([instance.post_id])
+
+
+@receiver(m2m_changed, sender=BlogPost.tags.through)
+def post_tags_changed(sender, instance, action, **kwargs):
+    """Теги входят в поисковый вектор статьи"""
+    if action in ("post_add", "post_remove", "post_clear") and isinstance(
+        instance, BlogPost
+    ):
+        update_post_search_vectors([instance.pk])
+        schedule_autocomplete_update("tag", kwargs.get("pk_set") or ())
+        schedule_related_update(post_ids=[instance.pk])
+        if instance.status == "published":
+            schedule_cache_invalidation([instance.pk], tag_ids=kwargs.get("pk_set") or ())
+
+
+@receiver(pre_delete, sender=BlogPost)
+def post_pre_delete(sender, instance, **kwargs):
+    """Соседей запоминаем до каскада: их ссылки на статью обнулятся"""
+    instance._navigation_neighbours = (
+        PostNavigation.objects.filter(post_id=instance.pk)
+        .values_list("previous_post_id", "next_post_id")
+        .first()
+        or ()
+    )
+    # Ключи кэша (категория, теги) после каскада уже не найти
+    instance._cache_keys = affected_cache_keys([instance.pk])
+    # Статьи, у которых удаленная статья была в похожих, доберут замену
+    instance._similar_to = list(
+        PostSimilarity.objects.filter(related_post_id=instance.pk).values_list("post_id", flat=True)
+    )
+
+
+@receiver(post_delete, sender=BlogPost)
+def post_deleted(sender, instance, **kwargs):
+    invalidate_absolute_urls(BlogPost, instance.pk)
+    schedule_autocomplete_update("post", [instance.pk])
+    # Соседи удаленной статьи теперь ссылаются друг на друга
+    schedule_navigation_update(instance.pk, getattr(instance, "_navigation_neighbours", ()))
+    schedule_related_update(post_ids=[instance.pk, *getattr(instance, "_similar_to", ())])
+    schedule_cache_invalidation([], extra_keys=getattr(instance, "_cache_keys", ()))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_changed(sender, instance, **kwargs):
+    schedule_autocomplete_update("blog_category", [instance.pk])
+    schedule_cache_invalidation([], extra_keys=[archive_version_key("category", instance.pk)])
+
+
+@receiver(post_translation_save, sender=Category)
+def category_translation_saved(sender, instance, **kwargs):
+    schedule_autocomplete_update("blog_category", [instance.master_id])
+    # Название категории - в шапке и на карточках архива
+    schedule_cache_invalidation([], extra_keys=[archive_version_key("category", instance.master_id)])
+
+
+# --- Туры в блоке "забронируйте этот тур" -----------------------------------------
+
+
+def _suggesting_posts(tour_id):
+    return list(PostTourSimilarity.objects.filter(tour_id=tour_id).values_list("post_id", flat=True))
+
+
+@receiver(post_translation_save, sender=Tour)
+def tour_translation_saved(sender, instance, **kwargs):
+    """Текст тура поменялся; его заголовок и slug хранятся в ссылках статей"""
+    tour_id = instance.master_id
+    schedule_related_update(tour_ids=[tour_id], refresh=_suggesting_posts(tour_id))
+
+
+@receiver(pre_save, sender=Tour)
+def tour_pre_save(sender, instance, **kwargs):
+    instance._related_before = (
+        Tour.objects.filter(pk=instance.pk).values("status", "price_adult", "featured_image").first()
+        if instance.pk
+        else None
+    )
+
+
+@receiver(post_save, sender=Tour)
+def tour_saved(sender, instance, **kwargs):
+    """Публикация тура меняет похожие туры; цена и фото - ссылки статей"""
+    before = instance.__dict__.pop("_related_before", None)
+    if before is None:
+        if instance.status == "published":
+            schedule_related_update(tour_ids=[instance.pk])
+        return
+    if before["status"] != instance.status:
+        schedule_related_update(tour_ids=[instance.pk], refresh=_suggesting_posts(instance.pk))
+    elif before["price_adult"] != instance.price_adult or before["featured_image"] != instance.featured_image.name:
+        suggesting = _suggesting_posts(instance.pk)
+        transaction.on_commit(lambda: refresh_posts(suggesting))
+
+
+@receiver(m2m_changed, sender=Tour.tags.through)
+def tour_tags_changed(sender, instance, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear") and isinstance(instance, Tour):
+        schedule_related_update(tour_ids=[instance.pk])
+
+
+@receiver(pre_delete, sender=Tour)
+def tour_pre_delete(sender, instance, **kwargs):
+    """Статьи с удаленным туром запоминаем до каскада"""
+    instance._suggested_in = _suggesting_posts(instance.pk)
+
+
+@receiver(post_delete, sender=Tour)
+def tour_deleted(sender, instance, **kwargs):
+    suggested_in = getattr(instance, "_suggested_in", ())
+    schedule_related_update(post_ids=suggested_in, tour_ids=[instance.pk], refresh=suggested_in)
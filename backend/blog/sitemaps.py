@@ -1,5 +1,6 @@
 from django.contrib.sitemaps import Sitemap
-from django.utils import timezone
+
+from .cache import SITEMAP_ITEMS_KEY, cached_items, language_items_key
 from .models import BlogPost, Category
 
 class BlogPostSitemap(Sitemap):
@@ -8,10 +9,13 @@ class BlogPostSitemap(Sitemap):
     protocol = 'https'
     
     def items(self):
-        return BlogPost.objects.filter(
-            status='published',
-            published_at__lte=timezone.now()
-        ).order_by('-published_at')
+        # Отложенные статьи публикует blog.publishing, поэтому фильтр по
+        # текущему времени не нужен и список кэшируется (сброс - blog.cache)
+        return cached_items(language_items_key(SITEMAP_ITEMS_KEY), lambda: (
+            BlogPost.objects.filter(status='published')
+            .prefetch_related('translations')
+            .order_by('-published_at')
+        ))
     
     def lastmod(self, obj):
         return obj.updated_at
@@ -30,7 +30,9 @@ def blog_categories():
 
 @register.filter
 def reading_time(content):
-    """Подсчет времени чтения"""
+    """Подсчет времени чтения (у статьи - готовое значение из blog.content)"""
+    if isinstance(content, BlogPost):
+        return content.get_reading_time()
     if not content:
         return 1
     
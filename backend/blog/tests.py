@@ -0,0 +1,489 @@
+# backend/blog/tests.py
+"""
+Тесты блога: python manage.py test blog --settings=config.test_settings
+"""
+import base64
+import io
+from datetime import timedelta
+import json
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone, translation
+from PIL import Image
+
+from core.image_jobs import MAX_ATTEMPTS, enqueue_image_job, process_image_jobs
+from core.models import ImageJob, MediaFile, RecomputeTask
+from core.recompute import process_recompute_queue
+from core.url_cache import url_cache_key, warm_absolute_urls
+
+from .comments import client_ip
+from .content import derive_content
+from .counters import reconcile_post_counters, stale_post_ids
+from .feeds import BlogFeed
+from .models import BlogComment, BlogPost, Category
+from .navigation import post_navigation
+from .search import search_posts
+from .sitemaps import BlogPostSitemap
+
+
+def create_post(author, slugs, **kwargs):
+    """Опубликованная статья с переводами {язык: slug}"""
+    kwargs.setdefault('status', 'published')
+    post = BlogPost(author=author, **kwargs)
+    for language, slug in slugs.items():
+        post.set_current_language(language)
+        post.title = f'Hello {language.upper()}'
+        post.slug = slug
+        post.content = f'<p>Hello {language}</p>'
+    post.save()
+    return post
+
+
+class BlogTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author', password='secret')
+
+    def setUp(self):
+        cache.clear()
+
+
+def jpeg(size=(64, 48), color=(200, 80, 40)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+class MediaTestCase(BlogTestCase):
+    """Файлы пишутся во временный MEDIA_ROOT"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media_root = tempfile.mkdtemp()
+        cls.media_settings = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.media_settings.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.media_settings.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+        super().tearDownClass()
+
+    def drain_image_jobs(self):
+        while process_image_jobs()[0]:
+            pass
+
+
+class AbsoluteUrlCacheTests(BlogTestCase):
+    def test_warm_uses_each_language_translation(self):
+        post = create_post(self.author, {'en': 'hello-en', 'fr': 'bonjour-fr'})
+        post = BlogPost.objects.get(pk=post.pk)
+        post.set_current_language('en')
+
+        warm_absolute_urls([post])
+
+        label = BlogPost._meta.label_lower
+        self.assertEqual(cache.get(url_cache_key(label, post.pk, 'en')), '/blog/hello-en/')
+        self.assertEqual(cache.get(url_cache_key(label, post.pk, 'fr')), '/fr/blog/bonjour-fr/')
+        self.assertEqual(post.get_current_language(), 'en')
+
+
+class FeedCacheTests(BlogTestCase):
+    def test_feed_and_sitemap_cache_is_per_language(self):
+        create_post(self.author, {'en': 'hello-en', 'fr': 'bonjour-fr'})
+
+        for source in (BlogFeed(), BlogPostSitemap()):
+            with translation.override('fr'):
+                french = [post.get_display_title() for post in source.items()]
+            with translation.override('en'):
+                english = [post.get_display_title() for post in source.items()]
+            self.assertEqual(french, ['Hello FR'])
+            self.assertEqual(english, ['Hello EN'])
+
+
+class CommentSubmitTests(BlogTestCase):
+    data = {'name': 'Guest', 'email': 'guest@example.com', 'content': 'Nice article'}
+
+    def test_comment_is_queued(self):
+        post = create_post(self.author, {'en': 'hello-en'})
+        response = self.client.post(reverse('blog:post_comment', kwargs={'slug': 'hello-en'}), self.data)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(BlogComment.objects.filter(post=post, is_approved=False).count(), 1)
+
+    def test_closed_comments_are_rejected(self):
+        create_post(self.author, {'en': 'hello-en'}, allow_comments=False)
+        response = self.client.post(reverse('blog:post_comment', kwargs={'slug': 'hello-en'}), self.data)
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(BlogComment.objects.exists())
+
+
+class ClientIpTests(TestCase):
+    def test_spoofed_forwarded_for_is_ignored(self):
+        request = RequestFactory().post('/', HTTP_X_FORWARDED_FOR='1.2.3.4, 203.0.113.7')
+        self.assertEqual(client_ip(request), '203.0.113.7')
+
+    def test_real_ip_header_wins(self):
+        request = RequestFactory().post(
+            '/', HTTP_X_REAL_IP='198.51.100.2', HTTP_X_FORWARDED_FOR='1.2.3.4, 198.51.100.2'
+        )
+        self.assertEqual(client_ip(request), '198.51.100.2')
+
+
+class ContentSanitizerTests(TestCase):
+    def render(self, content):
+        return derive_content(content)['rendered_content']
+
+    def test_obfuscated_javascript_urls_are_dropped(self):
+        for content in (
+            '<a href="java&#x09;script:alert(1)">x</a>',
+            '<a href=" JaVaScRiPt&colon;alert(1)">x</a>',
+            '<svg><a xlink:href="javascript:alert(1)">x</a></svg>',
+            '<img src="data:text/html,&lt;script&gt;alert(1)&lt;/script&gt;">',
+            '<iframe srcdoc="&lt;script&gt;alert(1)&lt;/script&gt;"></iframe>',
+        ):
+            rendered = self.render(content)
+            self.assertNotIn('script', rendered.lower(), content)
+
+    def test_svg_animations_are_dropped(self):
+        for content in (
+            '<svg><a><animate attributeName="href" values="javascript:alert(1)"/><text>x</text></a></svg>',
+            '<svg><a><set attributeName="href" to="javascript:alert(1)"/><text>x</text></a></svg>',
+            '<svg><a><animateMotion values="javascript:alert(1)"></animateMotion>x</a></svg>',
+        ):
+            rendered = self.render(content)
+            self.assertNotIn('javascript', rendered.lower(), content)
+            self.assertIn('x</', rendered)
+
+    def test_safe_urls_are_kept(self):
+        rendered = self.render(
+            '<a href="/blog/">a</a><a href="https://example.com/?q=a:b">b</a>'
+            '<a href="mailto:info@example.com">c</a><a href="#intro">d</a>'
+        )
+        for url in ('/blog/', 'https://example.com/?q=a:b', 'mailto:info@example.com', '#intro'):
+            self.assertIn(f'href="{url}"', rendered)
+
+    def test_heading_ids_are_unique(self):
+        derived = derive_content(
+            '<h2>Intro</h2><p>a</p><h2 id="intro">Explicit</h2><h3>Intro</h3><h2 id="intro">Again</h2>'
+        )
+        ids = [entry['id'] for entry in derived['toc']]
+        self.assertEqual(ids, ['intro-3', 'intro', 'intro-4', 'intro-2'])
+        for anchor in ids:
+            self.assertEqual(derived['rendered_content'].count(f'id="{anchor}"'), 1)
+
+
+class ArchiveCacheTests(BlogTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.category = Category()
+        cls.category.set_current_language('en')
+        cls.category.name = 'Guides'
+        cls.category.slug = 'guides'
+        cls.category.save()
+        for index in range(3):
+            post = create_post(cls.author, {'en': f'post-{index}'}, category=cls.category)
+            post.tags.add('lake-como')
+        cls.category_url = reverse('blog:category', kwargs={'slug': 'guides'})
+        cls.tag_url = reverse('blog:tag', kwargs={'slug': 'lake-como'})
+
+    def test_category_queries(self):
+        # Промах: категория + перевод, число статей, страница + переводы статей и категории
+        with self.assertNumQueries(6):
+            response = self.client.get(self.category_url)
+        self.assertEqual(len(response.context['posts']), 3)
+        # Попадание: страница из кэша, запрашивается только сама категория
+        with self.assertNumQueries(2):
+            self.client.get(self.category_url)
+
+    def test_tag_queries(self):
+        # Промах: тег, число статей, страница + переводы статей и категории
+        with self.assertNumQueries(5):
+            response = self.client.get(self.tag_url)
+        self.assertEqual(len(response.context['posts']), 3)
+        with self.assertNumQueries(1):
+            self.client.get(self.tag_url)
+
+    def test_new_post_invalidates_its_archives(self):
+        self.client.get(self.category_url)
+        self.client.get(self.tag_url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            post = create_post(self.author, {'en': 'post-new'}, category=self.category)
+            post.tags.add('lake-como')
+
+        for url in (self.category_url, self.tag_url):
+            response = self.client.get(url)
+            self.assertEqual(response.context['posts'][0].pk, post.pk)
+            self.assertEqual(len(response.context['posts']), 4)
+
+
+class RelatedUpdateTests(BlogTestCase):
+    def test_saves_only_mark_posts_for_the_worker(self):
+        with mock.patch('blog.related.update_related_content', return_value=set()) as update:
+            with self.captureOnCommitCallbacks(execute=True):
+                first = create_post(self.author, {'en': 'first-en', 'fr': 'premier-fr'})
+                second = create_post(self.author, {'en': 'second-en'})
+            update.assert_not_called()
+            self.assertEqual(
+                set(RecomputeTask.objects.filter(kind='related_post').values_list('object_id', flat=True)),
+                {first.pk, second.pk},
+            )
+
+            process_recompute_queue()
+
+        update.assert_called_once()
+        post_ids, _tour_ids = update.call_args.args
+        self.assertEqual(post_ids, {first.pk, second.pk})
+        self.assertFalse(RecomputeTask.objects.filter(kind__startswith='related_').exists())
+
+    def test_failed_rebuild_keeps_marks(self):
+        post = create_post(self.author, {'en': 'first-en'})
+        with mock.patch('blog.related.update_related_content', side_effect=RuntimeError('boom')):
+            process_recompute_queue()
+        self.assertTrue(RecomputeTask.objects.filter(kind='related_post', object_id=post.pk).exists())
+
+
+
+class PostNavigationTests(BlogTestCase):
+    def setUp(self):
+        super().setUp()
+        start = timezone.now() - timedelta(days=10)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.posts = [
+                create_post(
+                    self.author, {'en': f'post-{index}'}, published_at=start + timedelta(days=index)
+                )
+                for index in range(3)
+            ]
+
+    def neighbours(self, post):
+        previous_link, next_link, _, _ = post_navigation(BlogPost.objects.get(pk=post.pk), 'en')
+        return (
+            previous_link.pk if previous_link else None,
+            next_link.pk if next_link else None,
+        )
+
+    def test_previous_and_next(self):
+        first, middle, last = self.posts
+        self.assertEqual(self.neighbours(first), (None, middle.pk))
+        self.assertEqual(self.neighbours(middle), (first.pk, last.pk))
+        self.assertEqual(self.neighbours(last), (middle.pk, None))
+
+        previous_link, _, _, _ = post_navigation(BlogPost.objects.get(pk=middle.pk), 'en')
+        self.assertEqual(previous_link.get_absolute_url(), '/blog/post-0/')
+
+    def test_unpublished_post_is_skipped_by_neighbours(self):
+        first, middle, last = self.posts
+        with self.captureOnCommitCallbacks(execute=True):
+            middle.status = 'draft'
+            middle.save()
+
+        self.assertEqual(self.neighbours(first), (None, last.pk))
+        self.assertEqual(self.neighbours(last), (first.pk, None))
+
+    def test_page_reads_links_without_queries(self):
+        post = BlogPost.objects.select_related('navigation').get(pk=self.posts[1].pk)
+        with self.assertNumQueries(0):
+            previous_link, next_link, _, _ = post_navigation(post, 'en')
+            self.assertEqual((previous_link.title, next_link.title), ('Hello EN', 'Hello EN'))
+
+class CommentCounterTests(BlogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.post = create_post(self.author, {'en': 'counted'})
+        self.other = create_post(self.author, {'en': 'other'})
+
+    def comment(self, post, approved=True):
+        return BlogComment.objects.create(
+            post=post, name='Guest', email='guest@example.com', content='Nice', is_approved=approved
+        )
+
+    def count(self, post):
+        return BlogPost.objects.values_list('approved_comments_count', flat=True).get(pk=post.pk)
+
+    def test_signals_keep_counts(self):
+        comment = self.comment(self.post)
+        self.comment(self.post, approved=False)
+        self.assertEqual(self.count(self.post), 1)
+
+        comment.post = self.other
+        comment.save()
+        self.assertEqual((self.count(self.post), self.count(self.other)), (0, 1))
+
+        comment.delete()
+        self.assertEqual(self.count(self.other), 0)
+
+    def test_reconcile_fixes_updates_that_bypass_signals(self):
+        self.comment(self.post)
+        BlogComment.objects.filter(post=self.post).update(is_approved=False)
+        BlogPost.objects.filter(pk=self.other.pk).update(approved_comments_count=5)
+
+        self.assertEqual(stale_post_ids(), {self.post.pk, self.other.pk})
+        self.assertEqual(reconcile_post_counters(), {self.post.pk, self.other.pk})
+        self.assertEqual((self.count(self.post), self.count(self.other)), (0, 0))
+        self.assertEqual(stale_post_ids(), set())
+
+    def test_command_dry_run_reports_without_fixing(self):
+        BlogPost.objects.filter(pk=self.post.pk).update(approved_comments_count=3)
+        out = io.StringIO()
+
+        call_command('reconcile_post_counters', '--dry-run', stdout=out)
+
+        self.assertIn(f'[{self.post.pk}]', out.getvalue())
+        self.assertEqual(self.count(self.post), 3)
+
+class BlogListPaginationTests(BlogTestCase):
+    def test_tampered_cursor_is_not_found(self):
+        create_post(self.author, {'en': 'hello-en'})
+        for values in (['x', 1], [1, 2], [[1], 2], [{'dt': '2026-01-01T00:00:00+00:00'}, 'abc']):
+            cursor = base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+            response = self.client.get('/blog/', {'after': cursor})
+            self.assertEqual(response.status_code, 404, values)
+
+
+class SearchTests(BlogTestCase):
+    def test_matches_every_language_once(self):
+        post = create_post(self.author, {'en': 'hello-en', 'fr': 'bonjour-fr'})
+        create_post(self.author, {'en': 'draft'}, status='draft')
+
+        self.assertEqual(list(search_posts('Hello')), [post])
+        self.assertEqual(list(search_posts('hello fr')), [post])
+        self.assertEqual(list(search_posts('Hello DE')), [])
+
+    def test_results_page_uses_search_ordering(self):
+        post = create_post(self.author, {'en': 'hello-en'})
+
+        response = self.client.get('/blog/search/', {'q': 'hello'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['posts']), [post])
+        self.assertEqual(response.context['page_obj'].number, 1)
+
+class SearchPaginationTests(BlogTestCase):
+    def test_pages_do_not_skip_or_repeat(self):
+        for index in range(11):
+            create_post(self.author, {'en': f'hello-{index}'})
+        first = self.client.get('/blog/search/', {'q': 'Hello'})
+        second = self.client.get('/blog/search/?' + first.context['page_obj'].next_query)
+        ids = [post.pk for post in first.context['posts']] + [post.pk for post in second.context['posts']]
+        self.assertEqual(len(first.context['posts']), 9)
+        self.assertFalse(second.context['page_obj'].has_next())
+        self.assertEqual(sorted(ids), sorted(BlogPost.objects.values_list('pk', flat=True)))
+
+    def test_invalid_page_is_not_found(self):
+        for page in ('abc', '0', '-1', '1000'):
+            response = self.client.get('/blog/search/', {'q': 'Hello', 'page': page})
+            self.assertEqual(response.status_code, 404, page)
+
+
+class ImageJobTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post = create_post(
+                self.author,
+                {'en': 'image'},
+                featured_image=SimpleUploadedFile('large.jpg', jpeg(size=(1600, 900))),
+            )
+        self.name = self.post.featured_image.name
+
+    def read(self):
+        with default_storage.open(self.name, 'rb') as f:
+            return f.read()
+
+    def test_save_only_queues_the_job(self):
+        job = ImageJob.objects.get(path=self.name)
+        self.assertEqual((job.pipeline, job.status), ('featured', ImageJob.STATUS_PENDING))
+        with Image.open(default_storage.path(self.name)) as img:
+            self.assertEqual(img.width, 1600)
+
+    def test_processing_resizes_once_and_chains_derivatives(self):
+        self.assertEqual(process_image_jobs(), (1, 1))
+        self.assertEqual(
+            ImageJob.objects.get(path=self.name, pipeline='derivatives').status,
+            ImageJob.STATUS_PENDING,
+        )
+        post = BlogPost.objects.get(pk=self.post.pk)
+        self.assertEqual((post.featured_image_width, post.featured_image_height), (1200, 675))
+        self.drain_image_jobs()
+        optimized = self.read()
+
+        enqueue_image_job(self.name)
+        with mock.patch('core.image_jobs.optimize_featured') as optimize:
+            taken, processed = process_image_jobs()
+        optimize.assert_not_called()
+        self.assertEqual((taken, processed), (1, 0))
+        self.assertEqual(self.read(), optimized)
+
+    def test_resave_without_new_image_queues_nothing(self):
+        self.drain_image_jobs()
+        post = BlogPost.objects.get(pk=self.post.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            post.save()
+
+        self.assertFalse(ImageJob.objects.exclude(status=ImageJob.STATUS_DONE).exists())
+
+    def test_missing_file_fails_after_max_attempts(self):
+        default_storage.delete(self.name)
+        for _ in range(MAX_ATTEMPTS):
+            process_image_jobs()
+
+        job = ImageJob.objects.get(path=self.name)
+        self.assertEqual((job.status, job.attempts), (ImageJob.STATUS_FAILED, MAX_ATTEMPTS))
+
+class FeaturedImageTests(MediaTestCase):
+    def test_same_content_under_new_path_gets_a_manifest(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            post = create_post(
+                self.author, {'en': 'image'}, featured_image=SimpleUploadedFile('a.jpg', jpeg())
+            )
+        self.drain_image_jobs()
+        original = MediaFile.objects.get(path=post.featured_image.name)
+        self.assertTrue(original.variants)
+
+        with default_storage.open(original.path, 'rb') as f:
+            copy = default_storage.save('blog/featured/copy.jpg', ContentFile(f.read()))
+        post = BlogPost.objects.get(pk=post.pk)
+        post.featured_image = copy
+        with self.captureOnCommitCallbacks(execute=True):
+            post.save()
+
+        self.assertEqual(
+            list(ImageJob.objects.filter(path=copy).values_list('pipeline', flat=True)),
+            ['derivatives'],
+        )
+        with mock.patch('core.derivatives.encode_variants') as encode:
+            self.drain_image_jobs()
+        encode.assert_not_called()
+        self.assertEqual(MediaFile.objects.get(path=copy).variants, original.variants)
+
+
+class MediaPagesTests(MediaTestCase):
+    def test_list_and_detail_do_not_touch_files(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            post = create_post(
+                self.author, {'en': 'image'}, featured_image=SimpleUploadedFile('a.jpg', jpeg())
+            )
+        self.drain_image_jobs()
+        disk = mock.Mock(side_effect=AssertionError('file access during render'))
+
+        with mock.patch.multiple(FileSystemStorage, open=disk, exists=disk, size=disk, listdir=disk):
+            list_response = self.client.get('/blog/')
+            detail_response = self.client.get('/blog/image/')
+
+        self.assertEqual((list_response.status_code, detail_response.status_code), (200, 200))
+        self.assertEqual(list(list_response.context['posts']), [post])
+        self.assertContains(list_response, 'width="64" height="48"')
+        disk.assert_not_called()
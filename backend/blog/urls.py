@@ -36,6 +36,9 @@ urlpatterns = [
          core_views.bernina_express_video,
          name='bernina_express_video'),
     
+    # Отправка комментария (ставится в очередь, оценка спама - в фоне)
+    path('<slug:slug>/comment/', views.CommentSubmitView.as_view(), name='post_comment'),
+    
     # Динамические статьи (новая система) - должно быть в конце!
     path('<slug:slug>/', views.BlogDetailView.as_view(), name='post_detail'),
 ]
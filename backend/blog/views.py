@@ -1,37 +1,115 @@
 # blog/views.py
 import logging
 import os
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db.models import Prefetch
+from django.views import View
 from django.views.generic import ListView, DetailView
-from django.shortcuts import get_object_or_404
-from django.http import Http404
+from django.shortcuts import get_object_or_404, redirect
+from django.urls import reverse
+from django.http import Http404, HttpResponseForbidden, JsonResponse
 from django.utils.translation import get_language
 from django.core.paginator import Paginator
 from django.conf import settings
+from parler.appsettings import PARLER_LANGUAGES
+from taggit.models import Tag, TaggedItem
+
+from core.media_health import attach_media_info
+from core.pagination import KeysetPaginationMixin, OffsetPaginationMixin
+from core.url_cache import prime_absolute_urls
+from tours.search import attach_tour_headlines, search_tours
+
+from .cache import (
+    ARCHIVE_CACHE_TIMEOUT,
+    LIST_TOTAL_KEY,
+    archive_page_key,
+    category_total_key,
+    tag_total_key,
+)
+from .comments import client_ip
+from .forms import CommentForm
 from .models import BlogPost, Category
+from .navigation import post_navigation
+from .search import attach_post_headlines, search_posts
 
 # Настройка логгера
 logger = logging.getLogger('blog')
 
 
-class BlogListView(ListView):
+# Порядок статей в списках - он же ключ keyset пагинации
+POST_KEYSET_ORDERING = ('-published_at', '-id')
+
+
+def _page_languages():
+    """Язык страницы и его запасные языки parler"""
+    language = get_language()
+    return [language, *PARLER_LANGUAGES.get_fallback_languages(language)]
+
+
+def translations_prefetch(lookup, model):
+    """Prefetch переводов model только на языках страницы (один запрос)"""
+    return Prefetch(
+        lookup,
+        queryset=model._parler_meta.root_model.objects.filter(language_code__in=_page_languages()),
+    )
+
+
+def card_posts(queryset):
+    """Статьи для карточек: автор и категория JOIN-ом, переводы статей и категорий - по запросу"""
+    return queryset.select_related('author', 'category').prefetch_related(
+        translations_prefetch('translations', BlogPost),
+        translations_prefetch('category__translations', Category),
+    )
+
+
+def attach_image_info(posts):
+    """Габариты и варианты изображений из таблицы медиа - без обращения к диску"""
+    return attach_media_info(posts)
+
+
+class ArchiveCacheMixin:
+    """
+    Кэш страниц архива по (категория/тег, курсор, язык) - страница
+    keyset пагинации вместе с подготовленными карточками. Сброс - сигналы
+    через blog.cache (версия архива).
+    """
+
+    archive_kind = None
+
+    def get_archive_value(self):
+        raise NotImplementedError
+
+    def paginate_keyset(self, queryset):
+        cursor = f"{self.request.GET.get('after', '')}:{self.request.GET.get('before', '')}"
+        key = archive_page_key(self.archive_kind, self.get_archive_value(), get_language(), cursor)
+        page = cache.get(key)
+        if page is None:
+            page = super().paginate_keyset(queryset)
+            attach_image_info(page.object_list)
+            # Остальные GET параметры у каждого запроса свои
+            page.params = None
+            cache.set(key, page, ARCHIVE_CACHE_TIMEOUT)
+        page.params = self.request.GET
+        return page
+
+
+class BlogListView(KeysetPaginationMixin, ListView):
     """Список всех статей блога с логированием"""
     model = BlogPost
     template_name = 'blog/blog_list.html'
     context_object_name = 'posts'
-    paginate_by = 9
+    page_size = 9
+    keyset_ordering = POST_KEYSET_ORDERING
     
     def get_queryset(self):
         """Возвращаем только опубликованные статьи"""
         logger.info("📄 Получаем queryset для списка блога")
         
-        queryset = BlogPost.objects.filter(
-            status='published'
-        ).select_related('author', 'category').prefetch_related('tags').order_by('-published_at')
-        
-        total_posts = queryset.count()
-        logger.info(f"📄 Найдено опубликованных постов: {total_posts}")
-        
-        return queryset
+        return card_posts(BlogPost.objects.filter(status='published'))
+    
+    def get_total_cache_key(self):
+        return LIST_TOTAL_KEY
     
     def get_context_data(self, **kwargs):
         """Добавляем контекст с подробным логированием"""
@@ -42,79 +120,13 @@ class BlogListView(ListView):
         
         logger.info(f"📄 Отображаем {len(posts)} постов на странице")
         
-        # Детальный анализ каждого поста
-        for i, post in enumerate(posts, 1):
-            logger.info(f"📝 Пост {i}: ID={post.id}, Title='{post.get_display_title()}'")
-            logger.info(f"   Status: {post.status}")
-            logger.info(f"   Author: {post.author.username}")
-            logger.info(f"   Published: {post.published_at}")
-            
-            # Подробная проверка изображения
-            if post.featured_image:
-                logger.info(f"🖼️ Пост {i} - есть featured_image:")
-                logger.info(f"   Name: {post.featured_image.name}")
-                logger.info(f"   URL: {post.featured_image.url}")
-                
-                # Проверяем физическое существование файла
-                try:
-                    image_path = post.featured_image.path
-                    logger.info(f"   Path: {image_path}")
-                    
-                    if os.path.exists(image_path):
-                        file_size = os.path.getsize(image_path)
-                        logger.info(f"   ✅ Файл существует, размер: {file_size} bytes")
-                        
-                        # Проверяем права доступа
-                        readable = os.access(image_path, os.R_OK)
-                        logger.info(f"   🔒 Доступен для чтения: {readable}")
-                        
-                        # Проверяем, что это действительно изображение
-                        try:
-                            from PIL import Image
-                            with Image.open(image_path) as img:
-                                logger.info(f"   🖼️ Размеры: {img.width}x{img.height}, формат: {img.format}")
-                        except Exception as img_e:
-                            logger.error(f"   ❌ Ошибка при проверке изображения: {img_e}")
-                    else:
-                        logger.error(f"   ❌ Файл НЕ существует: {image_path}")
-                        
-                        # Проверяем директорию
-                        dir_path = os.path.dirname(image_path)
-                        if os.path.exists(dir_path):
-                            logger.info(f"   📁 Директория существует: {dir_path}")
-                            dir_contents = os.listdir(dir_path)
-                            logger.info(f"   📁 Содержимое директории: {dir_contents}")
-                        else:
-                            logger.error(f"   📁 Директория НЕ существует: {dir_path}")
-                            
-                except Exception as e:
-                    logger.error(f"   ❌ Ошибка при проверке пути изображения: {e}")
-            else:
-                logger.warning(f"❌ Пост {i} - НЕТ featured_image")
-            
-            # Проверяем категорию
-            if post.category:
-                category_name = post.category.safe_translation_getter('name', any_language=True)
-                logger.info(f"   📂 Категория: {category_name}")
-            else:
-                logger.warning(f"   📂 Нет категории")
-        
-        # Добавляем отладочную информацию в контекст
+        # Габариты изображений из таблицы медиа - без обращения к диску
+        attach_image_info(posts)
+        
         context['page_title'] = 'Blog - Abroads Tours'
         context['page_description'] = 'Travel tips, destination guides, and travel inspiration from Abroads Tours.'
         
-        # Информация о медиа настройках
-        context['debug_info'] = {
-            'media_url': settings.MEDIA_URL,
-            'media_root': settings.MEDIA_ROOT,
-            'debug': settings.DEBUG,
-            'total_posts': len(posts),
-        }
-        
         logger.info(f"🔧 Контекст сформирован успешно")
-        logger.info(f"⚙️ MEDIA_URL: {settings.MEDIA_URL}")
-        logger.info(f"⚙️ MEDIA_ROOT: {settings.MEDIA_ROOT}")
-        logger.info(f"⚙️ DEBUG: {settings.DEBUG}")
         
         return context
 
@@ -131,12 +143,10 @@ class BlogDetailView(DetailView):
         """Возвращаем только опубликованные статьи"""
         logger.info("📄 Получаем queryset для детальной страницы")
         
-        queryset = BlogPost.objects.filter(
+        # Навигация (соседи и похожие) приходит тем же запросом
+        return BlogPost.objects.filter(
             status='published'
-        ).select_related('author', 'category').prefetch_related('tags')
-        
-        logger.info(f"📄 Queryset для детальной страницы: {queryset.count()} постов")
-        return queryset
+        ).select_related('author', 'category', 'navigation').prefetch_related('tags')
     
     def get_object(self, queryset=None):
         """Получаем объект с правильной работой переводов"""
@@ -157,17 +167,6 @@ class BlogDetailView(DetailView):
             obj = queryset.get(translations__slug=slug)
             logger.info(f"✅ Пост найден: ID={obj.id}, Title='{obj.get_display_title()}'")
             
-            # Проверяем изображение
-            if obj.featured_image:
-                logger.info(f"🖼️ У поста есть изображение: {obj.featured_image.url}")
-                
-                if os.path.exists(obj.featured_image.path):
-                    logger.info(f"✅ Файл изображения существует")
-                else:
-                    logger.error(f"❌ Файл изображения НЕ существует: {obj.featured_image.path}")
-            else:
-                logger.warning("⚠️ У поста нет featured_image")
-            
             # Увеличиваем счетчик просмотров
             logger.info("👁️ Увеличиваем счетчик просмотров")
             obj.increment_views()
@@ -186,7 +185,8 @@ class BlogDetailView(DetailView):
         logger.info("🔧 Формируем контекст для детальной страницы")
         
         context = super().get_context_data(**kwargs)
-        post = self.get_object()
+        post = self.object
+        attach_image_info([post])
         
         # Используем helper методы модели
         context['page_title'] = post.get_display_meta_title()
@@ -195,62 +195,101 @@ class BlogDetailView(DetailView):
         logger.info(f"📄 Meta title: '{context['page_title']}'")
         logger.info(f"📄 Meta description: '{context['page_description']}'")
         
-        # Получаем связанные статьи
-        logger.info("🔗 Получаем связанные статьи")
-        related_posts = post.get_related_posts(limit=3)
+        # Соседние и похожие статьи - из сохраненной навигации, без запросов
+        previous_post, next_post, related_posts, related_tours = post_navigation(post)
+        context['previous_post'] = previous_post
+        context['next_post'] = next_post
         context['related_posts'] = related_posts
-        logger.info(f"🔗 Найдено связанных статей: {len(related_posts)}")
-        
-        # Получаем предыдущую и следующую статьи
-        logger.info("⬅️➡️ Получаем соседние статьи")
-        context['next_post'] = post.get_next_post()
-        context['previous_post'] = post.get_previous_post()
-        
-        if context['next_post']:
-            logger.info(f"➡️ Следующая статья: {context['next_post'].get_display_title()}")
-        if context['previous_post']:
-            logger.info(f"⬅️ Предыдущая статья: {context['previous_post'].get_display_title()}")
+        context['related_tours'] = related_tours
         
         # Получаем комментарии (только одобренные)
         logger.info("💬 Получаем комментарии")
         comments = post.comments.filter(is_approved=True).order_by('-created_at')
         context['comments'] = comments
-        logger.info(f"💬 Найдено одобренных комментариев: {comments.count()}")
+        context['comment_form'] = CommentForm()
+        context['comment_status'] = self.request.GET.get('comment')
+        logger.info(f"💬 Одобренных комментариев: {post.approved_comments_count}")
         
         logger.info("✅ Контекст для детальной страницы сформирован")
         return context
 
 
-class CategoryView(ListView):
+class CommentSubmitView(View):
+    """
+    Прием комментария: только INSERT в очередь (не одобрен, не оценен).
+    Оценка спама - в фоне (команда score_comments), запрос ее не ждет.
+    """
+    http_method_names = ['post']
+    
+    def post(self, request, slug):
+        post = get_object_or_404(
+            BlogPost.objects.filter(status='published', translations__slug=slug)
+            .only('pk', 'allow_comments').distinct()
+        )
+        wants_json = (
+            request.headers.get('x-requested-with') == 'XMLHttpRequest'
+            or 'application/json' in request.headers.get('accept', '')
+        )
+        
+        if not post.allow_comments:
+            logger.info(f"💬 Комментарии к посту {post.pk} закрыты")
+            if wants_json:
+                return JsonResponse({'status': 'closed'}, status=403)
+            return HttpResponseForbidden()
+        
+        form = CommentForm(request.POST)
+        
+        if not form.is_valid():
+            logger.info(f"💬 Комментарий к посту {post.pk} не прошел проверку формы")
+            if wants_json:
+                return JsonResponse({'status': 'invalid', 'errors': form.errors}, status=400)
+            return redirect(f"{reverse('blog:post_detail', kwargs={'slug': slug})}?comment=invalid#comments")
+        
+        comment = form.save(commit=False)
+        comment.post = post
+        comment.ip_address = client_ip(request)
+        comment.user_agent = request.headers.get('user-agent', '')[:255]
+        comment.save()
+        logger.info(f"💬 Комментарий {comment.pk} к посту {post.pk} поставлен в очередь модерации")
+        
+        if wants_json:
+            return JsonResponse({'status': 'pending', 'id': comment.pk}, status=202)
+        return redirect(f"{reverse('blog:post_detail', kwargs={'slug': slug})}?comment=pending#comments")
+
+
+class CategoryView(ArchiveCacheMixin, KeysetPaginationMixin, ListView):
     """Статьи определенной категории с логированием"""
     model = BlogPost
     template_name = 'blog/category.html'
     context_object_name = 'posts'
-    paginate_by = 9
+    page_size = 9
+    keyset_ordering = POST_KEYSET_ORDERING
+    archive_kind = 'category'
     
     def get_queryset(self):
-        """Получаем статьи категории"""
+        """Получаем статьи категории (сам запрос выполнится только при промахе кэша)"""
         category_slug = self.kwargs['slug']
         logger.info(f"📂 Получаем статьи для категории: '{category_slug}'")
         
         self.category = get_object_or_404(
-            Category, 
-            translations__slug=category_slug,
-            is_active=True
+            Category.objects.filter(
+                translations__slug=category_slug,
+                is_active=True
+            ).prefetch_related(translations_prefetch('translations', Category))
         )
         
-        category_name = self.category.safe_translation_getter('name', any_language=True)
-        logger.info(f"📂 Категория найдена: '{category_name}' (ID={self.category.id})")
+        logger.info(f"📂 Категория найдена: ID={self.category.id}")
         
-        queryset = BlogPost.objects.filter(
+        return card_posts(BlogPost.objects.filter(
             category=self.category,
             status='published'
-        ).select_related('author', 'category').prefetch_related('tags').order_by('-published_at')
-        
-        total_posts = queryset.count()
-        logger.info(f"📄 Статей в категории: {total_posts}")
-        
-        return queryset
+        ))
+    
+    def get_archive_value(self):
+        return self.category.pk
+    
+    def get_total_cache_key(self):
+        return category_total_key(self.category.pk)
     
     def get_context_data(self, **kwargs):
         """Формируем контекст для категории"""
@@ -270,80 +309,91 @@ class CategoryView(ListView):
         return context
 
 
-class TagView(ListView):
+class TagView(ArchiveCacheMixin, KeysetPaginationMixin, ListView):
     """Статьи с определенным тегом с логированием"""
     model = BlogPost
     template_name = 'blog/tag.html'
     context_object_name = 'posts'
-    paginate_by = 9
+    page_size = 9
+    keyset_ordering = POST_KEYSET_ORDERING
+    archive_kind = 'tag'
     
     def get_queryset(self):
-        """Получаем статьи по тегу"""
+        """Получаем статьи по тегу: id статей - подзапросом по TaggedItem, без JOIN через GenericRelation"""
         self.tag_slug = self.kwargs['slug']
         logger.info(f"🏷️ Получаем статьи для тега: '{self.tag_slug}'")
         
-        queryset = BlogPost.objects.filter(
-            tags__slug=self.tag_slug,
-            status='published'
-        ).select_related('author', 'category').prefetch_related('tags').order_by('-published_at')
-        
-        total_posts = queryset.count()
-        logger.info(f"📄 Статей с тегом '{self.tag_slug}': {total_posts}")
+        self.tag = get_object_or_404(Tag, slug=self.tag_slug)
+        tagged = TaggedItem.objects.filter(
+            tag=self.tag,
+            content_type=ContentType.objects.get_for_model(BlogPost),
+        ).values('object_id')
         
-        return queryset
+        return card_posts(BlogPost.objects.filter(pk__in=tagged, status='published'))
+    
+    def get_archive_value(self):
+        return self.tag_slug
+    
+    def get_total_cache_key(self):
+        return tag_total_key(self.tag_slug)
     
     def get_context_data(self, **kwargs):
         """Формируем контекст для тега"""
         logger.info("🔧 Формируем контекст для TagView")
         
         context = super().get_context_data(**kwargs)
+        context['tag'] = self.tag
         context['tag_slug'] = self.tag_slug
-        context['page_title'] = f"#{self.tag_slug} - Blog"
-        context['page_description'] = f"Articles tagged with {self.tag_slug}"
+        context['page_title'] = f"#{self.tag.name} - Blog"
+        context['page_description'] = f"Articles tagged with {self.tag.name}"
         
         logger.info(f"🏷️ Контекст тега: {self.tag_slug}")
         return context
 
 
-class SearchView(ListView):
-    """Поиск по статьям с логированием"""
+class SearchView(OffsetPaginationMixin, ListView):
+    """Полнотекстовый поиск по статьям и турам"""
     model = BlogPost
     template_name = 'blog/search.html'
     context_object_name = 'posts'
-    paginate_by = 9
+    page_size = 9
+    # Оценка релевантности - float, поэтому страницы по номеру, а не по курсору
+    offset_ordering = ('-search_rank', '-id')
+    tours_limit = 6
+    
+    def get_search_query(self):
+        return self.request.GET.get('q', '').strip()
     
     def get_queryset(self):
-        """Поиск статей"""
-        query = self.request.GET.get('q', '')
+        """Статьи по релевантности - по одной строке на статью"""
+        query = self.get_search_query()
         logger.info(f"🔍 Поиск по запросу: '{query}'")
         
-        if query:
-            queryset = BlogPost.objects.filter(
-                translations__title__icontains=query,
-                status='published'
-            ).select_related('author', 'category').prefetch_related('tags').order_by('-published_at')
-            
-            total_results = queryset.count()
-            logger.info(f"🔍 Найдено результатов: {total_results}")
-            
-            return queryset
-        else:
-            logger.info("🔍 Пустой поисковый запрос")
+        if not query:
             return BlogPost.objects.none()
+        
+        return search_posts(query).select_related('author', 'category').prefetch_related(
+            'translations', 'category__translations'
+        )
     
     def get_context_data(self, **kwargs):
-        """Формируем контекст для поиска"""
-        logger.info("🔧 Формируем контекст для SearchView")
-        
+        """Подсветка совпадений и туры - только для текущей страницы"""
         context = super().get_context_data(**kwargs)
-        query = self.request.GET.get('q', '')
+        query = self.get_search_query()
+        language = get_language()
         
         context['query'] = query
         context['page_title'] = f"Search results for '{query}'" if query else "Search"
         context['page_description'] = f"Search results for {query}" if query else "Search our blog"
         
-        results_count = len(context.get('posts', []))
-        logger.info(f"🔍 Результатов на странице: {results_count}")
+        posts = attach_post_headlines(context['posts'], query, language) if query else []
+        context['posts'] = context['object_list'] = prime_absolute_urls(posts)
+        
+        tours = []
+        if query:
+            tours = search_tours(query).prefetch_related('translations')[:self.tours_limit]
+            tours = prime_absolute_urls(attach_tour_headlines(tours, query, language))
+        context['tours'] = tours
         
         return context
 
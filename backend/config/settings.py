@@ -31,6 +31,9 @@ CSRF_TRUSTED_ORIGINS = [
     "http://0.0.0.0:8000",
 ]
 
+# Канонический адрес сайта для абсолютных ссылок (JSON-LD, фиды)
+SITE_URL = os.getenv("SITE_URL", "https://abroadstours.com").rstrip("/")
+
 # Apps
 INSTALLED_APPS = [
     "django.contrib.admin",
@@ -151,6 +154,31 @@ STATIC_ROOT = BASE_DIR / "collected_static"
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Публичные медиа отдает nginx (gateway) напрямую с тома media. Приватные
+# файлы filer (smedia/) Django только авторизует, а с MEDIA_X_ACCEL=True
+# отдает через X-Accel-Redirect - сам файл передает nginx
+MEDIA_X_ACCEL = os.getenv("MEDIA_X_ACCEL", "False") == "True"
+PRIVATE_MEDIA_ROOT = os.path.join(BASE_DIR, 'smedia')
+if MEDIA_X_ACCEL:
+    FILER_SERVERS = {
+        'private': {
+            'main': {
+                'ENGINE': 'filer.server.backends.nginx.NginxXAccelRedirectServer',
+                'OPTIONS': {
+                    'location': os.path.join(PRIVATE_MEDIA_ROOT, 'filer_private'),
+                    'nginx_location': '/internal/filer_private',
+                },
+            },
+            'thumbnails': {
+                'ENGINE': 'filer.server.backends.nginx.NginxXAccelRedirectServer',
+                'OPTIONS': {
+                    'location': os.path.join(PRIVATE_MEDIA_ROOT, 'filer_private_thumbnails'),
+                    'nginx_location': '/internal/filer_private_thumbnails',
+                },
+            },
+        },
+    }
+
 # Настройки Django-Filer
 THUMBNAIL_HIGH_RESOLUTION = True
 THUMBNAIL_QUALITY = 90
@@ -482,5 +510,9 @@ THUMBNAIL_ALIASES = {
         'blog_preview': {'size': (400, 300), 'crop': True, 'quality': 85},
         'blog_thumb': {'size': (150, 150), 'crop': True, 'quality': 80},
         'admin_thumb': {'size': (100, 75), 'crop': True, 'quality': 75},
+        # Адаптивные варианты картинок в тексте статей (WebP, srcset - см. blog.content)
+        'blog_content_sm': {'size': (480, 0), 'quality': 80},
+        'blog_content_md': {'size': (800, 0), 'quality': 80},
+        'blog_content_lg': {'size': (1200, 0), 'quality': 80},
     },
 }
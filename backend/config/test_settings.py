@@ -0,0 +1,35 @@
+# backend/config/test_settings.py
+"""
+Настройки для тестов: python manage.py test --settings=config.test_settings
+
+SQLite в памяти без миграций (таблицы создаются по моделям: миграции
+parler и postgres-индексы для тестов не нужны) и локальный кэш вместо
+Redis/DummyCache, чтобы проверять попадания в кэш.
+"""
+from .settings import *  # noqa: F401,F403
+
+
+class DisableMigrations(dict):
+    def __contains__(self, item):
+        return True
+
+    def __getitem__(self, item):
+        return None
+
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": ":memory:",
+    }
+}
+
+MIGRATION_MODULES = DisableMigrations()
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
@@ -64,6 +64,8 @@ urlpatterns = [
 
     # Django-Filer маршруты
     path("filer/", include("filer.urls")),  
+    # Приватные файлы filer: проверка прав, отдача - nginx (X-Accel-Redirect)
+    path("", include("filer.server.urls")),
 ]
 
 # Добавляем RSS feeds для блога если доступны
@@ -0,0 +1,82 @@
+# backend/core/admin.py
+from django.contrib import admin
+
+from .image_jobs import enqueue_image_job
+from .media_health import attach_media_info
+from .models import ImageJob, MediaFile, MediaReencode
+
+
+class MediaInfoAdminMixin:
+    """
+    Метаданные изображения (MediaFile) в obj.<поле>_info для списка и формы -
+    одним запросом на страницу. Виджеты админки не открывают файлы.
+    """
+    media_info_field = "image"
+
+    def get_changelist_instance(self, request):
+        changelist = super().get_changelist_instance(request)
+        attach_media_info(changelist.result_list, self.media_info_field)
+        return changelist
+
+    def get_object(self, request, object_id, from_field=None):
+        obj = super().get_object(request, object_id, from_field)
+        if obj is not None:
+            attach_media_info([obj], self.media_info_field)
+        return obj
+
+
+@admin.register(MediaFile)
+class MediaFileAdmin(admin.ModelAdmin):
+    """Результаты сканера медиа (только просмотр)"""
+    list_display = [
+        'path', 'exists', 'dimensions', 'format', 'mode', 'size', 'derivatives', 'missing_since', 'checked_at',
+    ]
+    list_filter = ['exists', 'format', 'mode']
+    search_fields = ['path', 'content_hash']
+    readonly_fields = [field.name for field in MediaFile._meta.fields]
+
+    @admin.display(description="Derivatives")
+    def derivatives(self, obj):
+        if not obj.variants:
+            return "-"
+        return f"{len(obj.variants)} sizes, {obj.variants_bytes // 1024} KB"
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ImageJob)
+class ImageJobAdmin(admin.ModelAdmin):
+    """Очередь фоновой обработки изображений"""
+    list_display = ['path', 'pipeline', 'status', 'attempts', 'created_at', 'finished_at']
+    list_filter = ['status', 'pipeline']
+    search_fields = ['path', 'source_hash', 'result_hash']
+    readonly_fields = [field.name for field in ImageJob._meta.fields]
+    actions = ['retry_jobs']
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description="Retry selected jobs")
+    def retry_jobs(self, request, queryset):
+        for job in queryset:
+            enqueue_image_job(job.path, job.pipeline)
+        self.message_user(request, f"{queryset.count()} jobs queued")
+
+
+@admin.register(MediaReencode)
+class MediaReencodeAdmin(admin.ModelAdmin):
+    """Прогресс команды reencode_media (только просмотр)"""
+    list_display = ['path', 'status', 'original_size', 'size', 'saved', 'derivatives_size', 'processed_at']
+    list_filter = ['status']
+    search_fields = ['path']
+    readonly_fields = [field.name for field in MediaReencode._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
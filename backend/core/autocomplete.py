@@ -0,0 +1,350 @@
+# backend/core/autocomplete.py
+"""
+Префиксный индекс для поиска по мере ввода (статьи, туры, категории, теги).
+
+Для каждого языка и каждого префикса слов заголовка (от 2 до 15 символов)
+хранится отсортированное множество документов с весом, а сами документы
+(тип, заголовок, URL) - в отдельном хэше. Запрос - это один ZREVRANGE и
+один HMGET без обращения к БД.
+
+В продакшене индекс лежит в Redis (django-redis), поэтому общий для всех
+воркеров. Без Redis (DEBUG) используется индекс в памяти процесса, он
+строится при первом запросе. Сигналы обновляют только документы
+измененных объектов после коммита транзакции.
+"""
+import json
+import logging
+import re
+import unicodedata
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Count
+from django.urls import NoReverseMatch, reverse
+from django.utils import translation
+from taggit.models import Tag, TaggedItem
+
+from blog.models import BlogPost, Category
+from tours.models import Tour, TourCategory
+
+logger = logging.getLogger("core.autocomplete")
+
+AUTOCOMPLETE_LIMIT = 8
+MIN_PREFIX_LENGTH = 2
+MAX_PREFIX_LENGTH = 15
+
+# Кандидатов на префикс - с запасом для фильтра многословных запросов
+CANDIDATES = 50
+
+KEY_PREFIX = "autocomplete"
+
+_NON_WORD = re.compile(r"[^\w]+")
+
+
+def _languages():
+    return [code for code, _name in settings.LANGUAGES]
+
+
+def normalize(text):
+    """'Côte d'Azur' -> 'cote d azur'"""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return _NON_WORD.sub(" ", text.lower()).strip()
+
+
+def tokenize(text):
+    return normalize(text).split()
+
+
+def label_prefixes(label):
+    """Префиксы всех слов заголовка"""
+    return {
+        token[:length]
+        for token in tokenize(label)
+        for length in range(MIN_PREFIX_LENGTH, min(len(token), MAX_PREFIX_LENGTH) + 1)
+    }
+
+
+def _matches(label, query_tokens):
+    """Каждое слово запроса - префикс какого-то слова заголовка"""
+    label_tokens = tokenize(label)
+    return all(
+        any(token.startswith(query_token) for token in label_tokens)
+        for query_token in query_tokens
+    )
+
+
+# --- Документы --------------------------------------------------------------
+
+
+def _url(obj):
+    try:
+        return obj.get_absolute_url()
+    except NoReverseMatch:
+        return None
+
+
+def _translated_docs(kind, objects, field, score):
+    """Документ объекта на каждом языке сайта (с откатом на любой перевод)"""
+    for obj in objects:
+        docs = {}
+        for language in _languages():
+            with translation.override(language):
+                obj.set_current_language(language)
+                label = obj.safe_translation_getter(field, any_language=True)
+                if label:
+                    docs[language] = {"label": label, "url": _url(obj)}
+        yield f"{kind}:{obj.pk}", docs, score(obj)
+
+
+def _post_docs(ids):
+    posts = BlogPost.objects.filter(status="published").prefetch_related("translations")
+    if ids is not None:
+        posts = posts.filter(pk__in=ids)
+    return _translated_docs("post", posts, "title", lambda post: post.views_count)
+
+
+def _tour_docs(ids):
+    tours = Tour.objects.filter(status="published").prefetch_related("translations")
+    if ids is not None:
+        tours = tours.filter(pk__in=ids)
+    return _translated_docs(
+        "tour",
+        tours,
+        "title",
+        lambda tour: tour.views_count + 10 * tour.booking_count + (1000 if tour.is_featured else 0),
+    )
+
+
+def _blog_category_docs(ids):
+    categories = Category.objects.filter(is_active=True).prefetch_related("translations")
+    if ids is not None:
+        categories = categories.filter(pk__in=ids)
+    return _translated_docs("blog_category", categories, "name", lambda category: 500)
+
+
+def _tour_category_docs(ids):
+    categories = TourCategory.objects.filter(is_active=True).prefetch_related("translations")
+    if ids is not None:
+        categories = categories.filter(pk__in=ids)
+    return _translated_docs("tour_category", categories, "name", lambda category: 500)
+
+
+def _tag_docs(ids):
+    """Теги опубликованных статей (ссылка на страницу тега блога)"""
+    usage = dict(
+        TaggedItem.objects.filter(
+            content_type=ContentType.objects.get_for_model(BlogPost),
+            object_id__in=BlogPost.objects.filter(status="published").values("pk"),
+        )
+        .values("tag_id")
+        .annotate(usage=Count("id"))
+        .values_list("tag_id", "usage")
+    )
+    tags = Tag.objects.filter(pk__in=usage)
+    if ids is not None:
+        tags = tags.filter(pk__in=ids)
+
+    for tag in tags:
+        docs = {}
+        for language in _languages():
+            with translation.override(language):
+                try:
+                    url = reverse("blog:tag", kwargs={"slug": tag.slug})
+                except NoReverseMatch:
+                    url = None
+            docs[language] = {"label": tag.name, "url": url}
+        yield f"tag:{tag.pk}", docs, usage[tag.pk]
+
+
+SOURCES = {
+    "post": _post_docs,
+    "tour": _tour_docs,
+    "blog_category": _blog_category_docs,
+    "tour_category": _tour_category_docs,
+    "tag": _tag_docs,
+}
+
+
+# --- Хранилища ---------------------------------------------------------------
+
+
+class RedisPrefixIndex:
+    """Индекс в Redis: ZSET на префикс, HASH документов, SET префиксов документа"""
+
+    # Общий для всех процессов - строится командой rebuild_autocomplete
+    built = True
+
+    def __init__(self, client):
+        self.client = client
+
+    def _prefix_key(self, language, prefix):
+        return f"{KEY_PREFIX}:{language}:p:{prefix}"
+
+    def _docs_key(self, language):
+        return f"{KEY_PREFIX}:{language}:docs"
+
+    def _terms_key(self, language, doc_id):
+        return f"{KEY_PREFIX}:{language}:terms:{doc_id}"
+
+    def replace(self, language, doc_id, doc, score=0):
+        terms_key = self._terms_key(language, doc_id)
+        old_prefixes = [
+            prefix.decode() if isinstance(prefix, bytes) else prefix
+            for prefix in self.client.smembers(terms_key)
+        ]
+
+        pipe = self.client.pipeline()
+        for prefix in old_prefixes:
+            pipe.zrem(self._prefix_key(language, prefix), doc_id)
+        pipe.delete(terms_key)
+        pipe.hdel(self._docs_key(language), doc_id)
+
+        if doc is not None:
+            prefixes = label_prefixes(doc["label"])
+            for prefix in prefixes:
+                pipe.zadd(self._prefix_key(language, prefix), {doc_id: score})
+            if prefixes:
+                pipe.sadd(terms_key, *prefixes)
+            pipe.hset(self._docs_key(language), doc_id, json.dumps(doc, ensure_ascii=False))
+        pipe.execute()
+
+    def search(self, language, prefix, count):
+        doc_ids = self.client.zrevrange(self._prefix_key(language, prefix), 0, count - 1)
+        if not doc_ids:
+            return []
+        payloads = self.client.hmget(self._docs_key(language), doc_ids)
+        return [json.loads(payload) for payload in payloads if payload]
+
+    def clear(self):
+        keys = list(self.client.scan_iter(match=f"{KEY_PREFIX}:*", count=1000))
+        for start in range(0, len(keys), 500):
+            self.client.delete(*keys[start:start + 500])
+
+
+class MemoryPrefixIndex:
+    """Тот же индекс в памяти процесса (разработка без Redis)"""
+
+    def __init__(self):
+        self.clear()
+
+    def replace(self, language, doc_id, doc, score=0):
+        prefixes = self.prefixes.setdefault(language, {})
+        for prefix in self.terms.pop((language, doc_id), ()):
+            prefixes.get(prefix, {}).pop(doc_id, None)
+        self.docs.setdefault(language, {}).pop(doc_id, None)
+
+        if doc is not None:
+            new_prefixes = label_prefixes(doc["label"])
+            for prefix in new_prefixes:
+                prefixes.setdefault(prefix, {})[doc_id] = score
+            self.terms[(language, doc_id)] = new_prefixes
+            self.docs[language][doc_id] = doc
+
+    def search(self, language, prefix, count):
+        scored = self.prefixes.get(language, {}).get(prefix, {})
+        doc_ids = sorted(scored, key=lambda doc_id: (-scored[doc_id], doc_id))[:count]
+        docs = self.docs.get(language, {})
+        return [docs[doc_id] for doc_id in doc_ids if doc_id in docs]
+
+    def clear(self):
+        self.prefixes = {}
+        self.docs = {}
+        self.terms = {}
+        self.built = False
+
+
+_index = None
+
+
+def get_index():
+    global _index
+    if _index is None:
+        backend = settings.CACHES.get("default", {}).get("BACKEND", "")
+        if backend.startswith("django_redis"):
+            from django_redis import get_redis_connection
+
+            _index = RedisPrefixIndex(get_redis_connection("default"))
+        else:
+            _index = MemoryPrefixIndex()
+    return _index
+
+
+# --- Построение и запросы -------------------------------------------------------
+
+
+def _store(index, doc_id, docs, score):
+    kind = doc_id.split(":", 1)[0]
+    for language in _languages():
+        doc = docs.get(language)
+        if doc is not None:
+            doc = {"type": kind, **doc}
+        index.replace(language, doc_id, doc, score)
+
+
+def rebuild_autocomplete_index():
+    """Полная перестройка индекса; возвращает количество документов"""
+    index = get_index()
+    index.clear()
+    count = 0
+    for source in SOURCES.values():
+        for doc_id, docs, score in source(None):
+            _store(index, doc_id, docs, score)
+            count += 1
+    if isinstance(index, MemoryPrefixIndex):
+        index.built = True
+    logger.info(f"🔤 Индекс автодополнения перестроен: {count} документов")
+    return count
+
+
+def update_autocomplete(kind, ids):
+    """Пересчитать документы объектов; неопубликованные и удаленные - убрать"""
+    index = get_index()
+    if not index.built:
+        # Индекс в памяти еще не построен - соберется целиком при запросе
+        return
+
+    ids = set(ids)
+    found = set()
+    for doc_id, docs, score in SOURCES[kind](ids):
+        _store(index, doc_id, docs, score)
+        found.add(int(doc_id.split(":", 1)[1]))
+
+    for missing in ids - found:
+        for language in _languages():
+            index.replace(language, f"{kind}:{missing}", None)
+
+
+def schedule_autocomplete_update(kind, ids):
+    """Обновить документы индекса после коммита транзакции"""
+    ids = {pk for pk in ids if pk is not None}
+    if not ids:
+        return
+
+    def update():
+        try:
+            update_autocomplete(kind, ids)
+        except Exception as e:
+            logger.error(f"❌ Ошибка обновления автодополнения {kind} {sorted(ids)}: {e}")
+
+    transaction.on_commit(update)
+
+
+def autocomplete(query, language, limit=AUTOCOMPLETE_LIMIT):
+    """Подсказки для запроса: [{'type', 'label', 'url'}, ...] по весу"""
+    query_tokens = tokenize(query)
+    if not query_tokens:
+        return []
+
+    # Ищем по самому длинному слову, остальные проверяем по заголовку
+    lookup = max(query_tokens, key=len)[:MAX_PREFIX_LENGTH]
+    if len(lookup) < MIN_PREFIX_LENGTH:
+        return []
+
+    index = get_index()
+    if not index.built:
+        rebuild_autocomplete_index()
+
+    candidates = index.search(language, lookup, CANDIDATES)
+    return [doc for doc in candidates if _matches(doc["label"], query_tokens)][:limit]
@@ -0,0 +1,228 @@
+# backend/core/derivatives.py
+"""
+Производные изображения (derivatives) для <picture>: все размеры в AVIF,
+WebP и JPEG, посчитанные один раз после загрузки.
+
+Генерацию выполняет воркер очереди изображений (конвейер "derivatives"
+в core.image_jobs), не запрос: featured image статьи - после
+оптимизации, изображения туров и галерей - сразу после загрузки.
+
+Имена вариантов строятся из sha256 исходного файла
+(derivatives/ab/abcdef0123456789-800w.webp), поэтому:
+
+- один и тот же контент под разными путями кодируется один раз;
+- файл варианта никогда не меняется (можно кэшировать навсегда).
+
+Манифест - в core.MediaFile исходного файла: content_hash, variants
+(ширина, высота и для каждого формата имя и размер в байтах) и blurhash
+для заглушки. Тег {% picture %} (core.templatetags.images) строит
+<picture> только по манифесту, без обращения к диску.
+"""
+import io
+import logging
+import math
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, features
+
+from .models import MediaFile
+
+logger = logging.getLogger("core.derivatives")
+
+DERIVATIVE_WIDTHS = getattr(settings, "IMAGE_DERIVATIVE_WIDTHS", (400, 800, 1200, 1600))
+DERIVATIVES_DIR = "derivatives"
+
+# (расширение, формат Pillow, MIME, параметры кодирования) - порядок <source>.
+# AVIF кодирует только Pillow >= 11.2 с libavif; без него варианты - WebP и JPEG
+DERIVATIVE_FORMATS = tuple(
+    entry
+    for entry in (
+        ("avif", "AVIF", "image/avif", {"quality": 50}),
+        ("webp", "WEBP", "image/webp", {"quality": 80, "method": 6}),
+        ("jpg", "JPEG", "image/jpeg", {"quality": 82, "optimize": True, "progressive": True}),
+    )
+    if entry[0] != "avif" or features.check("avif")
+)
+
+BLURHASH_COMPONENTS = (4, 3)
+
+
+def derivative_name(digest, width, extension):
+    return f"{DERIVATIVES_DIR}/{digest[:2]}/{digest[:16]}-{width}w.{extension}"
+
+
+def thumbnail_url(image, info=None, extension="webp"):
+    """URL самого маленького варианта из манифеста (миниатюры админки) или исходного файла"""
+    variants = getattr(info, "variants", None)
+    if variants and extension in variants[0]["formats"]:
+        return default_storage.url(variants[0]["formats"][extension]["name"])
+    return image.url
+
+
+def _widths(width):
+    """Ширины вариантов: стандартные меньше оригинала и сам оригинал (не шире максимума)"""
+    widths = {w for w in DERIVATIVE_WIDTHS if w < width}
+    widths.add(min(width, max(DERIVATIVE_WIDTHS)))
+    return sorted(widths)
+
+
+def _prepare(img, fmt):
+    """JPEG без прозрачности; AVIF/WebP сохраняют альфа-канал"""
+    if fmt == "JPEG":
+        if img.mode in ("RGBA", "LA"):
+            background = Image.new("RGB", img.size, (255, 255, 255))
+            background.paste(img, mask=img.split()[-1])
+            return background
+        return img.convert("RGB") if img.mode != "RGB" else img
+    if img.mode not in ("RGB", "RGBA"):
+        return img.convert("RGBA" if "A" in img.getbands() else "RGB")
+    return img
+
+
+def _encode(img, fmt, options):
+    buffer = io.BytesIO()
+    _prepare(img, fmt).save(buffer, fmt, **options)
+    return buffer.getvalue()
+
+
+# --- blurhash ----------------------------------------------------------------------
+
+_BASE83 = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~"
+
+
+def _base83(value, length):
+    return "".join(_BASE83[(value // 83 ** (length - i)) % 83] for i in range(1, length + 1))
+
+
+def _to_linear(value):
+    value = value / 255
+    return value / 12.92 if value <= 0.04045 else ((value + 0.055) / 1.055) ** 2.4
+
+
+def _to_srgb(value):
+    value = max(0.0, min(1.0, value))
+    if value <= 0.0031308:
+        return int(value * 12.92 * 255 + 0.5)
+    return int((1.055 * value ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def _sign_pow(value, exponent):
+    return math.copysign(abs(value) ** exponent, value)
+
+
+def blurhash(img, components=BLURHASH_COMPONENTS):
+    """Blurhash (https://blurha.sh) по уменьшенной до 32px копии изображения"""
+    cx, cy = components
+    small = _prepare(img, "JPEG").copy()
+    small.thumbnail((32, 32))
+    width, height = small.size
+    pixels = [tuple(_to_linear(channel) for channel in pixel) for pixel in small.getdata()]
+
+    factors = []
+    for j in range(cy):
+        for i in range(cx):
+            normalisation = 1 if i == 0 and j == 0 else 2
+            r = g = b = 0.0
+            for y in range(height):
+                basis_y = math.cos(math.pi * j * y / height)
+                for x in range(width):
+                    basis = normalisation * math.cos(math.pi * i * x / width) * basis_y
+                    pr, pg, pb = pixels[y * width + x]
+                    r += basis * pr
+                    g += basis * pg
+                    b += basis * pb
+            scale = 1 / (width * height)
+            factors.append((r * scale, g * scale, b * scale))
+
+    dc, ac = factors[0], factors[1:]
+    result = _base83((cx - 1) + (cy - 1) * 9, 1)
+    if ac:
+        actual_max = max(abs(value) for factor in ac for value in factor)
+        quantised_max = max(0, min(82, int(actual_max * 166 - 0.5)))
+        max_value = (quantised_max + 1) / 166
+        result += _base83(quantised_max, 1)
+    else:
+        max_value = 1
+        result += _base83(0, 1)
+    result += _base83((_to_srgb(dc[0]) << 16) + (_to_srgb(dc[1]) << 8) + _to_srgb(dc[2]), 4)
+    for factor in ac:
+        quantised = [
+            max(0, min(18, int(_sign_pow(value / max_value, 0.5) * 9 + 9.5))) for value in factor
+        ]
+        result += _base83(quantised[0] * 19 * 19 + quantised[1] * 19 + quantised[2], 2)
+    return result
+
+
+# --- генерация -------------------------------------------------------------------
+
+
+def encode_variants(img, digest, storage=default_storage):
+    """
+    Записать варианты img (уже повернутого по EXIF); без обращения к БД.
+    Возвращает (variants для манифеста, записано байт).
+    """
+    variants = []
+    written = 0
+    for width in _widths(img.width):
+        height = max(1, round(img.height * width / img.width))
+        resized = img if width == img.width else img.resize((width, height), Image.Resampling.LANCZOS)
+        formats = {}
+        for extension, fmt, mime, options in DERIVATIVE_FORMATS:
+            variant = derivative_name(digest, width, extension)
+            if storage.exists(variant):
+                size = storage.size(variant)
+            else:
+                data = _encode(resized, fmt, options)
+                storage.save(variant, ContentFile(data))
+                size = len(data)
+                written += size
+            formats[extension] = {"name": variant, "bytes": size, "type": mime}
+        variants.append({"width": width, "height": height, "formats": formats})
+    return variants, written
+
+
+def _copy_manifest(media, digest):
+    """Тот же контент уже обработан под другим путем - берем его манифест"""
+    source = (
+        MediaFile.objects.filter(content_hash=digest).exclude(variants=[]).exclude(pk=media.pk)
+        .only("variants", "blurhash").first()
+    )
+    if source is None:
+        return False
+    media.variants = source.variants
+    media.blurhash = source.blurhash
+    return True
+
+
+def generate_derivatives(name, storage=default_storage, digest=None):
+    """
+    Варианты файла name во всех размерах и форматах + манифест в MediaFile.
+    Уже существующие файлы вариантов не перекодируются.
+    """
+    from .image_jobs import file_hash
+
+    digest = digest or file_hash(name, storage)
+    media = MediaFile.objects.filter(path=name).first() or MediaFile(path=name)
+    if media.content_hash == digest and media.variants:
+        return {"width": media.width, "height": media.height, "variants": len(media.variants), "bytes": 0}
+
+    written = 0
+    with storage.open(name, "rb") as f, Image.open(f) as img:
+        media.format = img.format or media.format
+        img = ImageOps.exif_transpose(img)
+        img.load()
+        media.width, media.height = img.size
+        if not _copy_manifest(media, digest):
+            media.variants, written = encode_variants(img, digest, storage)
+            media.blurhash = blurhash(img)
+
+    media.content_hash = digest
+    media.exists = True
+    media.save()
+    logger.info(
+        f"🎞️ {name}: {len(media.variants)} размеров x {len(DERIVATIVE_FORMATS)} форматов, "
+        f"записано {written} bytes"
+    )
+    return {"width": media.width, "height": media.height, "variants": len(media.variants), "bytes": written}
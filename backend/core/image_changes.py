@@ -0,0 +1,132 @@
+# backend/core/image_changes.py
+"""
+Отслеживание изменений полей изображений (featured_image статей и туров).
+
+Имя файла, загруженное из БД, запоминается в from_db. При сохранении
+поле считается измененным, только если файл новый (загружен в этом
+запросе) или имя отличается от загруженного. Для таких полей считается
+отпечаток - sha256 и габариты (Image.open читает только заголовок) - и
+сравнивается с сохраненным в <поле>_hash. Тот же контент под другим
+именем остается измененным полем (новому пути нужны запись MediaFile и
+манифест вариантов), но попадает в _same_content_images: его не
+перекодируют, а манифест копируется с уже обработанного файла.
+
+Сохранение без смены изображения (в том числе save(update_fields=...))
+не читает файл, не пересчитывает хэш и не ставит заданий обработки.
+После обработки воркер (core.image_jobs) записывает в модели отпечаток
+результата (sync_image_fingerprints).
+"""
+import hashlib
+import logging
+
+from django.apps import apps
+from PIL import Image, UnidentifiedImageError
+
+logger = logging.getLogger("core.image_changes")
+
+# (модель, поле); у модели есть поля <поле>_hash, <поле>_width, <поле>_height
+TRACKED_IMAGE_FIELDS = [
+    ("blog.BlogPost", "featured_image"),
+    ("tours.Tour", "featured_image"),
+]
+
+
+def image_fingerprint(fieldfile):
+    """(sha256, ширина, высота) файла поля - новой загрузки или файла в хранилище"""
+    digest = hashlib.sha256()
+    committed = getattr(fieldfile, "_committed", True)
+    source = fieldfile.file if not committed else fieldfile.storage.open(fieldfile.name, "rb")
+    try:
+        source.seek(0)
+        for chunk in iter(lambda: source.read(1024 * 1024), b""):
+            digest.update(chunk)
+        source.seek(0)
+        try:
+            with Image.open(source) as img:
+                width, height = img.size
+        except (UnidentifiedImageError, OSError):
+            width = height = None
+        source.seek(0)
+    finally:
+        if committed:
+            source.close()
+    return digest.hexdigest(), width, height
+
+
+class ImageChangeTrackingMixin:
+    """
+    Миксин модели: tracked_image_fields - поля изображений. Модель хранит
+    отпечаток файла в <поле>_hash, <поле>_width и <поле>_height.
+    """
+    tracked_image_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_images = {
+            field: getattr(instance.__dict__.get(field), "name", instance.__dict__.get(field)) or ""
+            for field in cls.tracked_image_fields
+            if field in instance.__dict__
+        }
+        return instance
+
+    def _image_name_changed(self, field):
+        loaded = getattr(self, "_loaded_images", None)
+        if loaded is not None and field not in loaded and field not in self.__dict__:
+            # Поле было отложено (only/defer) и не присваивалось
+            return False
+        fieldfile = getattr(self, field)
+        if fieldfile and not getattr(fieldfile, "_committed", True):
+            return True
+        if loaded is None or field not in loaded:
+            # Новый объект (или поле присвоено после only/defer)
+            return bool(fieldfile)
+        return (fieldfile.name or "") != loaded[field]
+
+    def detect_image_changes(self):
+        """
+        Поля с новым файлом. Отпечаток измененных полей записывается в
+        модель (сохранится тем же save); поля, где под новым именем тот же
+        контент (sha256 совпадает), дополнительно попадают в
+        _same_content_images - перекодировать их не нужно.
+        """
+        changed = []
+        self._same_content_images = []
+        for field in self.tracked_image_fields:
+            if not self._image_name_changed(field):
+                continue
+            fieldfile = getattr(self, field)
+            if not fieldfile:
+                setattr(self, f"{field}_hash", "")
+                setattr(self, f"{field}_width", None)
+                setattr(self, f"{field}_height", None)
+                continue
+            try:
+                digest, width, height = image_fingerprint(fieldfile)
+            except (FileNotFoundError, OSError) as e:
+                logger.error(f"❌ Не удалось прочитать {fieldfile.name}: {e}")
+                changed.append(field)
+                continue
+            changed.append(field)
+            if digest == getattr(self, f"{field}_hash"):
+                logger.info(f"⏭️ {field}: тот же контент под новым именем, перекодирование не нужно")
+                self._same_content_images.append(field)
+                continue
+            setattr(self, f"{field}_hash", digest)
+            setattr(self, f"{field}_width", width)
+            setattr(self, f"{field}_height", height)
+        return changed
+
+    def remember_images(self):
+        """После сохранения текущие имена файлов - новая точка отсчета"""
+        self._loaded_images = {
+            field: getattr(self, field).name or "" for field in self.tracked_image_fields
+        }
+
+
+def sync_image_fingerprints(name, digest, width, height):
+    """Файл name перезаписан обработкой - обновить отпечаток во всех моделях"""
+    for model_label, field in TRACKED_IMAGE_FIELDS:
+        apps.get_model(model_label).objects.filter(**{field: name}).update(
+            **{f"{field}_hash": digest, f"{field}_width": width, f"{field}_height": height}
+        )
@@ -0,0 +1,232 @@
+# backend/core/image_jobs.py
+"""
+Фоновая обработка загруженных изображений.
+
+Сохранение модели в админке не трогает пиксели: после коммита ставится
+задание в таблицу ImageJob (schedule_image_job) и запрос сразу
+возвращается. Задания выполняет команда process_image_jobs (воркер
+image-worker в docker-compose): пачка заданий забирается коротким
+select_for_update(skip_locked) и помечается processing, сама обработка
+идет уже вне транзакции.
+
+Идемпотентность - по хэшу содержимого. Перед обработкой считается
+sha256 файла:
+
+- совпал с result_hash задания этого пути (или любого задания того же
+  конвейера) - на диске уже обработанный файл, задание завершается без
+  перекодирования;
+- иначе файл обрабатывается, новый хэш сохраняется в result_hash.
+
+Поэтому повторное сохранение статьи, повторная постановка или второй
+воркер не перекодируют JPEG еще раз (качество не деградирует).
+
+Конвейеры "на месте" (IN_PLACE_PIPELINES) перезаписывают сам файл;
+после них для того же пути ставится задание derivatives - варианты для
+<picture> (core.derivatives) строятся уже из оптимизированного файла.
+
+Зависшие в processing задания (упавший воркер) через STALE_AFTER
+снова берутся в работу; после MAX_ATTEMPTS ошибок задание - failed.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+import traceback
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from PIL import Image
+
+from .image_changes import sync_image_fingerprints
+from .media_health import record_media
+from .models import ImageJob
+
+logger = logging.getLogger("core.image_jobs")
+
+BATCH_SIZE = 10
+MAX_ATTEMPTS = 3
+STALE_AFTER = timedelta(minutes=15)
+
+# Featured image статей: не шире 1200px, JPEG q85
+FEATURED_MAX_WIDTH = 1200
+FEATURED_QUALITY = 85
+
+
+def file_hash(name, storage=default_storage):
+    digest = hashlib.sha256()
+    with storage.open(name, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _flatten(img):
+    """RGB без прозрачности (прозрачное - на белом фоне)"""
+    if img.mode in ("RGBA", "LA"):
+        background = Image.new("RGB", img.size, (255, 255, 255))
+        background.paste(img, mask=img.split()[-1])
+        return background
+    if img.mode != "RGB":
+        return img.convert("RGB")
+    return img
+
+
+def optimize_featured(name, storage=default_storage):
+    """
+    RGB, ширина не больше FEATURED_MAX_WIDTH, JPEG с optimize=True.
+    Файл заменяется атомарно (временный файл в том же каталоге).
+    """
+    path = storage.path(name)
+    original_size = os.path.getsize(path)
+    with Image.open(path) as img:
+        img.load()
+        processed = _flatten(img)
+    if processed.width > FEATURED_MAX_WIDTH:
+        height = int(processed.height * FEATURED_MAX_WIDTH / processed.width)
+        processed = processed.resize((FEATURED_MAX_WIDTH, height), Image.Resampling.LANCZOS)
+
+    fd, temp_path = tempfile.mkstemp(suffix=".jpg", dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "wb") as temp_file:
+            processed.save(temp_file, "JPEG", quality=FEATURED_QUALITY, optimize=True)
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+
+    size = os.path.getsize(path)
+    logger.info(
+        f"🖼️ {name}: {processed.width}x{processed.height}, {original_size} -> {size} bytes"
+    )
+    return {
+        "original_size": original_size,
+        "size": size,
+        "width": processed.width,
+        "height": processed.height,
+    }
+
+
+def build_derivatives(name, storage=default_storage):
+    from .derivatives import generate_derivatives
+
+    return generate_derivatives(name, storage)
+
+
+PIPELINES = {
+    "featured": optimize_featured,
+    "derivatives": build_derivatives,
+}
+
+# Перезаписывают исходный файл; затем - задание DERIVATIVES_PIPELINE
+IN_PLACE_PIPELINES = {"featured"}
+DERIVATIVES_PIPELINE = "derivatives"
+
+
+def enqueue_image_job(name, pipeline="featured"):
+    """Поставить (или вернуть в очередь) задание для файла name"""
+    job, created = ImageJob.objects.get_or_create(pipeline=pipeline, path=name)
+    if not created and job.status != ImageJob.STATUS_PENDING:
+        ImageJob.objects.filter(pk=job.pk).update(status=ImageJob.STATUS_PENDING, attempts=0, error="")
+    return job
+
+
+def schedule_image_job(image, pipeline="featured"):
+    """enqueue_image_job после коммита транзакции (image - FieldFile или имя)"""
+    name = getattr(image, "name", image)
+    if not name:
+        return
+
+    def enqueue():
+        try:
+            enqueue_image_job(name, pipeline)
+        except Exception as e:
+            logger.error(f"❌ Не удалось поставить задание {pipeline} для {name}: {e}")
+
+    transaction.on_commit(enqueue)
+
+
+def claim_jobs(limit=BATCH_SIZE):
+    """Забрать пачку заданий: pending и зависшие processing"""
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            ImageJob.objects.filter(
+                Q(status=ImageJob.STATUS_PENDING)
+                | Q(status=ImageJob.STATUS_PROCESSING, started_at__lt=now - STALE_AFTER)
+            )
+            .select_for_update(skip_locked=True)
+            .order_by("id")[:limit]
+        )
+        ImageJob.objects.filter(pk__in=[job.pk for job in jobs]).update(
+            status=ImageJob.STATUS_PROCESSING, started_at=now
+        )
+    return jobs
+
+
+def _already_processed(job, digest):
+    if job.result_hash == digest:
+        return True
+    if job.pipeline not in IN_PLACE_PIPELINES:
+        # Результат хранится по пути (манифест MediaFile) - чужое задание не в счет
+        return False
+    return ImageJob.objects.filter(
+        pipeline=job.pipeline, status=ImageJob.STATUS_DONE, result_hash=digest
+    ).exists()
+
+
+def _chain_derivatives(job):
+    """После конвейера "на месте" - варианты из итогового файла"""
+    if job.pipeline in IN_PLACE_PIPELINES:
+        enqueue_image_job(job.path, DERIVATIVES_PIPELINE)
+
+
+def run_job(job, storage=default_storage):
+    """Выполнить одно задание; возвращает True, если файл перекодирован"""
+    job.attempts += 1
+    try:
+        if not storage.exists(job.path):
+            raise FileNotFoundError(job.path)
+        digest = file_hash(job.path, storage)
+        if _already_processed(job, digest):
+            job.status = ImageJob.STATUS_DONE
+            job.finished_at = timezone.now()
+            job.error = ""
+            job.save(update_fields=["status", "attempts", "error", "finished_at"])
+            logger.info(f"⏭️ {job.path} уже обработан ({job.pipeline}), пропускаем")
+            _chain_derivatives(job)
+            return False
+
+        result = PIPELINES[job.pipeline](job.path, storage)
+        in_place = job.pipeline in IN_PLACE_PIPELINES
+        job.source_hash = digest
+        job.result_hash = file_hash(job.path, storage) if in_place else digest
+        job.result = result
+        job.status = ImageJob.STATUS_DONE
+        job.error = ""
+        job.finished_at = timezone.now()
+        job.save()
+        if in_place:
+            # Размер и габариты файла поменялись
+            record_media([job.path], storage)
+            sync_image_fingerprints(job.path, job.result_hash, result.get("width"), result.get("height"))
+            _chain_derivatives(job)
+        return True
+    except Exception as e:
+        job.error = f"{e}\n{traceback.format_exc()}"[:5000]
+        job.status = ImageJob.STATUS_FAILED if job.attempts >= MAX_ATTEMPTS else ImageJob.STATUS_PENDING
+        job.finished_at = timezone.now()
+        job.save(update_fields=["status", "attempts", "error", "finished_at"])
+        logger.error(f"❌ Ошибка обработки {job.path} ({job.pipeline}), попытка {job.attempts}: {e}")
+        return False
+
+
+def process_image_jobs(limit=BATCH_SIZE, storage=default_storage):
+    """Обработать пачку заданий; возвращает (взято, перекодировано)"""
+    jobs = claim_jobs(limit)
+    processed = sum(1 for job in jobs if run_job(job, storage))
+    if jobs:
+        logger.info(f"🖼️ Задания изображений: взято {len(jobs)}, перекодировано {processed}")
+    return len(jobs), processed
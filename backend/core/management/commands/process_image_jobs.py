@@ -0,0 +1,31 @@
+# backend/core/management/commands/process_image_jobs.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.image_jobs import BATCH_SIZE, process_image_jobs
+
+
+class Command(BaseCommand):
+    help = "Process queued image jobs (featured image optimization); idempotent by content hash"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Jobs per batch")
+        parser.add_argument("--loop", action="store_true", help="Keep polling the queue (worker mode)")
+        parser.add_argument("--interval", type=float, default=5, help="Seconds to sleep when the queue is empty")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        taken_total = processed_total = 0
+        while True:
+            taken, processed = process_image_jobs(batch_size)
+            taken_total += taken
+            processed_total += processed
+            if taken < batch_size:
+                if not options["loop"]:
+                    break
+                time.sleep(options["interval"])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"🖼️ Image jobs: {taken_total} taken, {processed_total} re-encoded"
+        ))
@@ -0,0 +1,29 @@
+# backend/core/management/commands/process_recompute_queue.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.recompute import BATCH_SIZE, HANDLERS, process_recompute_queue
+
+
+class Command(BaseCommand):
+    help = "Recompute related content and the related-tours graph for objects marked dirty on save"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Marks per handler and pass")
+        parser.add_argument("--loop", action="store_true", help="Keep polling the queue (worker mode)")
+        parser.add_argument("--interval", type=float, default=10, help="Seconds to sleep between passes")
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            processed = process_recompute_queue(options["batch_size"])
+            total += processed
+            if not processed:
+                if not options["loop"]:
+                    break
+                time.sleep(options["interval"])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"🔁 Recomputed {total} marked objects ({', '.join(HANDLERS) or 'no handlers'})"
+        ))
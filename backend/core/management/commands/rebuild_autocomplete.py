@@ -0,0 +1,13 @@
+# backend/core/management/commands/rebuild_autocomplete.py
+from django.core.management.base import BaseCommand
+
+from core.autocomplete import rebuild_autocomplete_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the search-as-you-type prefix index (posts, tours, categories, tags)"
+
+    def handle(self, *args, **options):
+        self.stdout.write("🔤 Rebuilding autocomplete index...")
+        count = rebuild_autocomplete_index()
+        self.stdout.write(self.style.SUCCESS(f"✅ Indexed {count} documents"))
@@ -0,0 +1,29 @@
+# backend/core/management/commands/rebuild_search_index.py
+from django.core.management.base import BaseCommand
+
+from blog.models import BlogPost
+from blog.search import update_post_search_vectors
+from core.search import search_enabled
+from tours.models import Tour
+from tours.search import update_tour_search_vectors
+
+
+class Command(BaseCommand):
+    help = "Rebuild full-text search vectors for blog posts and tours in all languages"
+
+    def handle(self, *args, **options):
+        if not search_enabled():
+            self.stdout.write(self.style.WARNING("⚠️  Full-text search requires PostgreSQL, nothing to do"))
+            return
+
+        self.stdout.write("🔍 Rebuilding search index...")
+
+        post_ids = list(BlogPost.objects.values_list("pk", flat=True))
+        tour_ids = list(Tour.objects.values_list("pk", flat=True))
+
+        update_post_search_vectors(post_ids)
+        update_tour_search_vectors(tour_ids)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"✅ Indexed {len(post_ids)} blog posts and {len(tour_ids)} tours")
+        )
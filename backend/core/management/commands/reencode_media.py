@@ -0,0 +1,70 @@
+# backend/core/management/commands/reencode_media.py
+from django.core.management.base import BaseCommand
+
+from core.media_health import UPLOAD_DIRS
+from core.reencode import MAX_WIDTH, reencode_media
+
+
+def _size(value):
+    if abs(value) < 1024:
+        return f"{value} B"
+    for unit in ("KB", "MB", "GB"):
+        value /= 1024
+        if abs(value) < 1024 or unit == "GB":
+            return f"{value:.1f} {unit}"
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-encode existing uploads under MEDIA_ROOT in parallel (one process per core); "
+        "resumable via the MediaReencode progress table"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dir", dest="directories", action="append",
+            help=f"Directory under MEDIA_ROOT (repeatable, default: {', '.join(UPLOAD_DIRS)})",
+        )
+        parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+        parser.add_argument("--dry-run", action="store_true", help="Encode in memory only and estimate savings")
+        parser.add_argument("--derivatives", action="store_true", help="Also build AVIF/WebP/JPEG derivatives")
+        parser.add_argument("--force", action="store_true", help="Ignore recorded progress and process every file")
+        parser.add_argument("--max-width", type=int, default=MAX_WIDTH, help="Downscale wider images")
+        parser.add_argument("--limit", type=int, default=None, help="Process at most N files")
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+        verbosity = options["verbosity"]
+
+        def progress(result):
+            if result["error"]:
+                self.stdout.write(self.style.ERROR(f"  ❌ {result['name']}: {result['error']}"))
+            elif result["reencoded"] and verbosity > 1:
+                self.stdout.write(
+                    f"  🗜️ {result['name']}: {_size(result['original_size'])} -> {_size(result['size'])}"
+                )
+
+        stats = reencode_media(
+            directories=options["directories"] or UPLOAD_DIRS,
+            workers=options["workers"],
+            dry_run=dry_run,
+            derivatives=options["derivatives"],
+            force=options["force"],
+            max_width=options["max_width"],
+            limit=options["limit"],
+            progress=progress,
+        )
+
+        prefix = "🔍 Dry run" if dry_run else "🗜️ Re-encode"
+        self.stdout.write(
+            f"{prefix}: {stats['scanned']} files scanned, {stats['skipped']} already done, "
+            f"{stats['reencoded']} re-encoded, {stats['unchanged']} unchanged, {stats['failed']} failed"
+        )
+        saved_percent = stats["saved"] * 100 / stats["original_bytes"] if stats["original_bytes"] else 0
+        verb = "would save" if dry_run else "saved"
+        self.stdout.write(self.style.SUCCESS(
+            f"💾 {_size(stats['original_bytes'])} -> {_size(stats['bytes'])}, "
+            f"{verb} {_size(stats['saved'])} ({saved_percent:.1f}%)"
+        ))
+        if stats["derivatives_bytes"]:
+            self.stdout.write(f"🎞️ Derivatives written: {_size(stats['derivatives_bytes'])}")
@@ -0,0 +1,25 @@
+# backend/core/management/commands/warm_url_cache.py
+from django.core.management.base import BaseCommand
+
+from blog.models import BlogPost
+from core.url_cache import warm_absolute_urls
+from tours.models import Tour
+
+
+class Command(BaseCommand):
+    help = "Precompute get_absolute_url paths for tours and blog posts in all languages"
+
+    def handle(self, *args, **options):
+        self.stdout.write("🔗 Warming URL cache...")
+
+        tours = Tour.objects.prefetch_related("translations")
+        posts = BlogPost.objects.prefetch_related("translations")
+
+        tour_count = warm_absolute_urls(tours)
+        post_count = warm_absolute_urls(posts)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ Cached {tour_count} tour paths and {post_count} blog post paths"
+            )
+        )
@@ -0,0 +1,276 @@
+# backend/core/media_health.py
+"""
+Состояние медиафайлов (изображения статей и туров).
+
+Наличие файла, размер, габариты, формат, цветовой режим и преобладающий
+цвет изображения читаются с диска один раз -
+после загрузки (сигналы) или периодическим сканером (команда check_media) -
+и хранятся в таблице MediaFile. Страницы и админка берут эти данные из БД
+и не обращаются к файловой системе. Об отсутствующих файлах сообщает
+сканер, а не логи запросов.
+"""
+import logging
+import os
+import re
+
+from django.apps import apps
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image, UnidentifiedImageError
+
+from .models import MediaFile
+
+logger = logging.getLogger("core.media_health")
+
+# (модель, поле) с изображениями, которые проверяет сканер
+IMAGE_FIELDS = [
+    ("blog.BlogPost", "featured_image"),
+    ("blog.BlogImage", "image"),
+    ("tours.Tour", "featured_image"),
+    ("tours.TourImage", "image"),
+]
+
+
+# Загрузки с изображениями в MEDIA_ROOT (uploads - CKEditor)
+UPLOAD_DIRS = ["blog/featured", "blog/images", "tours/featured", "tours/gallery", "uploads"]
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".gif"}
+# Миниатюры easy_thumbnails рядом с оригиналом: a.jpg.800x0_q85.webp
+THUMBNAIL_NAME = re.compile(r"\.(jpe?g|png|webp|gif)\.[^/]*\d+x\d+[^/]*$", re.IGNORECASE)
+
+
+def _storage_path(name, storage):
+    try:
+        return storage.path(name)
+    except NotImplementedError:
+        return None
+
+
+def dominant_color(img, colors=5):
+    """Преобладающий цвет (#rrggbb) по копии не больше 64px"""
+    # JPEG декодируется сразу в уменьшенном масштабе
+    img.draft("RGB", (64, 64))
+    if img.mode in ("RGBA", "LA", "PA") or (img.mode == "P" and "transparency" in img.info):
+        rgba = img.convert("RGBA")
+        small = Image.new("RGB", rgba.size, (255, 255, 255))
+        small.paste(rgba, mask=rgba.getchannel("A"))
+    else:
+        small = img.convert("RGB")
+    small.thumbnail((64, 64))
+    palette = small.quantize(colors=colors)
+    _count, index = max(palette.getcolors())
+    red, green, blue = palette.getpalette()[index * 3:index * 3 + 3]
+    return f"#{red:02x}{green:02x}{blue:02x}"
+
+
+def inspect_file(name, storage=default_storage):
+    """Прочитать состояние файла с диска: наличие, размер, габариты"""
+    info = {
+        "exists": False,
+        "size": None,
+        "mtime": None,
+        "width": None,
+        "height": None,
+        "format": "",
+        "mode": "",
+        "dominant_color": "",
+        "error": "",
+    }
+    path = _storage_path(name, storage)
+
+    try:
+        if path is not None:
+            stat = os.stat(path)
+            info["size"] = stat.st_size
+            info["mtime"] = stat.st_mtime
+        elif storage.exists(name):
+            info["size"] = storage.size(name)
+        else:
+            raise FileNotFoundError(name)
+    except FileNotFoundError:
+        return info
+    except OSError as e:
+        info["error"] = str(e)[:255]
+        return info
+
+    info["exists"] = True
+    try:
+        # Image.open читает только заголовок; пиксели - только уменьшенная копия для цвета
+        with storage.open(name, "rb") as f, Image.open(f) as img:
+            info["width"], info["height"] = img.size
+            info["format"] = img.format or ""
+            info["mode"] = img.mode
+            try:
+                info["dominant_color"] = dominant_color(img)
+            except (OSError, ValueError) as e:
+                logger.warning(f"⚠️ Не удалось определить цвет {name}: {e}")
+    except (UnidentifiedImageError, OSError) as e:
+        info["error"] = str(e)[:255]
+    return info
+
+
+def _apply(media, info, now):
+    was_missing = media.pk is not None and not media.exists
+    for field, value in info.items():
+        setattr(media, field, value)
+    if info["exists"]:
+        media.missing_since = None
+    elif media.missing_since is None:
+        media.missing_since = now
+    return was_missing
+
+
+def record_media(names, storage=default_storage):
+    """Записать состояние файлов names; возвращает {name: MediaFile}"""
+    names = {name for name in names if name}
+    if not names:
+        return {}
+
+    existing = MediaFile.objects.in_bulk(names, field_name="path")
+    now = timezone.now()
+    recorded = {}
+    for name in names:
+        media = existing.get(name) or MediaFile(path=name)
+        _apply(media, inspect_file(name, storage), now)
+        media.save()
+        recorded[name] = media
+    return recorded
+
+
+def schedule_media_record(*files):
+    """
+    Записать метаданные новых файлов после коммита транзакции.
+
+    Загрузка всегда дает новое имя в хранилище, поэтому уже известные
+    пути пропускаются (их перезапись заметит сканер по mtime).
+    """
+    names = {getattr(f, "name", f) for f in files if f}
+    names.discard(None)
+    names.discard("")
+    if not names:
+        return
+
+    def record():
+        try:
+            known = set(
+                MediaFile.objects.filter(path__in=names).values_list("path", flat=True)
+            )
+            record_media(names - known)
+        except Exception as e:
+            logger.error(f"❌ Ошибка записи метаданных файлов {sorted(names)}: {e}")
+
+    transaction.on_commit(record)
+
+
+def media_info(names):
+    """{name: MediaFile} одним запросом - для views и админки"""
+    names = {getattr(name, "name", name) for name in names}
+    names.discard(None)
+    names.discard("")
+    if not names:
+        return {}
+    return MediaFile.objects.in_bulk(names, field_name="path")
+
+
+def attach_media_info(objects, field="featured_image", attr=None):
+    """
+    objects[i].<attr> = MediaFile файла поля (или None) - одним запросом.
+    По умолчанию attr = "<field>_info"; тег {% picture %} строит по нему <picture>.
+    """
+    attr = attr or f"{field}_info"
+    images = media_info(getattr(obj, field) for obj in objects)
+    for obj in objects:
+        setattr(obj, attr, images.get(getattr(obj, field).name))
+    return objects
+
+
+def referenced_media():
+    """Имена всех файлов, на которые ссылаются поля изображений"""
+    names = set()
+    for model_label, field in IMAGE_FIELDS:
+        model = apps.get_model(model_label)
+        names.update(
+            model.objects.exclude(**{field: ""})
+            .exclude(**{f"{field}__isnull": True})
+            .values_list(field, flat=True)
+        )
+    return names
+
+
+def walk_media(directories=UPLOAD_DIRS, storage=default_storage):
+    """
+    Оригиналы изображений в каталогах directories: (имя, размер, mtime).
+    Миниатюры easy_thumbnails и производные (core.derivatives) пропускаются.
+    """
+    base = _storage_path("", storage)
+    for directory in directories:
+        root = _storage_path(directory, storage)
+        if root is None or not os.path.isdir(root):
+            continue
+        for dirpath, _dirnames, filenames in os.walk(root):
+            for filename in sorted(filenames):
+                if os.path.splitext(filename)[1].lower() not in IMAGE_EXTENSIONS:
+                    continue
+                if THUMBNAIL_NAME.search(filename):
+                    continue
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                name = os.path.relpath(path, base).replace(os.sep, "/")
+                yield name, stat.st_size, stat.st_mtime
+
+
+def scan_media(full=False, storage=default_storage):
+    """
+    Проверить все файлы, на которые ссылаются модели.
+
+    Файл перечитывается, только если у него поменялись размер или время
+    изменения (или full=True). Возвращает статистику и список отсутствующих.
+    """
+    names = referenced_media()
+    existing = MediaFile.objects.in_bulk(names, field_name="path")
+    now = timezone.now()
+    stats = {"checked": 0, "updated": 0, "missing": [], "recovered": [], "unreadable": []}
+
+    for name in sorted(names):
+        stats["checked"] += 1
+        media = existing.get(name)
+        path = _storage_path(name, storage)
+
+        if media is not None and media.exists and not full and path is not None:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                stat = None
+            # Записи без режима - до появления полей метаданных, их дочитываем
+            if (
+                stat and stat.st_size == media.size and stat.st_mtime == media.mtime
+                and (media.mode or media.error)
+            ):
+                if media.error:
+                    stats["unreadable"].append(name)
+                continue
+
+        media = media or MediaFile(path=name)
+        was_missing = _apply(media, inspect_file(name, storage), now)
+        media.save()
+        stats["updated"] += 1
+
+        if not media.exists:
+            stats["missing"].append(name)
+        elif was_missing:
+            stats["recovered"].append(name)
+        if media.exists and media.error:
+            stats["unreadable"].append(name)
+
+    for name in stats["missing"]:
+        logger.error(f"❌ Файл отсутствует: {name}")
+    for name in stats["recovered"]:
+        logger.info(f"✅ Файл снова на месте: {name}")
+    logger.info(
+        f"🩺 Проверка медиа: {stats['checked']} файлов, обновлено {stats['updated']}, "
+        f"отсутствует {len(stats['missing'])}"
+    )
+    return stats
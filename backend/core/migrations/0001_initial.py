@@ -0,0 +1,36 @@
+# Generated by Django 4.2.11 on 2026-10-19 06:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(help_text='Storage name relative to MEDIA_ROOT', max_length=500, unique=True)),
+                ('exists', models.BooleanField(default=True)),
+                ('size', models.PositiveBigIntegerField(blank=True, help_text='File size in bytes', null=True)),
+                ('mtime', models.FloatField(blank=True, help_text='Modification time at last check', null=True)),
+                ('width', models.PositiveIntegerField(blank=True, null=True)),
+                ('height', models.PositiveIntegerField(blank=True, null=True)),
+                ('format', models.CharField(blank=True, max_length=20)),
+                ('error', models.CharField(blank=True, help_text='Why the file could not be read', max_length=255)),
+                ('missing_since', models.DateTimeField(blank=True, null=True)),
+                ('checked_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Media File',
+                'verbose_name_plural': 'Media Files',
+                'ordering': ['path'],
+                'indexes': [models.Index(fields=['exists', 'path'], name='core_mediaf_exists_bb7ad7_idx')],
+            },
+        ),
+    ]
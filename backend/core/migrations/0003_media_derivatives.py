@@ -0,0 +1,28 @@
+# Generated by Django 4.2.11 on 2026-10-19 07:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_image_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mediafile',
+            name='blurhash',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='mediafile',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, help_text='sha256 of the source the variants were built from', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='mediafile',
+            name='variants',
+            field=models.JSONField(blank=True, default=list, help_text='[{width, height, formats: {avif|webp|jpg: {name, bytes, type}}}]'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.11 on 2026-10-19 07:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_media_derivatives'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaReencode',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(help_text='Storage name relative to MEDIA_ROOT', max_length=500, unique=True)),
+                ('mtime', models.FloatField(help_text='Modification time after processing')),
+                ('status', models.CharField(choices=[('reencoded', 'Re-encoded'), ('unchanged', 'Unchanged'), ('failed', 'Failed')], max_length=20)),
+                ('original_size', models.PositiveBigIntegerField(default=0)),
+                ('size', models.PositiveBigIntegerField(default=0)),
+                ('derivatives_size', models.PositiveBigIntegerField(default=0, help_text='Bytes written for derivatives')),
+                ('error', models.TextField(blank=True)),
+                ('processed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Media Re-encode',
+                'verbose_name_plural': 'Media Re-encodes',
+                'ordering': ['path'],
+            },
+        ),
+    ]
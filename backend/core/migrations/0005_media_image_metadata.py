@@ -0,0 +1,23 @@
+# Generated by Django 4.2.11 on 2026-10-19 07:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_media_reencode'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mediafile',
+            name='dominant_color',
+            field=models.CharField(blank=True, help_text='#rrggbb', max_length=7),
+        ),
+        migrations.AddField(
+            model_name='mediafile',
+            name='mode',
+            field=models.CharField(blank=True, help_text='PIL color mode (RGB, RGBA, P, ...)', max_length=10),
+        ),
+    ]
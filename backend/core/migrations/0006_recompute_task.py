@@ -0,0 +1,30 @@
+# Generated by Django 4.2.11 on 2026-10-19 07:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_media_image_metadata'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecomputeTask',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=50)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Recompute Task',
+                'verbose_name_plural': 'Recompute Tasks',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='recomputetask',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id'), name='core_recompute_kind_object'),
+        ),
+    ]
@@ -0,0 +1,174 @@
+# backend/core/models.py
+import math
+
+from django.db import models
+
+
+class MediaFile(models.Model):
+    """
+    Метаданные файла из MEDIA_ROOT.
+
+    Заполняются при загрузке изображения и сканером check_media, поэтому
+    views и админка получают размеры и наличие файла без обращения к диску.
+    """
+    path = models.CharField(max_length=500, unique=True, help_text="Storage name relative to MEDIA_ROOT")
+    exists = models.BooleanField(default=True)
+    size = models.PositiveBigIntegerField(null=True, blank=True, help_text="File size in bytes")
+    mtime = models.FloatField(null=True, blank=True, help_text="Modification time at last check")
+    
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    format = models.CharField(max_length=20, blank=True)
+    mode = models.CharField(max_length=10, blank=True, help_text="PIL color mode (RGB, RGBA, P, ...)")
+    dominant_color = models.CharField(max_length=7, blank=True, help_text="#rrggbb")
+    error = models.CharField(max_length=255, blank=True, help_text="Why the file could not be read")
+    
+    # Манифест производных изображений (core.derivatives)
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True, help_text="sha256 of the source the variants were built from")
+    variants = models.JSONField(default=list, blank=True, help_text="[{width, height, formats: {avif|webp|jpg: {name, bytes, type}}}]")
+    blurhash = models.CharField(max_length=100, blank=True)
+    
+    missing_since = models.DateTimeField(null=True, blank=True)
+    checked_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = "Media File"
+        verbose_name_plural = "Media Files"
+        ordering = ['path']
+        indexes = [
+            models.Index(fields=['exists', 'path']),
+        ]
+    
+    def __str__(self):
+        return self.path
+    
+    @property
+    def dimensions(self):
+        if self.width and self.height:
+            return f"{self.width}x{self.height}"
+        return ""
+    
+    @property
+    def aspect_ratio(self):
+        if not (self.width and self.height):
+            return ""
+        gcd = math.gcd(self.width, self.height)
+        return f"{self.width // gcd}:{self.height // gcd}"
+    
+    @property
+    def variants_bytes(self):
+        return sum(
+            variant["bytes"] for entry in self.variants for variant in entry["formats"].values()
+        )
+
+
+class ImageJob(models.Model):
+    """
+    Задание фоновой обработки изображения (очередь - эта таблица).
+
+    Одна строка на (pipeline, path). source_hash - хэш файла до обработки,
+    result_hash - после: если на диске уже результат, повторное задание
+    завершается без перекодирования (см. core.image_jobs).
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_PROCESSING = 'processing'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_PROCESSING, 'Processing'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+    
+    pipeline = models.CharField(max_length=50)
+    path = models.CharField(max_length=500, help_text="Storage name relative to MEDIA_ROOT")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    
+    source_hash = models.CharField(max_length=64, blank=True, db_index=True)
+    result_hash = models.CharField(max_length=64, blank=True, db_index=True)
+    result = models.JSONField(default=dict, blank=True)
+    
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        verbose_name = "Image Job"
+        verbose_name_plural = "Image Jobs"
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['pipeline', 'path'], name='core_imagejob_pipeline_path'),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'id'], name='core_imagejob_queue_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.pipeline}: {self.path} ({self.status})"
+
+
+class RecomputeTask(models.Model):
+    """
+    Объект, чьи производные данные (похожий контент, граф туров) устарели.
+
+    Сохранение в запросе только добавляет строку (kind, object_id) в этой же
+    транзакции; пересчет пачкой делает воркер process_recompute_queue
+    (см. core.recompute). Повторная отметка того же объекта не дублируется.
+    """
+    kind = models.CharField(max_length=50)
+    object_id = models.PositiveBigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = "Recompute Task"
+        verbose_name_plural = "Recompute Tasks"
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='core_recompute_kind_object'),
+        ]
+    
+    def __str__(self):
+        return f"{self.kind}: {self.object_id}"
+
+
+class MediaReencode(models.Model):
+    """
+    Прогресс массового перекодирования (команда reencode_media).
+
+    Ключ - путь и mtime файла: файл с тем же mtime при повторном запуске
+    пропускается, измененный после обработки - обрабатывается заново.
+    """
+    STATUS_REENCODED = 'reencoded'
+    STATUS_UNCHANGED = 'unchanged'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_REENCODED, 'Re-encoded'),
+        (STATUS_UNCHANGED, 'Unchanged'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+    
+    path = models.CharField(max_length=500, unique=True, help_text="Storage name relative to MEDIA_ROOT")
+    mtime = models.FloatField(help_text="Modification time after processing")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES)
+    
+    original_size = models.PositiveBigIntegerField(default=0)
+    size = models.PositiveBigIntegerField(default=0)
+    derivatives_size = models.PositiveBigIntegerField(default=0, help_text="Bytes written for derivatives")
+    error = models.TextField(blank=True)
+    
+    processed_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = "Media Re-encode"
+        verbose_name_plural = "Media Re-encodes"
+        ordering = ['path']
+    
+    def __str__(self):
+        return f"{self.path} ({self.status})"
+    
+    @property
+    def saved(self):
+        return self.original_size - self.size
@@ -0,0 +1,343 @@
+# backend/core/pagination.py
+"""
+Keyset (курсорная) пагинация для списков статей и туров.
+
+Страница выбирается не через OFFSET, а условием по ключу сортировки
+последней показанной записи: (published_at, id) < (курсор). Поэтому любая
+страница - один запрос по индексу, без COUNT(*) и без просмотра всех
+предыдущих строк. В ссылках передается курсор (?after= / ?before=).
+
+Выдача поиска упорядочена по оценке релевантности (float), которую нельзя
+точно передать в курсоре, поэтому она листается OFFSET пагинацией
+(OffsetPaginationMixin) с тем же интерфейсом страницы.
+
+Общее количество не нужно для навигации; если шаблону нужен итог, он
+считается приблизительно и кэшируется (approximate_total).
+"""
+import base64
+import json
+import logging
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from django.http import Http404, QueryDict
+from django.utils.dateparse import parse_date, parse_datetime
+
+logger = logging.getLogger("core.pagination")
+
+APPROXIMATE_TOTAL_TIMEOUT = getattr(settings, "KEYSET_TOTAL_CACHE_TIMEOUT", 60 * 10)
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def _parse_key(key):
+    """'-published_at' -> ('published_at', True)"""
+    return (key[1:], True) if key.startswith("-") else (key, False)
+
+
+def _dump(value):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"dec": str(value)}
+    return value
+
+
+def _load(value):
+    if isinstance(value, dict):
+        if "dt" in value:
+            return parse_datetime(value["dt"])
+        if "d" in value:
+            return parse_date(value["d"])
+        if "dec" in value:
+            return Decimal(value["dec"])
+    return value
+
+
+def encode_cursor(values):
+    payload = json.dumps([_dump(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor, size, fields=None):
+    """
+    Значения курсора; fields - поля ключей сортировки (to_python приводит
+    значения к их типам). Подделанный курсор - InvalidCursor (404), а не 500.
+    """
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(payload)
+        if not isinstance(values, list) or len(values) != size:
+            raise InvalidCursor(cursor)
+        values = [_load(value) for value in values]
+        if any(value is None or isinstance(value, (list, dict, bool)) for value in values):
+            raise InvalidCursor(cursor)
+        if fields:
+            values = [field.to_python(value) if field else value for field, value in zip(fields, values)]
+    except (ValueError, TypeError, InvalidOperation, ValidationError):
+        raise InvalidCursor(cursor)
+    if any(value is None for value in values):
+        raise InvalidCursor(cursor)
+    return values
+
+
+def key_fields(queryset, keys):
+    """Поля модели или аннотаций для ключей сортировки (None - неизвестно)"""
+    fields = []
+    for key in keys:
+        name = _parse_key(key)[0]
+        annotation = queryset.query.annotations.get(name)
+        if annotation is not None:
+            fields.append(annotation.output_field)
+            continue
+        try:
+            fields.append(queryset.model._meta.get_field(name))
+        except FieldDoesNotExist:
+            fields.append(None)
+    return fields
+
+
+def keyset_filter(keys, values, reverse=False):
+    """
+    Условие "строго после values" в порядке keys (лексикографически):
+    k1 > v1 OR (k1 = v1 AND k2 > v2) OR ... с учетом направления ключей.
+    """
+    condition = Q()
+    equal = Q()
+    for key, value in zip(keys, values):
+        field, descending = _parse_key(key)
+        if descending != reverse:
+            step = Q(**{f"{field}__lt": value})
+        else:
+            step = Q(**{f"{field}__gt": value})
+        condition |= equal & step
+        equal &= Q(**{field: value})
+    return condition
+
+
+def _reverse_keys(keys):
+    return [key[1:] if key.startswith("-") else f"-{key}" for key in keys]
+
+
+class KeysetPage:
+    """Страница: объекты, курсоры соседних страниц, приблизительный итог"""
+
+    def __init__(self, object_list, keys, has_next, has_previous, params, total=None):
+        self.object_list = object_list
+        self.keys = keys
+        self.has_next_page = has_next
+        self.has_previous_page = has_previous
+        self.params = params if params is not None else QueryDict()
+        self.total = total
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.has_next_page
+
+    def has_previous(self):
+        return self.has_previous_page
+
+    def has_other_pages(self):
+        return self.has_next_page or self.has_previous_page
+
+    def _cursor(self, obj):
+        return encode_cursor([getattr(obj, _parse_key(key)[0]) for key in self.keys])
+
+    def _query(self, name, cursor):
+        params = self.params.copy()
+        for param in ("after", "before", "page"):
+            params.pop(param, None)
+        params[name] = cursor
+        return params.urlencode()
+
+    @property
+    def next_cursor(self):
+        if self.has_next_page and self.object_list:
+            return self._cursor(self.object_list[-1])
+        return None
+
+    @property
+    def previous_cursor(self):
+        if self.has_previous_page and self.object_list:
+            return self._cursor(self.object_list[0])
+        return None
+
+    @property
+    def next_query(self):
+        """Строка запроса следующей страницы (остальные GET параметры сохраняются)"""
+        cursor = self.next_cursor
+        return self._query("after", cursor) if cursor else ""
+
+    @property
+    def previous_query(self):
+        cursor = self.previous_cursor
+        return self._query("before", cursor) if cursor else ""
+
+
+class OffsetPage(KeysetPage):
+    """Страница OFFSET пагинации с тем же интерфейсом для шаблона (?page=N)"""
+
+    def __init__(self, object_list, number, has_next, params):
+        super().__init__(object_list, (), has_next, number > 1, params)
+        self.number = number
+
+    @property
+    def next_query(self):
+        return self._query("page", self.number + 1) if self.has_next_page else ""
+
+    @property
+    def previous_query(self):
+        return self._query("page", self.number - 1) if self.has_previous_page else ""
+
+
+class KeysetPaginator:
+    """
+    keys - ключ сортировки без NULL, последний элемент уникален (id):
+    ("-published_at", "-id"), ("-is_featured", "sort_order", "-created_at", "-id")
+    """
+
+    def __init__(self, queryset, keys, per_page):
+        self.queryset = queryset
+        self.keys = list(keys)
+        self.per_page = per_page
+
+    def page(self, after=None, before=None, params=None, total=None):
+        if after and before:
+            raise InvalidCursor("after+before")
+
+        queryset = self.queryset
+        reverse = bool(before)
+        cursor = before or after
+        if cursor:
+            values = decode_cursor(cursor, len(self.keys), key_fields(queryset, self.keys))
+            queryset = queryset.filter(keyset_filter(self.keys, values, reverse=reverse))
+
+        keys = _reverse_keys(self.keys) if reverse else self.keys
+        # На одну запись больше - чтобы узнать, есть ли следующая страница
+        rows = list(queryset.order_by(*keys)[: self.per_page + 1])
+        more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+
+        if reverse:
+            rows.reverse()
+            has_next, has_previous = True, more
+        else:
+            has_next, has_previous = more, bool(after)
+
+        return KeysetPage(rows, self.keys, has_next, has_previous, params, total)
+
+
+def approximate_total(cache_key, queryset, timeout=APPROXIMATE_TOTAL_TIMEOUT):
+    """COUNT(*) списка раз в timeout секунд (для подписи "N статей")"""
+    total = cache.get(cache_key)
+    if total is None:
+        total = queryset.order_by().count()
+        cache.set(cache_key, total, timeout)
+    return total
+
+
+class KeysetPaginationMixin:
+    """
+    Keyset пагинация для ListView вместо paginate_by.
+
+    keyset_ordering - ключ сортировки; get_total_cache_key() - ключ кэша
+    приблизительного итога (None - итог не считается).
+    """
+
+    keyset_ordering = ("-id",)
+    page_size = 12
+
+    def get_keyset_ordering(self):
+        return self.keyset_ordering
+
+    def get_total_cache_key(self):
+        return None
+
+    def get_paginate_by(self, queryset):
+        # Пагинацию MultipleObjectMixin (с COUNT и OFFSET) отключаем
+        return None
+
+    def paginate_keyset(self, queryset):
+        cache_key = self.get_total_cache_key()
+        total = approximate_total(cache_key, queryset) if cache_key else None
+        paginator = KeysetPaginator(queryset, self.get_keyset_ordering(), self.page_size)
+        try:
+            return paginator.page(
+                after=self.request.GET.get("after"),
+                before=self.request.GET.get("before"),
+                params=self.request.GET,
+                total=total,
+            )
+        except InvalidCursor:
+            raise Http404("Invalid page cursor")
+
+    def get_context_data(self, **kwargs):
+        queryset = kwargs.pop("object_list", self.object_list)
+        page = self.paginate_keyset(queryset)
+        context = super().get_context_data(object_list=page.object_list, **kwargs)
+        context.update(
+            {
+                "page_obj": page,
+                "is_paginated": page.has_other_pages(),
+                "total_count": page.total,
+            }
+        )
+        return context
+
+
+class OffsetPaginationMixin:
+    """
+    OFFSET пагинация для ListView там, где ключ сортировки нельзя передать
+    курсором: оценка релевантности (float) после JSON не совпадает с
+    вычисленной в БД, и условие rank = курсор пропускало бы или повторяло
+    строки. Номер страницы ограничен max_pages (глубокий OFFSET дорог).
+    """
+
+    offset_ordering = ("-id",)
+    page_size = 12
+    max_pages = 50
+
+    def get_paginate_by(self, queryset):
+        return None
+
+    def get_page_number(self):
+        try:
+            number = int(self.request.GET.get("page", 1))
+        except ValueError:
+            raise Http404("Invalid page number")
+        if not 1 <= number <= self.max_pages:
+            raise Http404("Invalid page number")
+        return number
+
+    def paginate_offset(self, queryset):
+        number = self.get_page_number()
+        offset = (number - 1) * self.page_size
+        rows = list(queryset.order_by(*self.offset_ordering)[offset: offset + self.page_size + 1])
+        more = len(rows) > self.page_size and number < self.max_pages
+        return OffsetPage(rows[: self.page_size], number, more, self.request.GET)
+
+    def get_context_data(self, **kwargs):
+        queryset = kwargs.pop("object_list", self.object_list)
+        page = self.paginate_offset(queryset)
+        context = super().get_context_data(object_list=page.object_list, **kwargs)
+        context.update(
+            {
+                "page_obj": page,
+                "is_paginated": page.has_other_pages(),
+                "total_count": page.total,
+            }
+        )
+        return context
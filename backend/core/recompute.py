@@ -0,0 +1,75 @@
+# backend/core/recompute.py
+"""
+Очередь отложенных пересчетов (таблица RecomputeTask).
+
+Полный пересчет похожего контента (blog.related) и графа похожих туров
+(tours.similarity) загружает весь корпус, поэтому в запросе его не
+делаем: сигналы сохранения только отмечают id объектов (mark_dirty), а
+воркер process_recompute_queue забирает отметки пачкой и вызывает
+обработчик один раз на пачку - сколько бы переводов и туров ни
+сохранилось между проходами.
+
+Обработчики регистрируют приложения (register) при импорте сигналов:
+
+    register("related", ("related_post", "related_tour"), handler)
+
+handler получает {kind: {id, ...}} только по своим видам. Отметки
+удаляются в одной транзакции с обработкой: если обработчик упал, они
+остаются в очереди до следующего прохода.
+"""
+import logging
+
+from django.db import transaction
+
+from .models import RecomputeTask
+
+logger = logging.getLogger("core.recompute")
+
+BATCH_SIZE = 500
+
+# имя -> (виды отметок, обработчик)
+HANDLERS = {}
+
+
+def register(name, kinds, handler):
+    HANDLERS[name] = (tuple(kinds), handler)
+
+
+def mark_dirty(kind, object_ids):
+    """Отметить объекты (в текущей транзакции - откат снимает отметку)"""
+    object_ids = {pk for pk in object_ids if pk}
+    if object_ids:
+        RecomputeTask.objects.bulk_create(
+            [RecomputeTask(kind=kind, object_id=pk) for pk in object_ids],
+            ignore_conflicts=True,
+        )
+    return len(object_ids)
+
+
+def _process(name, kinds, handler, limit):
+    with transaction.atomic():
+        tasks = list(
+            RecomputeTask.objects.select_for_update(skip_locked=True)
+            .filter(kind__in=kinds)
+            .order_by("id")[:limit]
+        )
+        if not tasks:
+            return 0
+        grouped = {kind: set() for kind in kinds}
+        for task in tasks:
+            grouped[task.kind].add(task.object_id)
+        RecomputeTask.objects.filter(pk__in=[task.pk for task in tasks]).delete()
+        handler(grouped)
+    logger.info(f"🔁 Пересчет {name}: {len(tasks)} отметок")
+    return len(tasks)
+
+
+def process_recompute_queue(limit=BATCH_SIZE):
+    """Один проход по всем обработчикам; возвращает число обработанных отметок"""
+    processed = 0
+    for name, (kinds, handler) in HANDLERS.items():
+        try:
+            processed += _process(name, kinds, handler, limit)
+        except Exception as e:
+            logger.error(f"❌ Ошибка пересчета {name}: {e}")
+    return processed
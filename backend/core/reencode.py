@@ -0,0 +1,236 @@
+# backend/core/reencode.py
+"""
+Массовое перекодирование старых загрузок (команда reencode_media).
+
+Оригиналы из UPLOAD_DIRS (сканер walk_media из core.media_health)
+перекодируются в том же формате: поворот по EXIF, ширина не больше
+max_width, JPEG q85 progressive, PNG optimize, WebP q80. Файл заменяется
+атомарно и только если стал меньше хотя бы на MIN_SAVING; с derivatives
+заодно строятся варианты для <picture> (core.derivatives).
+
+Кодирование идет в ProcessPoolExecutor (по процессу на ядро). Процессы
+не обращаются к БД: они возвращают результат, а прогресс, MediaFile и
+отпечатки моделей записывает родительский процесс.
+
+Прогресс - таблица MediaReencode (путь + mtime после обработки):
+прерванный запуск продолжается с необработанных файлов, а уже
+перекодированный JPEG повторно не пережимается.
+"""
+import hashlib
+import io
+import logging
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import django
+from django.core.files.storage import default_storage
+from django.db import connections
+from PIL import Image, ImageOps
+
+from .derivatives import blurhash, encode_variants
+from .image_changes import sync_image_fingerprints
+from .image_jobs import DERIVATIVES_PIPELINE, IN_PLACE_PIPELINES, enqueue_image_job, file_hash
+from .media_health import UPLOAD_DIRS, record_media, walk_media
+from .models import ImageJob, MediaFile, MediaReencode
+
+logger = logging.getLogger("core.reencode")
+
+MAX_WIDTH = 2400
+# Заменять файл, только если он уменьшился хотя бы на 5%
+MIN_SAVING = 0.05
+
+ENCODERS = {
+    "JPEG": {"quality": 85, "optimize": True, "progressive": True},
+    "PNG": {"optimize": True},
+    "WEBP": {"quality": 80, "method": 6},
+}
+
+
+def _encode(img, fmt, icc_profile):
+    options = dict(ENCODERS[fmt])
+    if icc_profile:
+        options["icc_profile"] = icc_profile
+    if fmt == "JPEG" and img.mode not in ("RGB", "L", "CMYK"):
+        img = img.convert("RGB")
+    buffer = io.BytesIO()
+    img.save(buffer, fmt, **options)
+    return buffer.getvalue()
+
+
+def _replace(path, data):
+    fd, temp_path = tempfile.mkstemp(suffix=os.path.splitext(path)[1], dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "wb") as temp_file:
+            temp_file.write(data)
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+
+
+def reencode_file(name, dry_run=False, derivatives=False, max_width=MAX_WIDTH):
+    """
+    Перекодировать один файл (выполняется в процессе пула, без БД).
+    Возвращает словарь с размерами, новым sha256 и манифестом вариантов.
+    """
+    storage = default_storage
+    path = storage.path(name)
+    result = {
+        "name": name,
+        "original_size": 0,
+        "size": 0,
+        "reencoded": False,
+        "digest": "",
+        "width": None,
+        "height": None,
+        "variants": None,
+        "blurhash": "",
+        "derivatives_size": 0,
+        "mtime": None,
+        "error": "",
+    }
+    try:
+        result["original_size"] = result["size"] = os.path.getsize(path)
+        with Image.open(path) as img:
+            fmt = img.format
+            if fmt not in ENCODERS or getattr(img, "is_animated", False):
+                result["mtime"] = os.path.getmtime(path)
+                return result
+            icc_profile = img.info.get("icc_profile")
+            img = ImageOps.exif_transpose(img)
+            img.load()
+        if img.width > max_width:
+            height = max(1, round(img.height * max_width / img.width))
+            img = img.resize((max_width, height), Image.Resampling.LANCZOS)
+        result["width"], result["height"] = img.size
+
+        data = _encode(img, fmt, icc_profile)
+        if len(data) <= result["original_size"] * (1 - MIN_SAVING):
+            result["size"] = len(data)
+            result["reencoded"] = True
+            result["digest"] = hashlib.sha256(data).hexdigest()
+            if not dry_run:
+                _replace(path, data)
+
+        if derivatives and not dry_run:
+            if not result["digest"]:
+                result["digest"] = file_hash(name, storage)
+            result["variants"], result["derivatives_size"] = encode_variants(img, result["digest"], storage)
+            result["blurhash"] = blurhash(img)
+        result["mtime"] = os.path.getmtime(path)
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"[:1000]
+    return result
+
+
+def pending_files(directories=UPLOAD_DIRS, force=False):
+    """Файлы сканера, которых нет в прогрессе с тем же mtime (ошибки - повторно)"""
+    files = list(walk_media(directories))
+    done = {}
+    if not force:
+        done = dict(
+            MediaReencode.objects.exclude(status=MediaReencode.STATUS_FAILED)
+            .values_list("path", "mtime")
+        )
+    return [(name, size) for name, size, mtime in files if done.get(name) != mtime], len(files)
+
+
+def _record(result):
+    """Записать результат файла в прогресс, MediaFile и модели (родительский процесс)"""
+    name = result["name"]
+    if result["error"]:
+        status = MediaReencode.STATUS_FAILED
+    elif result["reencoded"]:
+        status = MediaReencode.STATUS_REENCODED
+    else:
+        status = MediaReencode.STATUS_UNCHANGED
+    MediaReencode.objects.update_or_create(
+        path=name,
+        defaults={
+            "mtime": result["mtime"] or 0,
+            "status": status,
+            "original_size": result["original_size"],
+            "size": result["size"],
+            "derivatives_size": result["derivatives_size"],
+            "error": result["error"],
+        },
+    )
+    if result["error"]:
+        return
+
+    # None - файла еще нет в таблице медиа
+    known_variants = MediaFile.objects.filter(path=name).values_list("variants", flat=True).first()
+    if result["reencoded"] or known_variants is None:
+        record_media([name])
+    if result["reencoded"]:
+        sync_image_fingerprints(name, result["digest"], result["width"], result["height"])
+        # Задания "на месте" считают этот файл уже обработанным
+        ImageJob.objects.filter(path=name, pipeline__in=IN_PLACE_PIPELINES).update(
+            result_hash=result["digest"]
+        )
+    if result["variants"] is not None:
+        MediaFile.objects.filter(path=name).update(
+            content_hash=result["digest"], variants=result["variants"], blurhash=result["blurhash"]
+        )
+    elif result["reencoded"] and known_variants:
+        # Манифест построен из прежнего файла
+        enqueue_image_job(name, DERIVATIVES_PIPELINE)
+
+
+def reencode_media(
+    directories=UPLOAD_DIRS,
+    workers=None,
+    dry_run=False,
+    derivatives=False,
+    force=False,
+    max_width=MAX_WIDTH,
+    limit=None,
+    progress=None,
+):
+    """
+    Перекодировать все необработанные файлы; возвращает статистику.
+    progress(result) вызывается для каждого файла по мере готовности.
+    """
+    files, scanned = pending_files(directories, force)
+    if limit:
+        files = files[:limit]
+    stats = {
+        "scanned": scanned,
+        "skipped": scanned - len(files),
+        "reencoded": 0,
+        "unchanged": 0,
+        "failed": 0,
+        "original_bytes": 0,
+        "bytes": 0,
+        "saved": 0,
+        "derivatives_bytes": 0,
+    }
+    if not files:
+        return stats
+
+    # Процессы пула не должны делить соединения с родителем
+    connections.close_all()
+    worker = partial(reencode_file, dry_run=dry_run, derivatives=derivatives, max_width=max_width)
+    with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as executor:
+        for result in executor.map(worker, [name for name, _size in files], chunksize=4):
+            if result["error"]:
+                stats["failed"] += 1
+                logger.error(f"❌ {result['name']}: {result['error']}")
+            else:
+                stats["reencoded" if result["reencoded"] else "unchanged"] += 1
+                stats["original_bytes"] += result["original_size"]
+                stats["bytes"] += result["size"]
+                stats["derivatives_bytes"] += result["derivatives_size"]
+            if not dry_run:
+                _record(result)
+            if progress:
+                progress(result)
+
+    stats["saved"] = stats["original_bytes"] - stats["bytes"]
+    logger.info(
+        f"🗜️ Перекодирование медиа{' (dry run)' if dry_run else ''}: "
+        f"{stats['reencoded']} из {len(files)} файлов, сэкономлено {stats['saved']} bytes"
+    )
+    return stats
@@ -0,0 +1,213 @@
+# backend/core/search.py
+"""
+Полнотекстовый поиск PostgreSQL для переводимых моделей (статьи, туры).
+
+У каждой строки перевода есть колонка search_vector (tsvector) с GIN
+индексом. Вектор строится с конфигурацией языка перевода (english,
+french, ...), поэтому работают стемминг и стоп-слова каждого языка.
+Вектор пересчитывается сигналами при сохранении перевода и тегов.
+
+Поиск идет по переводам на всех языках: запрос разбирается конфигурацией
+языка строки, оценка объекта - лучшая оценка среди его переводов, поэтому
+объект попадает в выдачу один раз. Подсветка строится только для объектов
+текущей страницы.
+
+На других СУБД (локальная разработка) используется простой icontains.
+"""
+import html
+import logging
+
+from django.conf import settings
+from django.contrib.postgres.search import (
+    SearchHeadline,
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+)
+from django.db import connection
+from django.db.models import Case, F, FloatField, Func, Max, Q, TextField, Value, When
+from django.utils.safestring import mark_safe
+
+logger = logging.getLogger("core.search")
+
+# Язык сайта -> конфигурация полнотекстового поиска PostgreSQL
+SEARCH_CONFIGS = getattr(
+    settings,
+    "SEARCH_CONFIGS",
+    {
+        "en": "english",
+        "fr": "french",
+        "de": "german",
+        "es": "spanish",
+        "nl": "dutch",
+    },
+)
+
+# Маркеры подсветки (заменяются на <mark> после экранирования)
+_START_SEL = "\x02"
+_STOP_SEL = "\x03"
+
+
+def search_enabled():
+    return connection.vendor == "postgresql"
+
+
+def search_config(language):
+    return SEARCH_CONFIGS.get(language, "simple")
+
+
+class StripTags(Func):
+    """HTML -> текст на стороне БД (контент CKEditor)"""
+
+    function = "REGEXP_REPLACE"
+    output_field = TextField()
+
+    def __init__(self, expression, **extra):
+        super().__init__(
+            expression, Value("<[^>]+>"), Value(" "), Value("g"), **extra
+        )
+
+
+def _text(field, html_field):
+    return StripTags(F(field)) if html_field else F(field)
+
+
+def _vector(config, fields, extra):
+    """
+    fields: [(поле перевода, вес, html?)], extra: [(текст, вес)] - данные
+    общей модели (теги, локация), одинаковые для всех языков.
+    """
+    vector = None
+    for field, weight, html_field in fields:
+        part = SearchVector(_text(field, html_field), weight=weight, config=config)
+        vector = part if vector is None else vector + part
+    for text, weight in extra:
+        if text:
+            vector = vector + SearchVector(Value(text), weight=weight, config=config)
+    return vector
+
+
+def update_search_vectors(model, object_ids, fields, extra_for=None):
+    """
+    Пересчитать search_vector переводов объектов model.
+
+    extra_for(object_ids) -> {id: [(текст, вес), ...]}
+    Один UPDATE на объект: конфигурация выбирается по language_code строки.
+    """
+    if not search_enabled() or not object_ids:
+        return
+    object_ids = list(object_ids)
+    translation_model = model._parler_meta.root_model
+    extra = extra_for(object_ids) if extra_for else {}
+
+    for object_id in object_ids:
+        texts = extra.get(object_id, [])
+        translation_model.objects.filter(master_id=object_id).update(
+            search_vector=Case(
+                *[
+                    When(language_code=language, then=_vector(config, fields, texts))
+                    for language, config in SEARCH_CONFIGS.items()
+                ],
+                default=_vector("simple", fields, texts),
+            )
+        )
+
+
+def ranked_search(queryset, query, fallback_fields=("title",)):
+    """
+    Объекты queryset, чьи переводы совпали с запросом, с аннотацией
+    search_rank; по одной строке на объект, лучшие первыми.
+    """
+    if not search_enabled():
+        match = Q()
+        for field in fallback_fields:
+            match |= Q(**{f"translations__{field}__icontains": query})
+        return (
+            queryset.filter(match)
+            .annotate(search_rank=Value(0.0, output_field=FloatField()))
+            .distinct()
+        )
+
+    match = Q()
+    ranks = []
+    for language, config in SEARCH_CONFIGS.items():
+        search_query = SearchQuery(query, config=config, search_type="websearch")
+        match |= Q(
+            translations__language_code=language,
+            translations__search_vector=search_query,
+        )
+        ranks.append(
+            When(
+                translations__language_code=language,
+                then=SearchRank(F("translations__search_vector"), search_query),
+            )
+        )
+
+    return (
+        queryset.filter(match)
+        .annotate(
+            search_rank=Max(
+                Case(*ranks, default=Value(0.0), output_field=FloatField())
+            )
+        )
+        .order_by("-search_rank", "-pk")
+    )
+
+
+def _mark(text):
+    escaped = html.escape(html.unescape(text or ""))
+    return mark_safe(
+        escaped.replace(_START_SEL, "<mark>").replace(_STOP_SEL, "</mark>")
+    )
+
+
+def attach_headlines(objects, query, language, field, html_field=True):
+    """
+    Подсветка совпадений в поле field для объектов текущей страницы:
+    obj.search_headline. Берется перевод на языке страницы, иначе любой.
+    """
+    objects = list(objects)
+    if not objects:
+        return objects
+    if not search_enabled():
+        for obj in objects:
+            obj.search_headline = ""
+        return objects
+
+    translation_model = type(objects[0])._parler_meta.root_model
+    available = {}
+    for master_id, row_language in translation_model.objects.filter(
+        master_id__in=[obj.pk for obj in objects]
+    ).values_list("master_id", "language_code"):
+        available.setdefault(master_id, set()).add(row_language)
+
+    by_language = {}
+    for obj in objects:
+        languages = available.get(obj.pk)
+        if languages:
+            row_language = language if language in languages else min(languages)
+            by_language.setdefault(row_language, []).append(obj.pk)
+
+    headlines = {}
+    for row_language, ids in by_language.items():
+        config = search_config(row_language)
+        rows = (
+            translation_model.objects.filter(master_id__in=ids, language_code=row_language)
+            .annotate(
+                headline=SearchHeadline(
+                    _text(field, html_field),
+                    SearchQuery(query, config=config, search_type="websearch"),
+                    config=config,
+                    start_sel=_START_SEL,
+                    stop_sel=_STOP_SEL,
+                    max_words=35,
+                    min_words=15,
+                )
+            )
+            .values_list("master_id", "headline")
+        )
+        headlines.update(rows)
+
+    for obj in objects:
+        obj.search_headline = _mark(headlines.get(obj.pk))
+    return objects
@@ -0,0 +1,74 @@
+# core/templatetags/images.py
+"""
+{% picture %} - адаптивное изображение по манифесту MediaFile (core.derivatives).
+
+    {% load images %}
+    {% picture post.featured_image post.featured_image_info alt=title sizes="(min-width: 992px) 33vw, 100vw" css_class="img-ratio" %}
+
+Есть варианты - <picture> с <source> AVIF и WebP и <img> с JPEG srcset,
+width/height (без сдвига верстки) и data-blurhash. Вариантов еще нет
+(воркер не дошел) - обычный <img> исходного файла. Диск не читается:
+URL вариантов строятся из имен в манифесте.
+"""
+from django import template
+from django.core.files.storage import default_storage
+from django.utils.html import format_html, format_html_join
+
+register = template.Library()
+
+
+def _srcset(variants, extension):
+    return ", ".join(
+        f"{default_storage.url(entry['formats'][extension]['name'])} {entry['width']}w"
+        for entry in variants
+        if extension in entry["formats"]
+    )
+
+
+@register.simple_tag
+def picture(image, info=None, alt="", sizes="100vw", css_class="", picture_class="", style="", loading="lazy"):
+    if not image:
+        return ""
+    attrs = {
+        "alt": alt,
+        "class": css_class,
+        "style": style,
+        "loading": loading,
+        "decoding": "async",
+    }
+    variants = getattr(info, "variants", None)
+    if not variants:
+        attrs["src"] = image.url
+        if getattr(info, "width", None):
+            attrs["width"], attrs["height"] = info.width, info.height
+        return format_html("<img {}>", _attributes(attrs))
+
+    largest = variants[-1]
+    attrs.update(
+        src=default_storage.url(largest["formats"]["jpg"]["name"]),
+        srcset=_srcset(variants, "jpg"),
+        sizes=sizes,
+        width=largest["width"],
+        height=largest["height"],
+    )
+    if info.blurhash:
+        attrs["data-blurhash"] = info.blurhash
+    sources = format_html_join(
+        "",
+        '<source type="{}" srcset="{}" sizes="{}">',
+        (
+            (largest["formats"][extension]["type"], _srcset(variants, extension), sizes)
+            for extension in ("avif", "webp")
+            if extension in largest["formats"]
+        ),
+    )
+    return format_html(
+        "<picture{}>{}<img {}></picture>",
+        format_html(' class="{}"', picture_class) if picture_class else "",
+        sources,
+        _attributes(attrs),
+    )
+
+
+def _attributes(attrs):
+    return format_html_join(" ", '{}="{}"', ((key, value) for key, value in attrs.items() if value not in ("", None)))
@@ -0,0 +1,287 @@
+# backend/core/tests.py
+"""
+Тесты core: python manage.py test core --settings=config.test_settings
+"""
+import base64
+import io
+import json
+import shutil
+import tempfile
+from types import SimpleNamespace
+
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from blog.models import BlogPost
+from core.autocomplete import (
+    autocomplete,
+    label_prefixes,
+    normalize,
+    rebuild_autocomplete_index,
+)
+from core.derivatives import DERIVATIVE_FORMATS, derivative_name, generate_derivatives
+from core.image_jobs import file_hash
+from core.models import MediaFile, MediaReencode
+from core.pagination import InvalidCursor, KeysetPaginator, encode_cursor
+from core.reencode import reencode_file, reencode_media
+from tours.models import Tour
+
+
+def raw_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+
+class KeysetPaginationTests(TestCase):
+    keys = ("-date_joined", "-id")
+
+    @classmethod
+    def setUpTestData(cls):
+        for index in range(5):
+            User.objects.create(username=f"user-{index}")
+
+    def paginator(self):
+        return KeysetPaginator(User.objects.all(), self.keys, per_page=2)
+
+    def test_cursor_round_trip_walks_every_row_once(self):
+        seen = []
+        page = self.paginator().page()
+        while True:
+            seen.extend(user.username for user in page)
+            if not page.has_next():
+                break
+            page = self.paginator().page(after=page.next_cursor)
+        self.assertEqual(seen, list(User.objects.order_by(*self.keys).values_list("username", flat=True)))
+
+        previous = self.paginator().page(before=page.previous_cursor)
+        self.assertEqual(len(previous), 2)
+        self.assertTrue(previous.has_next())
+
+    def test_tampered_cursors_are_rejected(self):
+        user = User.objects.first()
+        valid = encode_cursor([user.date_joined, user.pk])
+        for cursor in (
+            "not base64!",
+            raw_cursor(["x", 1]),
+            raw_cursor([1, 2]),
+            raw_cursor([[1], 2]),
+            raw_cursor([{"dt": user.date_joined.isoformat()}, "abc"]),
+            raw_cursor([{"dt": "yesterday"}, 1]),
+            raw_cursor([{"dec": "abc"}, 1]),
+            raw_cursor({"a": 1}),
+            raw_cursor([None, 1]),
+            valid[:-3],
+        ):
+            with self.subTest(cursor=cursor), self.assertRaises(InvalidCursor):
+                self.paginator().page(after=cursor)
+
+
+def translated(obj, language="en", **fields):
+    obj.set_current_language(language)
+    for name, value in fields.items():
+        setattr(obj, name, value)
+    obj.save()
+    return obj
+
+
+class AutocompleteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user("author")
+        cls.post = translated(
+            BlogPost(author=author, status="published"),
+            title="Côte d'Azur road trip",
+            slug="cote-azur",
+            content="<p>Text</p>",
+        )
+        translated(
+            BlogPost(author=author, status="draft"),
+            title="Cote draft",
+            slug="cote-draft",
+            content="<p>Text</p>",
+        )
+        cls.tour = translated(
+            Tour(author=author, price_adult=100, status="published", is_featured=True),
+            title="Como lake cruise",
+            slug="como-cruise",
+            short_description="Boat",
+        )
+
+    def setUp(self):
+        rebuild_autocomplete_index()
+
+    def labels(self, query, language="en"):
+        return [doc["label"] for doc in autocomplete(query, language)]
+
+    def test_prefixes(self):
+        self.assertEqual(normalize("Côte d'Azur"), "cote d azur")
+        self.assertEqual(label_prefixes("Lake Como"), {"la", "lak", "lake", "co", "com", "como"})
+
+    def test_prefix_lookup(self):
+        self.assertEqual(self.labels("cot"), ["Côte d'Azur road trip"])
+        self.assertEqual(self.labels("CÔTE"), ["Côte d'Azur road trip"])
+        self.assertEqual(self.labels("co"), ["Como lake cruise", "Côte d'Azur road trip"])
+        self.assertEqual(self.labels("c"), [])
+
+    def test_every_query_word_must_match(self):
+        self.assertEqual(self.labels("lake co"), ["Como lake cruise"])
+        self.assertEqual(self.labels("road como"), [])
+
+    def test_other_languages_fall_back_to_any_translation(self):
+        self.assertEqual(self.labels("cruise", "fr"), ["Como lake cruise"])
+
+    def test_published_post_is_added_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            draft = BlogPost.objects.get(translations__slug="cote-draft")
+            draft.status = "published"
+            draft.save()
+
+        self.assertCountEqual(self.labels("cote"), ["Côte d'Azur road trip", "Cote draft"])
+
+    def test_endpoint(self):
+        response = self.client.get("/autocomplete/", {"q": "como"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(item["type"], item["label"]) for item in response.json()["results"]],
+            [("tour", "Como lake cruise")],
+        )
+
+
+class MediaTestCase(TestCase):
+    """Файлы пишутся во временный MEDIA_ROOT"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media_root = tempfile.mkdtemp()
+        cls.media_settings = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.media_settings.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.media_settings.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+        super().tearDownClass()
+
+    def save_image(self, name, size=(1000, 500), **options):
+        buffer = io.BytesIO()
+        Image.new("RGB", size, (30, 120, 200)).save(buffer, "JPEG", **options)
+        return default_storage.save(name, ContentFile(buffer.getvalue()))
+
+
+class DerivativesTests(MediaTestCase):
+
+    def render(self, image, info):
+        template = Template('{% load images %}{% picture image info alt="Lake" sizes="50vw" %}')
+        return template.render(Context({"image": image, "info": info}))
+
+    def test_manifest(self):
+        name = self.save_image("uploads/lake.jpg")
+        digest = file_hash(name)
+
+        result = generate_derivatives(name)
+
+        media = MediaFile.objects.get(path=name)
+        self.assertEqual((media.width, media.height, media.content_hash), (1000, 500, digest))
+        self.assertEqual([entry["width"] for entry in media.variants], [400, 800, 1000])
+        self.assertEqual([entry["height"] for entry in media.variants], [200, 400, 500])
+        extensions = [extension for extension, _, _, _ in DERIVATIVE_FORMATS]
+        for entry in media.variants:
+            self.assertEqual(list(entry["formats"]), extensions)
+            for extension, variant in entry["formats"].items():
+                self.assertEqual(variant["name"], derivative_name(digest, entry["width"], extension))
+                self.assertEqual(default_storage.size(variant["name"]), variant["bytes"])
+        self.assertTrue(media.blurhash)
+        self.assertGreater(result["bytes"], 0)
+
+    def test_variants_are_encoded_once(self):
+        name = self.save_image("uploads/once.jpg")
+        generate_derivatives(name)
+
+        self.assertEqual(generate_derivatives(name)["bytes"], 0)
+
+        copy = self.save_image("uploads/copy.jpg")
+        self.assertEqual(generate_derivatives(copy)["bytes"], 0)
+        self.assertEqual(
+            MediaFile.objects.get(path=copy).variants, MediaFile.objects.get(path=name).variants
+        )
+
+    def test_picture_tag_uses_the_manifest(self):
+        name = self.save_image("uploads/picture.jpg")
+        generate_derivatives(name)
+        media = MediaFile.objects.get(path=name)
+
+        html = self.render(SimpleNamespace(url="/media/" + name), media)
+
+        self.assertTrue(html.startswith("<picture><source "))
+        self.assertIn('type="image/webp"', html)
+        smallest = media.variants[0]["formats"]["webp"]["name"]
+        self.assertIn(f"{default_storage.url(smallest)} 400w", html)
+        self.assertIn('sizes="50vw"', html)
+        self.assertIn('width="1000" height="500"', html)
+        self.assertIn(f'data-blurhash="{media.blurhash}"', html)
+        self.assertIn('alt="Lake"', html)
+        self.assertNotIn(name, html)
+
+    def test_picture_tag_without_manifest(self):
+        image = SimpleNamespace(url="/media/uploads/new.jpg")
+
+        self.assertEqual(self.render(None, None), "")
+        html = self.render(image, SimpleNamespace(variants=[], width=640, height=480))
+        self.assertTrue(html.startswith('<img alt="Lake"'))
+        self.assertIn('src="/media/uploads/new.jpg"', html)
+        self.assertIn('width="640" height="480"', html)
+
+
+class ReencodeTests(MediaTestCase):
+    def setUp(self):
+        # Каждый тест - свой каталог: сканер обходит его целиком
+        self.directory = f"uploads/{self._testMethodName}"
+        self.large = self.save_image(f"{self.directory}/large.jpg", (900, 600), quality=100)
+
+    def test_reencode_file(self):
+        with default_storage.open(self.large, "rb") as f:
+            original = f.read()
+
+        dry = reencode_file(self.large, dry_run=True, max_width=450)
+        with default_storage.open(self.large, "rb") as f:
+            self.assertEqual(f.read(), original)
+
+        result = reencode_file(self.large, max_width=450)
+
+        self.assertTrue(result["reencoded"])
+        self.assertEqual(result["size"], dry["size"])
+        self.assertEqual((result["width"], result["height"]), (450, 300))
+        self.assertEqual(default_storage.size(self.large), result["size"])
+        self.assertEqual(file_hash(self.large), result["digest"])
+        with Image.open(default_storage.path(self.large)) as img:
+            self.assertEqual(img.size, (450, 300))
+
+    def test_runs_resume_and_retry_failures(self):
+        buffer = io.BytesIO()
+        Image.new("P", (40, 40)).save(buffer, "GIF")
+        # GIF не перекодируется
+        gif = default_storage.save(f"{self.directory}/small.gif", ContentFile(buffer.getvalue()))
+        broken = default_storage.save(f"{self.directory}/broken.jpg", ContentFile(b"not an image"))
+
+        stats = reencode_media([self.directory], workers=1, max_width=450)
+
+        self.assertEqual(
+            (stats["scanned"], stats["reencoded"], stats["unchanged"], stats["failed"]), (3, 1, 1, 1)
+        )
+        self.assertEqual(
+            dict(MediaReencode.objects.values_list("path", "status")),
+            {
+                self.large: MediaReencode.STATUS_REENCODED,
+                gif: MediaReencode.STATUS_UNCHANGED,
+                broken: MediaReencode.STATUS_FAILED,
+            },
+        )
+        self.assertEqual(MediaFile.objects.get(path=self.large).width, 450)
+
+        stats = reencode_media([self.directory], workers=1, max_width=450)
+        self.assertEqual((stats["skipped"], stats["failed"]), (2, 1))
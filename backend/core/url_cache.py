@@ -0,0 +1,98 @@
+# backend/core/url_cache.py
+"""
+Общий кэш путей get_absolute_url для туров и статей блога.
+
+Ключ - (модель, pk, язык), значение - готовый путь с языковым префиксом.
+Пути считаются заранее (команда warm_url_cache и сигналы сохранения),
+поэтому при рендере списка reverse() не вызывается, а prime_absolute_urls
+достает пути всех карточек одним запросом к кэшу.
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import translation
+
+logger = logging.getLogger("core.url_cache")
+
+# None - хранить пока путь не будет пересчитан при сохранении
+URL_CACHE_TIMEOUT = getattr(settings, "URL_CACHE_TIMEOUT", None)
+
+
+def _languages():
+    return [code for code, _name in settings.LANGUAGES]
+
+
+def _current_language():
+    return translation.get_language() or settings.LANGUAGE_CODE
+
+
+def url_cache_key(model_label, pk, language):
+    return f"url:{model_label}:{pk}:{language}"
+
+
+def _instance_key(instance, language):
+    return url_cache_key(instance._meta.label_lower, instance.pk, language)
+
+
+def cached_absolute_url(instance, build):
+    """Путь объекта для активного языка; build() вызывается только при промахе"""
+    if instance.pk is None:
+        return build()
+
+    language = _current_language()
+    primed = getattr(instance, "_absolute_urls", None)
+    if primed and language in primed:
+        return primed[language]
+
+    key = _instance_key(instance, language)
+    url = cache.get(key)
+    if url is None:
+        url = build()
+        cache.set(key, url, URL_CACHE_TIMEOUT)
+
+    instance._absolute_urls = {**(primed or {}), language: url}
+    return url
+
+
+def prime_absolute_urls(instances):
+    """Загрузить пути для списка объектов одним get_many"""
+    language = _current_language()
+    instances = [obj for obj in instances if obj.pk is not None]
+    keys = {_instance_key(obj, language): obj for obj in instances}
+    found = cache.get_many(list(keys))
+    for key, obj in keys.items():
+        if key in found:
+            obj._absolute_urls = {
+                **(getattr(obj, "_absolute_urls", None) or {}),
+                language: found[key],
+            }
+    return instances
+
+
+def warm_absolute_urls(instances, build_name="build_absolute_url"):
+    """Посчитать и сохранить пути объектов на всех языках"""
+    values = {}
+    for obj in instances:
+        obj._absolute_urls = {}
+        # Объект parler отдает перевод своего текущего языка, а не активного:
+        # переключаем его на каждый язык и возвращаем исходный
+        loaded_language = getattr(obj, "get_current_language", lambda: None)()
+        try:
+            for language in _languages():
+                if loaded_language is not None:
+                    obj.set_current_language(language)
+                with translation.override(language):
+                    values[_instance_key(obj, language)] = getattr(obj, build_name)()
+        finally:
+            if loaded_language is not None:
+                obj.set_current_language(loaded_language)
+    if values:
+        cache.set_many(values, URL_CACHE_TIMEOUT)
+    return len(values)
+
+
+def invalidate_absolute_urls(model, pk):
+    """Удалить пути объекта на всех языках"""
+    label = model._meta.label_lower
+    cache.delete_many([url_cache_key(label, pk, language) for language in _languages()])
@@ -29,4 +29,7 @@ urlpatterns = [
     path("lake-como-day-trip/", views.lake_como_day_trip, name="lake_como_day_trip"),
     path("bernina-express-tour/", views.bernina_express_tour, name="bernina_express_tour"),
     path("bernina-express-video/", views.bernina_express_video, name="bernina_express_video"),
+
+    # Подсказки поиска
+    path("autocomplete/", views.autocomplete, name="autocomplete"),
 ]
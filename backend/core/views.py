@@ -7,7 +7,8 @@ from django.http import (
     JsonResponse,
 )
 from django.shortcuts import render
-from django.utils.translation import activate
+from django.utils.cache import patch_cache_control
+from django.utils.translation import activate, get_language
 from django.views.decorators.cache import cache_page
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.vary import vary_on_headers
@@ -15,6 +16,8 @@ from django.views.decorators.vary import vary_on_headers
 from django.http import FileResponse, Http404
 import os
 
+from .autocomplete import AUTOCOMPLETE_LIMIT, autocomplete as autocomplete_suggestions
+
 # Импортируем только сервис отзывов
 from .services.multi_reviews_service import MultiSourceReviewsService
 
@@ -244,6 +247,21 @@ def lake_como_lugano_morcote_tour(request):
 
 
 # --- КАСТОМНЫЕ ОШИБКИ ---
+def autocomplete(request):
+    """Подсказки поиска по мере ввода (префиксный индекс, без запросов к БД)"""
+    query = request.GET.get("q", "")[:100]
+    try:
+        limit = max(1, min(int(request.GET.get("limit", AUTOCOMPLETE_LIMIT)), 20))
+    except ValueError:
+        limit = AUTOCOMPLETE_LIMIT
+
+    response = JsonResponse(
+        {"query": query, "results": autocomplete_suggestions(query, get_language(), limit)}
+    )
+    patch_cache_control(response, public=True, max_age=60)
+    return response
+
+
 def custom_404(request, exception):
     return render(request, "pages/404.html", status=404)
 
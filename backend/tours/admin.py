@@ -9,10 +9,14 @@ from django.http import JsonResponse, HttpResponse
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib import messages
 from parler.admin import TranslatableAdmin, TranslatableTabularInline
+from core.admin import MediaInfoAdminMixin
+from core.derivatives import thumbnail_url
 from .models import (
     Tour, TourCategory, TourDifficulty, TourImage, 
-    TourFAQ, TourReview, TourMeetingPoint, BookingCode
+    TourFAQ, TourReview, TourMeetingPoint, BookingCode,
+    TourDeparture, TourPriceRule
 )
+from .signals import invalidate_tour_caches
 import json
 
 
@@ -197,6 +201,26 @@ class TourMeetingPointInline(admin.TabularInline, WordPressStyleTourAdminMixin):
     meeting_point_info.short_description = 'Meeting Point Info'
 
 
+class TourDepartureInline(admin.TabularInline):
+    """Inline для календаря отправлений"""
+    model = TourDeparture
+    extra = 1
+    fields = ('date', 'start_time', 'capacity', 'seats_booked', 'status', 'price_adult')
+    ordering = ('date', 'start_time')
+    classes = ['wp-tour-inline', 'collapse']
+
+
+class TourPriceRuleInline(admin.TabularInline):
+    """Inline для сезонных цен"""
+    model = TourPriceRule
+    extra = 0
+    fields = (
+        'name', 'start_date', 'end_date', 'weekdays',
+        'price_adult', 'price_child', 'price_private', 'priority', 'is_active'
+    )
+    classes = ['wp-tour-inline', 'collapse']
+
+
 @admin.register(TourCategory)
 class TourCategoryAdmin(TranslatableAdmin, WordPressStyleTourAdminMixin):
     """WordPress-стиль админка для категорий туров"""
@@ -411,9 +435,11 @@ class TourDifficultyAdmin(admin.ModelAdmin, WordPressStyleTourAdminMixin):
 
 
 @admin.register(Tour)
-class TourAdmin(TranslatableAdmin, WordPressStyleTourAdminMixin):
+class TourAdmin(MediaInfoAdminMixin, TranslatableAdmin, WordPressStyleTourAdminMixin):
     """Главная админка для туров в WordPress стиле"""
     
+    media_info_field = 'featured_image'
+    
     list_display = (
         'tour_thumbnail', 'get_title_with_status', 'category_info', 
         'pricing_display', 'performance_score', 'tour_actions'
@@ -430,7 +456,10 @@ class TourAdmin(TranslatableAdmin, WordPressStyleTourAdminMixin):
     ordering = ['-is_featured', 'sort_order', '-created_at']
     
     # Inline админки
-    inlines = [TourImageInline, TourFAQInline, TourMeetingPointInline]
+    inlines = [
+        TourImageInline, TourFAQInline, TourMeetingPointInline,
+        TourDepartureInline, TourPriceRuleInline
+    ]
     
     # Fieldsets для формы редактирования
     fieldsets = (
@@ -492,12 +521,13 @@ class TourAdmin(TranslatableAdmin, WordPressStyleTourAdminMixin):
         if obj.featured_image:
             return format_html(
                 '<div class="wp-tour-thumbnail" style="position: relative; width: 60px; height: 60px;">'
-                '<img src="{}" style="width: 60px; height: 60px; object-fit: cover; '
-                'border-radius: 8px; border: 2px solid {};" />'
+                '<img src="{}" loading="lazy" style="width: 60px; height: 60px; object-fit: cover; '
+                'border-radius: 8px; border: 2px solid {}; background: {};" />'
                 '{}'
                 '</div>',
-                obj.featured_image.url,
+                thumbnail_url(obj.featured_image, obj.featured_image_info),
                 '#46b450' if obj.status == 'published' else '#82878c',
+                getattr(obj.featured_image_info, 'dominant_color', '') or '#f1f1f1',
                 '<div style="position: absolute; top: 2px; right: 2px; '
                 'background: rgba(0,0,0,0.8); color: white; border-radius: 2px; '
                 'padding: 1px 3px; font-size: 8px; font-weight: bold;">⭐</div>' if obj.is_featured else ''
@@ -757,12 +787,18 @@ class TourAdmin(TranslatableAdmin, WordPressStyleTourAdminMixin):
     actions = ['publish_tours', 'draft_tours', 'feature_tours', 'duplicate_tours']
     
     def publish_tours(self, request, queryset):
+        tour_ids = list(queryset.values_list('pk', flat=True))
         count = queryset.update(status='published')
+        # update() не вызывает сигналы - сбрасываем то же, что сохранение тура
+        invalidate_tour_caches(tour_ids)
         messages.success(request, f'🚀 {count} tour{"s" if count != 1 else ""} published!')
     publish_tours.short_description = "🚀 Publish selected tours"
     
     def draft_tours(self, request, queryset):
+        tour_ids = list(queryset.values_list('pk', flat=True))
         count = queryset.update(status='draft')
+        # update() не вызывает сигналы - сбрасываем то же, что сохранение тура
+        invalidate_tour_caches(tour_ids)
         messages.warning(request, f'📝 {count} tour{"s" if count != 1 else ""} moved to draft.')
     draft_tours.short_description = "📝 Move to draft"
     
@@ -785,20 +821,35 @@ class TourAdmin(TranslatableAdmin, WordPressStyleTourAdminMixin):
 
 # Остальные админ-классы
 @admin.register(TourImage)
-class TourImageAdmin(admin.ModelAdmin, WordPressStyleTourAdminMixin):
-    list_display = ('image_thumbnail', 'tour_info', 'alt_text', 'sort_order', 'is_featured')
+class TourImageAdmin(MediaInfoAdminMixin, admin.ModelAdmin, WordPressStyleTourAdminMixin):
+    list_display = ('image_thumbnail', 'tour_info', 'image_dimensions', 'alt_text', 'sort_order', 'is_featured')
     list_filter = ('is_featured', 'created_at')
     search_fields = ('tour__translations__title', 'alt_text', 'caption')
+    list_select_related = ('tour',)
     
     def image_thumbnail(self, obj):
         if obj.image:
             return format_html(
-                '<img src="{}" style="width: 50px; height: 50px; object-fit: cover; border-radius: 4px;" />',
-                obj.image.url
+                '<img src="{}" loading="lazy" style="width: 50px; height: 50px; object-fit: cover; '
+                'border-radius: 4px; background: {};" />',
+                thumbnail_url(obj.image, obj.image_info),
+                getattr(obj.image_info, 'dominant_color', '') or '#f1f1f1'
             )
         return '—'
     image_thumbnail.short_description = 'Image'
     
+    def image_dimensions(self, obj):
+        """Габариты, формат и размер - из таблицы медиа"""
+        info = getattr(obj, 'image_info', None)
+        if info is None or not info.exists:
+            return '—'
+        return format_html(
+            '<div style="font-size: 12px;">{}</div>'
+            '<div style="font-size: 10px; color: #666;">{} · {} KB</div>',
+            info.dimensions, info.format or '?', (info.size or 0) // 1024
+        )
+    image_dimensions.short_description = 'Size'
+    
     def tour_info(self, obj):
         tour_title = obj.tour.safe_translation_getter('title', any_language=True)
         return format_html(
@@ -868,6 +919,44 @@ class TourMeetingPointAdmin(TranslatableAdmin, WordPressStyleTourAdminMixin):
     tour_link.short_description = 'Tour'
 
 
+@admin.register(TourDeparture)
+class TourDepartureAdmin(admin.ModelAdmin, WordPressStyleTourAdminMixin):
+    list_display = ('date', 'start_time', 'tour_link', 'seats_display', 'status', 'price_adult')
+    list_filter = ('status', 'date')
+    search_fields = ('tour__translations__title',)
+    date_hierarchy = 'date'
+    list_select_related = ('tour',)
+    
+    def seats_display(self, obj):
+        color = 'green' if obj.is_available else 'red'
+        return self.get_wordpress_badge(f'{obj.seats_left}/{obj.capacity}', color, '👥')
+    seats_display.short_description = 'Seats left'
+    
+    def tour_link(self, obj):
+        tour_title = obj.tour.safe_translation_getter('title', any_language=True)
+        return format_html(
+            '<a href="/admin/tours/tour/{}/change/">{}</a>',
+            obj.tour.pk, tour_title or f'Tour {obj.tour.pk}'
+        )
+    tour_link.short_description = 'Tour'
+
+
+@admin.register(TourPriceRule)
+class TourPriceRuleAdmin(admin.ModelAdmin, WordPressStyleTourAdminMixin):
+    list_display = ('name', 'tour_link', 'start_date', 'end_date', 'price_adult', 'priority', 'is_active')
+    list_filter = ('is_active', 'start_date')
+    search_fields = ('name', 'tour__translations__title')
+    list_select_related = ('tour',)
+    
+    def tour_link(self, obj):
+        tour_title = obj.tour.safe_translation_getter('title', any_language=True)
+        return format_html(
+            '<a href="/admin/tours/tour/{}/change/">{}</a>',
+            obj.tour.pk, tour_title or f'Tour {obj.tour.pk}'
+        )
+    tour_link.short_description = 'Tour'
+
+
 @admin.register(BookingCode)
 class BookingCodeAdmin(admin.ModelAdmin, WordPressStyleTourAdminMixin):
     list_display = ('tour_link', 'booking_system', 'is_active', 'updated_at')
@@ -0,0 +1,192 @@
+# backend/tours/availability.py
+"""
+Календарь доступности и цен туров.
+
+Отправления (TourDeparture) и сезонные правила цен (TourPriceRule)
+индексированы по (tour, дата), поэтому "ближайшие N дат" - один
+диапазонный запрос. Месячная сетка календаря кэшируется целиком и
+сбрасывается сигналами при изменении отправлений, правил или цен тура.
+"""
+import calendar
+import logging
+from datetime import date as date_cls
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, OuterRef, Q, Subquery
+from django.utils import timezone
+
+from .models import Tour, TourDeparture, TourPriceRule
+
+logger = logging.getLogger("tours.availability")
+
+CALENDAR_CACHE_TIMEOUT = getattr(settings, "TOUR_CALENDAR_CACHE_TIMEOUT", 60 * 60)
+# Годы, для которых строится календарь (остальные - 400 в API)
+CALENDAR_YEARS = range(2000, 2101)
+
+
+def _available_q(prefix=""):
+    """Условие 'отправление открыто и есть места'"""
+    return Q(
+        **{
+            f"{prefix}status": "open",
+            f"{prefix}seats_booked__lt": F(f"{prefix}capacity"),
+        }
+    )
+
+
+def _rules_for_range(tour_id, start, end):
+    """Активные правила, пересекающиеся с диапазоном дат"""
+    return list(
+        TourPriceRule.objects.filter(
+            tour_id=tour_id,
+            is_active=True,
+            start_date__lte=end,
+            end_date__gte=start,
+        ).order_by("-priority", "start_date")
+    )
+
+
+def price_for_date(tour, day, rules, departure=None):
+    """Цены на дату: отправление > сезонное правило > базовые цены тура"""
+    prices = {
+        "adult": tour.price_adult,
+        "child": tour.price_child,
+        "private": tour.price_private,
+    }
+    for rule in rules:
+        if rule.applies_to(day):
+            prices = {
+                "adult": rule.price_adult,
+                "child": rule.price_child if rule.price_child is not None else prices["child"],
+                "private": (
+                    rule.price_private if rule.price_private is not None else prices["private"]
+                ),
+            }
+            break
+    if departure is not None and departure.price_adult is not None:
+        prices["adult"] = departure.price_adult
+    return prices
+
+
+def next_available_departures(tour, limit=3, from_date=None):
+    """Ближайшие доступные отправления с ценами на каждую дату"""
+    from_date = from_date or timezone.localdate()
+    departures = list(
+        TourDeparture.objects.filter(tour=tour, date__gte=from_date)
+        .filter(_available_q())
+        .order_by("date", "start_time")[:limit]
+    )
+    if not departures:
+        return []
+
+    rules = _rules_for_range(tour.pk, departures[0].date, departures[-1].date)
+    for departure in departures:
+        departure.prices = price_for_date(tour, departure.date, rules, departure)
+    return departures
+
+
+def annotate_next_departure(queryset):
+    """
+    Дата ближайшего доступного отправления для карточек списка туров.
+
+    Коррелированный подзапрос по индексу (tour, date), а не JOIN с GROUP BY:
+    список туров остается диапазонным запросом с LIMIT.
+    """
+    today = timezone.localdate()
+    return queryset.annotate(
+        next_departure_date=Subquery(
+            TourDeparture.objects.filter(_available_q(), tour=OuterRef("pk"), date__gte=today)
+            .order_by("date")
+            .values("date")[:1]
+        )
+    )
+
+
+def _calendar_version_key(tour_id):
+    return f"tours:calendar:version:{tour_id}"
+
+
+def _calendar_key(tour_id, year, month):
+    version = cache.get(_calendar_version_key(tour_id), 1)
+    return f"tours:calendar:{tour_id}:v{version}:{year}-{month:02d}"
+
+
+def build_month_grid(tour, year, month):
+    """Сетка месяца: недели -> дни с отправлениями, местами и ценой"""
+    first_day = date_cls(year, month, 1)
+    last_day = date_cls(year, month, calendar.monthrange(year, month)[1])
+
+    departures_by_day = {}
+    for departure in TourDeparture.objects.filter(
+        tour=tour, date__range=(first_day, last_day)
+    ).exclude(status="cancelled"):
+        departures_by_day.setdefault(departure.date, []).append(departure)
+
+    rules = _rules_for_range(tour.pk, first_day, last_day)
+    today = timezone.localdate()
+
+    weeks = []
+    for week in calendar.Calendar().monthdatescalendar(year, month):
+        days = []
+        for day in week:
+            in_month = day.month == month
+            slots = []
+            for departure in departures_by_day.get(day, []) if in_month else []:
+                prices = price_for_date(tour, day, rules, departure)
+                slots.append(
+                    {
+                        "id": departure.pk,
+                        "time": (
+                            departure.start_time.strftime("%H:%M")
+                            if departure.start_time
+                            else None
+                        ),
+                        "seats_left": departure.seats_left,
+                        "available": departure.is_available and day >= today,
+                        "price_adult": float(prices["adult"]),
+                    }
+                )
+            days.append(
+                {
+                    "date": day.isoformat(),
+                    "in_month": in_month,
+                    "available": any(slot["available"] for slot in slots),
+                    "departures": slots,
+                }
+            )
+        weeks.append(days)
+
+    return {"tour_id": tour.pk, "year": year, "month": month, "weeks": weeks}
+
+
+def get_month_grid(tour_id, year, month):
+    """Месячная сетка из кэша; None если тур не опубликован"""
+    key = _calendar_key(tour_id, year, month)
+    grid = cache.get(key)
+    if grid is None:
+        tour = Tour.objects.filter(pk=tour_id, status="published").first()
+        if tour is None:
+            return None
+        grid = build_month_grid(tour, year, month)
+        cache.set(key, grid, _calendar_timeout())
+    return grid
+
+
+def _calendar_timeout():
+    """Не дольше конца дня: флаг available в сетке считается от сегодняшней даты"""
+    now = timezone.localtime()
+    midnight = timezone.make_aware(datetime.combine(now.date() + timedelta(days=1), time.min))
+    return max(1, min(CALENDAR_CACHE_TIMEOUT, int((midnight - now).total_seconds())))
+
+
+def invalidate_month(tour_id, day):
+    """Сбросить месяц, в котором изменилось отправление"""
+    cache.delete(_calendar_key(tour_id, day.year, day.month))
+
+
+def invalidate_calendar(tour_id):
+    """Сбросить все месяцы тура (изменились цены или правила)"""
+    key = _calendar_version_key(tour_id)
+    cache.set(key, cache.get(key, 1) + 1, None)
@@ -0,0 +1,107 @@
+# backend/tours/cache.py
+"""
+Кэш готовых JSON-ответов для /ajax/similar/<id>/.
+
+Тело ответа сериализуется один раз на пару (tour_id, язык) и хранится
+вместе с ETag. Кэш прогревается после пересчета графа похожих туров,
+поэтому view делает только выборку из кэша.
+"""
+import hashlib
+import json
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import prefetch_related_objects
+from django.utils import translation
+
+from core.url_cache import prime_absolute_urls
+
+from .models import Tour
+
+logger = logging.getLogger("tours.cache")
+
+SIMILAR_TOURS_LIMIT = 4
+SIMILAR_TOURS_CACHE_TIMEOUT = getattr(
+    settings, "SIMILAR_TOURS_CACHE_TIMEOUT", 60 * 60 * 24 * 7
+)
+
+
+def _languages():
+    return [code for code, _name in settings.LANGUAGES]
+
+
+def similar_tours_cache_key(tour_id, language):
+    return f"tours:similar:{tour_id}:{language}"
+
+
+def serialize_tour_card(tour):
+    """Карточка тура для AJAX-ответов"""
+    return {
+        "id": tour.id,
+        "title": tour.safe_translation_getter("title", any_language=True),
+        "short_description": tour.safe_translation_getter(
+            "short_description", any_language=True
+        ),
+        "price": float(tour.price_adult),
+        "duration": tour.get_duration_display(),
+        "rating": float(tour.rating),
+        "featured_image": tour.featured_image.url if tour.featured_image else None,
+        "url": tour.get_absolute_url(),
+        "location": tour.location
+        or (
+            tour.category.safe_translation_getter("name", any_language=True)
+            if tour.category
+            else None
+        ),
+    }
+
+
+def build_similar_tours_payload(tour_id, language):
+    """Собрать тело ответа и ETag; None если тур не опубликован"""
+    with translation.override(language):
+        tour = Tour.objects.filter(id=tour_id, status="published").first()
+        if tour is None:
+            return None
+
+        similar_tours = tour.get_related_tours(limit=SIMILAR_TOURS_LIMIT)
+        # Переводы всех карточек и категорий - двумя запросами на весь список
+        prefetch_related_objects(
+            similar_tours, "translations", "category__translations"
+        )
+        prime_absolute_urls(similar_tours)
+
+        body = json.dumps(
+            {"tours": [serialize_tour_card(similar) for similar in similar_tours]},
+            ensure_ascii=False,
+        ).encode("utf-8")
+
+    return {
+        "body": body,
+        "etag": '"%s"' % hashlib.md5(body).hexdigest(),
+    }
+
+
+def get_similar_tours_payload(tour_id, language):
+    """Готовый ответ из кэша (при промахе - собрать и сохранить)"""
+    key = similar_tours_cache_key(tour_id, language)
+    payload = cache.get(key)
+    if payload is None:
+        payload = build_similar_tours_payload(tour_id, language)
+        if payload is not None:
+            cache.set(key, payload, SIMILAR_TOURS_CACHE_TIMEOUT)
+    return payload
+
+
+def refresh_similar_tours_cache(tour_ids):
+    """Пересобрать закэшированные ответы туров на всех языках"""
+    for tour_id in tour_ids:
+        for language in _languages():
+            key = similar_tours_cache_key(tour_id, language)
+            payload = build_similar_tours_payload(tour_id, language)
+            if payload is None:
+                cache.delete(key)
+            else:
+                cache.set(key, payload, SIMILAR_TOURS_CACHE_TIMEOUT)
+
+    logger.info(f"🗄️ Кэш похожих туров обновлен для {len(tour_ids)} туров")
@@ -0,0 +1,553 @@
+# backend/tours/catalogue.py
+"""
+Потоковый импорт/экспорт каталога туров.
+
+Один тур - одна запись со всем графом: поля тура, переводы, теги,
+галерея, FAQ и точки встречи (с их переводами). Форматы:
+
+* jsonl - одна JSON-запись на строку;
+* csv   - одна строка на тур, вложенные коллекции хранятся как JSON.
+
+Экспорт идет чанками по pk, импорт читает файл построчно и пишет чанками
+через bulk_create/bulk_update, поэтому память не зависит от размера
+каталога. Ключ upsert - пара (язык, slug): slug тура на языке по умолчанию
+(или на первом доступном языке, язык берется из переводов записи).
+Повторный импорт того же файла обновляет туры, а не создает дубликаты, а
+совпадение slug на другом языке не подменяет чужой тур.
+"""
+import csv
+import json
+import logging
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+from taggit.models import Tag, TaggedItem
+
+from core.autocomplete import update_autocomplete
+from core.url_cache import warm_absolute_urls
+
+from .availability import invalidate_calendar
+from .models import (
+    Tour,
+    TourCategory,
+    TourDifficulty,
+    TourFAQ,
+    TourImage,
+    TourMeetingPoint,
+)
+from .nearby import invalidate_tour_cells
+from .schema import invalidate_tour_schema
+from .search import update_tour_search_vectors
+
+logger = logging.getLogger("tours.catalogue")
+
+DEFAULT_CHUNK_SIZE = 200
+
+FORMATS = ("jsonl", "csv")
+
+# Поля тура без связей, счетчиков и служебных дат
+TOUR_FIELDS = (
+    "status",
+    "tour_type",
+    "location",
+    "duration_hours",
+    "duration_minutes",
+    "max_group_size",
+    "price_adult",
+    "price_child",
+    "price_private",
+    "free_cancellation",
+    "reserve_now_pay_later",
+    "instant_confirmation",
+    "languages",
+    "featured_image",
+    "rating",
+    "reviews_count",
+    "is_featured",
+    "sort_order",
+)
+
+IMAGE_FIELDS = ("image", "alt_text", "caption", "sort_order", "is_featured")
+FAQ_FIELDS = ("sort_order", "is_active")
+MEETING_POINT_FIELDS = (
+    "meeting_time",
+    "latitude",
+    "longitude",
+    "google_maps_url",
+    "sort_order",
+    "is_primary",
+)
+
+# Вложенные коллекции: ключ записи -> (модель, поля)
+CHILDREN = {
+    "images": (TourImage, IMAGE_FIELDS),
+    "faqs": (TourFAQ, FAQ_FIELDS),
+    "meeting_points": (TourMeetingPoint, MEETING_POINT_FIELDS),
+}
+
+# Колонки CSV, которые хранятся как JSON
+CSV_NESTED = ("translations", "tags", "images", "faqs", "meeting_points")
+CSV_COLUMNS = ("slug", "author", "category", "difficulty", *TOUR_FIELDS, *CSV_NESTED)
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _translated_fields(model):
+    """Редактируемые поля перевода (без search_vector и т.п.)"""
+    translation_meta = model._parler_meta.root_model._meta
+    return [
+        name
+        for name in model._parler_meta.get_all_fields()
+        if translation_meta.get_field(name).editable
+    ]
+
+
+def _translation_slug(obj):
+    """Slug на языке по умолчанию, иначе первый доступный"""
+    slugs = {t.language_code: t.slug for t in obj.translations.all()}
+    return slugs.get(settings.LANGUAGE_CODE) or next(iter(slugs.values()), None)
+
+
+# --- Экспорт ---------------------------------------------------------------
+
+
+def _dump_value(obj, name):
+    value = getattr(obj, name)
+    if hasattr(value, "field") and hasattr(value, "name"):
+        # FieldFile -> путь в хранилище (сами файлы переносятся отдельно)
+        return value.name or ""
+    return value
+
+
+def _dump_translations(obj):
+    fields = _translated_fields(type(obj))
+    return {
+        translation.language_code: {
+            name: getattr(translation, name) for name in fields
+        }
+        for translation in obj.translations.all()
+    }
+
+
+def _dump_children(objects, fields, translatable=False):
+    items = []
+    for obj in objects:
+        item = {name: _dump_value(obj, name) for name in fields}
+        if translatable:
+            item["translations"] = _dump_translations(obj)
+        items.append(item)
+    return items
+
+
+def serialize_tour(tour):
+    """Запись каталога для тура (связи должны быть предзагружены)"""
+    record = {
+        "slug": _translation_slug(tour),
+        "author": tour.author.username,
+        "category": _translation_slug(tour.category) if tour.category else None,
+        "difficulty": tour.difficulty.name if tour.difficulty else None,
+    }
+    record.update({name: _dump_value(tour, name) for name in TOUR_FIELDS})
+    record["translations"] = _dump_translations(tour)
+    record["tags"] = sorted(tag.name for tag in tour.tags.all())
+    record["images"] = _dump_children(tour.images.all(), IMAGE_FIELDS)
+    record["faqs"] = _dump_children(tour.faqs.all(), FAQ_FIELDS, translatable=True)
+    record["meeting_points"] = _dump_children(
+        tour.meeting_points.all(), MEETING_POINT_FIELDS, translatable=True
+    )
+    return record
+
+
+def iter_tour_records(queryset=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Записи каталога чанками по pk - в памяти не больше одного чанка"""
+    queryset = (queryset if queryset is not None else Tour.objects.all()).select_related(
+        "author", "category", "difficulty"
+    ).prefetch_related(
+        "translations",
+        "category__translations",
+        "tags",
+        Prefetch("images", queryset=TourImage.objects.order_by("sort_order", "pk")),
+        Prefetch(
+            "faqs",
+            queryset=TourFAQ.objects.order_by("sort_order", "pk").prefetch_related(
+                "translations"
+            ),
+        ),
+        Prefetch(
+            "meeting_points",
+            queryset=TourMeetingPoint.objects.order_by(
+                "sort_order", "pk"
+            ).prefetch_related("translations"),
+        ),
+    )
+
+    last_pk = 0
+    while True:
+        chunk = list(queryset.filter(pk__gt=last_pk).order_by("pk")[:chunk_size])
+        if not chunk:
+            return
+        for tour in chunk:
+            yield serialize_tour(tour)
+        last_pk = chunk[-1].pk
+
+
+def write_records(records, stream, fmt):
+    """Записать записи в поток; возвращает количество"""
+    count = 0
+    if fmt == "csv":
+        writer = csv.DictWriter(stream, fieldnames=CSV_COLUMNS)
+        writer.writeheader()
+        for record in records:
+            row = dict(record)
+            for column in CSV_NESTED:
+                row[column] = json.dumps(
+                    row.get(column), cls=DjangoJSONEncoder, ensure_ascii=False
+                )
+            writer.writerow(row)
+            count += 1
+    else:
+        for record in records:
+            stream.write(json.dumps(record, cls=DjangoJSONEncoder, ensure_ascii=False))
+            stream.write("\n")
+            count += 1
+    return count
+
+
+# --- Импорт ----------------------------------------------------------------
+
+
+def read_records(stream, fmt):
+    """Записи из потока по одной"""
+    if fmt == "csv":
+        for row in csv.DictReader(stream):
+            for column in CSV_NESTED:
+                if row.get(column):
+                    row[column] = json.loads(row[column])
+                else:
+                    row.pop(column, None)
+            yield row
+    else:
+        for line_number, line in enumerate(stream, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"line {line_number}: {e}") from e
+
+
+def _load_value(model, name, value):
+    """Значение из файла -> значение поля (CSV отдает все строками)"""
+    field = model._meta.get_field(name)
+    if value in ("", None):
+        if field.null:
+            return None
+        if value is None:
+            return field.get_default()
+    return field.to_python(value)
+
+
+def _check_record(record):
+    """
+    Преобразовать все значения записи до записи в БД: строка с ошибкой
+    (например, пустое число в CSV) отбрасывается, а не валит весь чанк.
+    """
+    for name in TOUR_FIELDS:
+        if name in record:
+            _load_value(Tour, name, record[name])
+    _check_translations(Tour, record.get("translations"))
+    for key, (model, fields) in CHILDREN.items():
+        for item in record.get(key) or []:
+            for name in fields:
+                if name in item:
+                    _load_value(model, name, item[name])
+            if hasattr(model, "_parler_meta"):
+                _check_translations(model, item.get("translations"))
+
+
+def _check_translations(model, translations):
+    translation_model = model._parler_meta.root_model
+    fields = _translated_fields(model)
+    for values in (translations or {}).values():
+        for name in fields:
+            if name in values:
+                _load_value(translation_model, name, values[name])
+
+
+def _error_message(error):
+    if isinstance(error, ValidationError):
+        return "; ".join(error.messages)
+    return str(error)
+
+
+def _apply_values(obj, values, fields):
+    for name in fields:
+        if name in values:
+            setattr(obj, name, _load_value(type(obj), name, values[name]))
+
+
+def _record_key(record):
+    """(язык, slug) записи: язык перевода с этим slug, иначе язык по умолчанию"""
+    slug = record["slug"]
+    translations = record.get("translations") or {}
+    languages = [
+        language
+        for language, values in translations.items()
+        if (values or {}).get("slug") == slug
+    ]
+    if settings.LANGUAGE_CODE in languages or not languages:
+        return settings.LANGUAGE_CODE, slug
+    return languages[0], slug
+
+
+def _translation_slugs(model, keys):
+    """(язык, slug) -> id объекта по переводам"""
+    keys = set(keys)
+    rows = model._parler_meta.root_model.objects.filter(
+        language_code__in={language for language, _ in keys},
+        slug__in={slug for _, slug in keys},
+    ).values_list("language_code", "slug", "master_id")
+    return {
+        (language, slug): master_id
+        for language, slug, master_id in rows
+        if (language, slug) in keys
+    }
+
+
+def _upsert_translations(pairs):
+    """pairs: [(объект, {язык: значения})] - bulk_create/bulk_update переводов"""
+    if not pairs:
+        return
+    model = type(pairs[0][0])
+    translation_model = model._parler_meta.root_model
+    fields = _translated_fields(model)
+
+    existing = {
+        (translation.master_id, translation.language_code): translation
+        for translation in translation_model.objects.filter(
+            master_id__in={obj.pk for obj, _ in pairs}
+        )
+    }
+
+    to_create, to_update = [], []
+    for obj, translations in pairs:
+        for language, values in translations.items():
+            translation = existing.get((obj.pk, language))
+            if translation is None:
+                translation = translation_model(master_id=obj.pk, language_code=language)
+                to_create.append(translation)
+            else:
+                to_update.append(translation)
+            _apply_values(translation, values, fields)
+
+    translation_model.objects.bulk_update(to_update, fields)
+    translation_model.objects.bulk_create(to_create)
+
+
+def _replace_children(key, pairs):
+    """Коллекция из записи заменяет текущую коллекцию тура целиком"""
+    model, fields = CHILDREN[key]
+    pairs = [(record, tour) for record, tour in pairs if key in record]
+    if not pairs:
+        return
+
+    model.objects.filter(tour_id__in=[tour.pk for _, tour in pairs]).delete()
+
+    created = []
+    for record, tour in pairs:
+        for item in record[key] or []:
+            obj = model(tour_id=tour.pk)
+            _apply_values(obj, item, fields)
+            if hasattr(obj, "update_geohash"):
+                # bulk_create не вызывает save()
+                obj.update_geohash()
+            created.append((obj, item.get("translations") or {}))
+
+    model.objects.bulk_create([obj for obj, _ in created])
+    if hasattr(model, "_parler_meta"):
+        _upsert_translations(created)
+
+
+def _replace_tags(pairs):
+    pairs = [(record, tour) for record, tour in pairs if "tags" in record]
+    if not pairs:
+        return
+
+    names = {name for record, _ in pairs for name in record["tags"] or []}
+    tags = {tag.name: tag for tag in Tag.objects.filter(name__in=names)}
+    for name in names - set(tags):
+        # save() генерирует уникальный slug тега
+        tags[name] = Tag.objects.create(name=name)
+
+    content_type = ContentType.objects.get_for_model(Tour)
+    TaggedItem.objects.filter(
+        content_type=content_type, object_id__in=[tour.pk for _, tour in pairs]
+    ).delete()
+    TaggedItem.objects.bulk_create(
+        [
+            TaggedItem(content_type=content_type, object_id=tour.pk, tag=tags[name])
+            for record, tour in pairs
+            for name in dict.fromkeys(record["tags"] or [])
+        ]
+    )
+
+
+def _import_chunk(records, default_author, stats):
+    # Последняя запись с тем же ключом побеждает
+    records = {_record_key(record): record for record in records}
+
+    existing_ids = _translation_slugs(Tour, records)
+    # Тот же slug на другом языке - это перевод другого тура, его не трогаем
+    taken = dict(
+        Tour._parler_meta.root_model.objects.filter(
+            slug__in={key[1] for key in records if key not in existing_ids}
+        ).values_list("slug", "language_code")
+    )
+    for key in [key for key in records if key not in existing_ids and key[1] in taken]:
+        records.pop(key)
+        stats["failed"].append(
+            f"{key[1]}: slug belongs to a '{taken[key[1]]}' translation, not '{key[0]}'"
+        )
+    tours = Tour.objects.in_bulk(set(existing_ids.values()))
+    # Категория в записи - ее slug на языке по умолчанию
+    categories = {
+        slug: category_id
+        for (_, slug), category_id in _translation_slugs(
+            TourCategory,
+            {
+                (settings.LANGUAGE_CODE, record["category"])
+                for record in records.values()
+                if record.get("category")
+            },
+        ).items()
+    }
+    difficulties = dict(
+        TourDifficulty.objects.filter(
+            name__in={
+                record["difficulty"] for record in records.values() if record.get("difficulty")
+            }
+        ).values_list("name", "id")
+    )
+    authors = dict(
+        User.objects.filter(
+            username__in={
+                record["author"] for record in records.values() if record.get("author")
+            }
+        ).values_list("username", "id")
+    )
+
+    now = timezone.now()
+    to_create, to_update = [], []
+    for key, record in records.items():
+        tour = tours.get(existing_ids.get(key))
+        if tour is None:
+            tour = Tour()
+            to_create.append((record, tour))
+        else:
+            tour.updated_at = now
+            to_update.append((record, tour))
+
+        _apply_values(tour, record, TOUR_FIELDS)
+
+        if record.get("author") in authors:
+            tour.author_id = authors[record["author"]]
+        elif tour.author_id is None:
+            tour.author_id = default_author.pk
+
+        category = record.get("category")
+        if category and category not in categories:
+            stats["warnings"].append(f"{record['slug']}: unknown category '{category}'")
+        if "category" in record:
+            tour.category_id = categories.get(category)
+
+        difficulty = record.get("difficulty")
+        if difficulty and difficulty not in difficulties:
+            stats["warnings"].append(f"{record['slug']}: unknown difficulty '{difficulty}'")
+        if "difficulty" in record:
+            tour.difficulty_id = difficulties.get(difficulty)
+
+    Tour.objects.bulk_create([tour for _, tour in to_create])
+    Tour.objects.bulk_update(
+        [tour for _, tour in to_update],
+        [*TOUR_FIELDS, "author", "category", "difficulty", "updated_at"],
+    )
+
+    pairs = to_create + to_update
+    _upsert_translations(
+        [(tour, record.get("translations") or {}) for record, tour in pairs]
+    )
+    for key in CHILDREN:
+        _replace_children(key, pairs)
+    _replace_tags(pairs)
+
+    stats["created"] += len(to_create)
+    stats["updated"] += len(to_update)
+    return [tour.pk for _, tour in pairs]
+
+
+def _refresh_derived(tour_ids):
+    """bulk-операции не шлют сигналы - обновляем кэши туров вручную"""
+    warm_absolute_urls(Tour.objects.filter(pk__in=tour_ids).prefetch_related("translations"))
+    for tour_id in tour_ids:
+        invalidate_calendar(tour_id)
+        invalidate_tour_schema(tour_id)
+    invalidate_tour_cells(tour_ids)
+    update_tour_search_vectors(tour_ids)
+    update_autocomplete("tour", tour_ids)
+
+
+def import_tour_records(
+    records, default_author, chunk_size=DEFAULT_CHUNK_SIZE, refresh=True
+):
+    """
+    Upsert туров из потока записей.
+
+    Каждый чанк пишется в своей транзакции; refresh=False не трогает кэши
+    (для пробного прогона с откатом). Записи с некорректными значениями
+    пропускаются и попадают в 'failed'. Возвращает статистику
+    {'created', 'updated', 'warnings', 'failed', 'tour_ids'}.
+    """
+    stats = {"created": 0, "updated": 0, "warnings": [], "failed": [], "tour_ids": set()}
+
+    for chunk in _chunks(records, chunk_size):
+        valid = []
+        for record in chunk:
+            if not record.get("slug"):
+                raise ValueError(f"record without slug: {str(record)[:100]}")
+            try:
+                _check_record(record)
+            except (ValueError, ValidationError) as e:
+                stats["failed"].append(f"{record['slug']}: {_error_message(e)}")
+                logger.warning(f"⚠️ Тур {record['slug']} не импортирован: {_error_message(e)}")
+                continue
+            valid.append(record)
+        if not valid:
+            continue
+        chunk = valid
+
+        with transaction.atomic():
+            tour_ids = _import_chunk(chunk, default_author, stats)
+        if refresh:
+            _refresh_derived(tour_ids)
+        stats["tour_ids"].update(tour_ids)
+        logger.info(
+            f"📦 Импорт каталога: создано {stats['created']}, обновлено {stats['updated']}, "
+            f"с ошибками {len(stats['failed'])}"
+        )
+
+    return stats
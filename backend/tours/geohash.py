@@ -0,0 +1,87 @@
+# backend/tours/geohash.py
+"""
+Geohash без внешних зависимостей.
+
+Точка кодируется строкой base32: каждый символ делит ячейку на 32 части,
+поэтому у точек, которые находятся рядом, общий префикс. Поиск по
+префиксу работает на обычном индексе по строке, и PostGIS не нужен.
+"""
+import math
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+# Точность, с которой хранится хэш точки (~5 x 5 м)
+GEOHASH_PRECISION = 9
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.32
+
+
+def encode(latitude, longitude, precision=GEOHASH_PRECISION):
+    """(lat, lon) -> geohash заданной длины"""
+    latitude, longitude = float(latitude), float(longitude)
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(chars) < precision:
+        value, bounds = (longitude, lon_range) if even else (latitude, lat_range)
+        middle = (bounds[0] + bounds[1]) / 2
+        if value >= middle:
+            bits = (bits << 1) | 1
+            bounds[0] = middle
+        else:
+            bits <<= 1
+            bounds[1] = middle
+        even = not even
+
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(BASE32[bits])
+            bits = 0
+            bit_count = 0
+
+    return "".join(chars)
+
+
+def cell_size(precision):
+    """Размер ячейки в градусах: (широта, долгота)"""
+    lon_bits = math.ceil(5 * precision / 2)
+    lat_bits = 5 * precision - lon_bits
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lon_bits
+
+
+def cell_size_km(precision, latitude):
+    """Минимальная сторона ячейки в км на данной широте"""
+    lat_degrees, lon_degrees = cell_size(precision)
+    return min(
+        lat_degrees * KM_PER_DEGREE,
+        lon_degrees * KM_PER_DEGREE * math.cos(math.radians(float(latitude))),
+    )
+
+
+def surrounding_cells(latitude, longitude, precision):
+    """Ячейка точки и 8 соседних - покрывают круг радиусом в размер ячейки"""
+    latitude, longitude = float(latitude), float(longitude)
+    lat_step, lon_step = cell_size(precision)
+
+    cells = set()
+    for d_lat in (-lat_step, 0, lat_step):
+        lat = min(max(latitude + d_lat, -90.0), 90.0)
+        for d_lon in (-lon_step, 0, lon_step):
+            lon = (longitude + d_lon + 180.0) % 360.0 - 180.0
+            cells.add(encode(lat, lon, precision))
+    return cells
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Расстояние по большому кругу в км"""
+    lat1, lon1, lat2, lon2 = map(math.radians, map(float, (lat1, lon1, lat2, lon2)))
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
@@ -0,0 +1,39 @@
+# backend/tours/management/commands/export_tours.py
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tours.catalogue import DEFAULT_CHUNK_SIZE, FORMATS, iter_tour_records, write_records
+from tours.models import Tour
+
+
+class Command(BaseCommand):
+    help = 'Stream the tour catalogue (translations, tags, images, FAQs, meeting points) to JSONL or CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', nargs='?', default='-', help="Output file ('-' for stdout)")
+        parser.add_argument('--format', choices=FORMATS, help='Defaults to the file extension, jsonl otherwise')
+        parser.add_argument('--status', choices=[code for code, _ in Tour.STATUS_CHOICES], help='Export only tours with this status')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        output = options['output']
+        fmt = options['format'] or ('csv' if output.endswith('.csv') else 'jsonl')
+
+        queryset = Tour.objects.all()
+        if options['status']:
+            queryset = queryset.filter(status=options['status'])
+
+        records = iter_tour_records(queryset, chunk_size=options['chunk_size'])
+
+        if output == '-':
+            write_records(records, sys.stdout, fmt)
+            return
+
+        try:
+            with open(output, 'w', encoding='utf-8', newline='') as stream:
+                count = write_records(records, stream, fmt)
+        except OSError as e:
+            raise CommandError(f'Cannot write {output}: {e}')
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Exported {count} tours to {output} ({fmt})'))
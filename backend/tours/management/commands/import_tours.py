@@ -0,0 +1,74 @@
+# backend/tours/management/commands/import_tours.py
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, transaction
+
+from tours.cache import refresh_similar_tours_cache
+from tours.catalogue import DEFAULT_CHUNK_SIZE, FORMATS, import_tour_records, read_records
+from tours.similarity import rebuild_similarity_graph
+
+
+class Command(BaseCommand):
+    help = 'Upsert tours by slug from a JSONL/CSV catalogue produced by export_tours'
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', help='Catalogue file (JSONL or CSV)')
+        parser.add_argument('--format', choices=FORMATS, help='Defaults to the file extension, jsonl otherwise')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument('--author', help='Username for tours whose author does not exist here (default: first superuser)')
+        parser.add_argument('--dry-run', action='store_true', help='Import inside a transaction and roll it back')
+
+    def get_default_author(self, username):
+        if username:
+            author = User.objects.filter(username=username).first()
+            if author is None:
+                raise CommandError(f'User {username} does not exist')
+            return author
+
+        author = User.objects.filter(is_superuser=True).order_by('pk').first()
+        if author is None:
+            raise CommandError('No superuser found, pass --author')
+        return author
+
+    def handle(self, *args, **options):
+        path = options['input']
+        fmt = options['format'] or ('csv' if path.endswith('.csv') else 'jsonl')
+        author = self.get_default_author(options['author'])
+
+        try:
+            with open(path, encoding='utf-8', newline='') as stream:
+                records = read_records(stream, fmt)
+                if options['dry_run']:
+                    with transaction.atomic():
+                        stats = import_tour_records(records, author, options['chunk_size'], refresh=False)
+                        transaction.set_rollback(True)
+                else:
+                    stats = import_tour_records(records, author, options['chunk_size'])
+        except OSError as e:
+            raise CommandError(f'Cannot read {path}: {e}')
+        except (ValueError, ValidationError, DatabaseError) as e:
+            raise CommandError(f'Import failed: {e}')
+
+        for warning in stats['warnings']:
+            self.stdout.write(self.style.WARNING(f'⚠️  {warning}'))
+        for failure in stats['failed']:
+            self.stdout.write(self.style.ERROR(f'❌ {failure}'))
+
+        if options['dry_run']:
+            self.stdout.write(
+                f"🧪 Dry run: {stats['created']} would be created, {stats['updated']} updated, "
+                f"{len(stats['failed'])} failed"
+            )
+            return
+
+        # bulk-запись не шлет сигналы - граф похожих туров пересчитываем один раз
+        self.stdout.write('🔗 Rebuilding related-tours graph...')
+        refresh_similar_tours_cache(rebuild_similarity_graph() | stats['tour_ids'])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ Imported tours: {stats['created']} created, {stats['updated']} updated, "
+                f"{len(stats['failed'])} failed"
+            )
+        )
@@ -0,0 +1,19 @@
+# backend/tours/management/commands/rebuild_tour_similarity.py
+from django.core.management.base import BaseCommand
+
+from tours.cache import refresh_similar_tours_cache
+from tours.similarity import TOP_K, rebuild_similarity_graph
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the precomputed related-tours graph (top-K neighbours per tour)'
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'🔗 Rebuilding related-tours graph (top {TOP_K})...')
+
+        tour_ids = rebuild_similarity_graph()
+        refresh_similar_tours_cache(tour_ids)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ Related tours computed for {len(tour_ids)} tours')
+        )
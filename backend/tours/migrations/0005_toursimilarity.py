@@ -0,0 +1,31 @@
+# Generated by Django 4.2.11 on 2026-10-19 06:31
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tours', '0004_fix_meeting_points_related_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TourSimilarity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(default=0)),
+                ('rank', models.PositiveSmallIntegerField(default=0, help_text='0 = most similar')),
+                ('related_tour', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbour_links', to='tours.tour')),
+                ('tour', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similarities', to='tours.tour')),
+            ],
+            options={
+                'verbose_name': 'Tour Similarity',
+                'verbose_name_plural': 'Tour Similarities',
+                'ordering': ['tour', 'rank'],
+                'indexes': [models.Index(fields=['tour', 'rank'], name='tours_tours_tour_id_a107be_idx')],
+                'unique_together': {('tour', 'related_tour')},
+            },
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 4.2.11 on 2026-10-19 06:35
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tours', '0005_toursimilarity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TourPriceRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text="e.g. 'High season', 'Harvest weekends'", max_length=100)),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField()),
+                ('weekdays', models.CharField(blank=True, help_text='Comma-separated weekdays, 0=Monday ... 6=Sunday. Leave blank for every day.', max_length=20)),
+                ('price_adult', models.DecimalField(decimal_places=2, max_digits=8)),
+                ('price_child', models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True)),
+                ('price_private', models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True)),
+                ('priority', models.IntegerField(default=0, help_text='Higher priority wins when rules overlap')),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('tour', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='price_rules', to='tours.tour')),
+            ],
+            options={
+                'verbose_name': 'Price Rule',
+                'verbose_name_plural': 'Price Rules',
+                'ordering': ['-priority', 'start_date'],
+                'indexes': [models.Index(fields=['tour', 'start_date', 'end_date'], name='tours_tourp_tour_id_9bc9e3_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='TourDeparture',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('start_time', models.TimeField(blank=True, help_text='Departure time (optional)', null=True)),
+                ('capacity', models.PositiveIntegerField(blank=True, help_text="Seats for this departure. Leave blank to use the tour's max group size.")),
+                ('seats_booked', models.PositiveIntegerField(default=0)),
+                ('status', models.CharField(choices=[('open', 'Open'), ('closed', 'Closed'), ('cancelled', 'Cancelled')], default='open', max_length=10)),
+                ('price_adult', models.DecimalField(blank=True, decimal_places=2, help_text='Override adult price for this date (optional)', max_digits=8, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('tour', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='departures', to='tours.tour')),
+            ],
+            options={
+                'verbose_name': 'Departure',
+                'verbose_name_plural': 'Departures',
+                'ordering': ['date', 'start_time'],
+                'indexes': [models.Index(fields=['tour', 'status', 'date'], name='tours_tourd_tour_id_00e28e_idx'), models.Index(fields=['date', 'status'], name='tours_tourd_date_700da7_idx')],
+                'unique_together': {('tour', 'date', 'start_time')},
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.11 on 2026-10-19 06:39
+
+from django.db import migrations, models
+
+from tours.geohash import encode
+
+
+def fill_geohash(apps, schema_editor):
+    TourMeetingPoint = apps.get_model('tours', 'TourMeetingPoint')
+    points = list(
+        TourMeetingPoint.objects.filter(latitude__isnull=False, longitude__isnull=False)
+    )
+    for point in points:
+        point.geohash = encode(point.latitude, point.longitude)
+    TourMeetingPoint.objects.bulk_update(points, ['geohash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tours', '0006_tour_departures_price_rules'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tourmeetingpoint',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='Geohash of the coordinates (filled on save)', max_length=12),
+        ),
+        migrations.RunPython(fill_geohash, migrations.RunPython.noop),
+    ]
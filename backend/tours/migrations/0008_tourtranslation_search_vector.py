@@ -0,0 +1,24 @@
+# Generated by Django 4.2.11 on 2026-10-19 06:42
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tours', '0007_tourmeetingpoint_geohash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tourtranslation',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='tourtranslation',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='tour_search_gin'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.11 on 2026-10-19 06:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tours', '0008_tourtranslation_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tour',
+            index=models.Index(fields=['status', '-is_featured', 'sort_order', '-created_at', '-id'], name='tour_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tour',
+            index=models.Index(fields=['category', 'status', '-is_featured', 'sort_order', '-created_at', '-id'], name='tour_cat_keyset_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.11 on 2026-10-19 07:13
+
+from django.db import migrations, models
+
+
+def fill_dimensions(apps, schema_editor):
+    """Габариты - из core.MediaFile (хэш посчитается при следующей замене файла)"""
+    Tour = apps.get_model('tours', 'Tour')
+    MediaFile = apps.get_model('core', 'MediaFile')
+    objects = list(Tour.objects.exclude(featured_image='').exclude(featured_image__isnull=True))
+    media = MediaFile.objects.in_bulk({obj.featured_image.name for obj in objects}, field_name='path')
+    for obj in objects:
+        info = media.get(obj.featured_image.name)
+        if info is not None:
+            obj.featured_image_width, obj.featured_image_height = info.width, info.height
+    Tour.objects.bulk_update(objects, ['featured_image_width', 'featured_image_height'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_image_job'),
+        ('tours', '0009_tour_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tour',
+            name='featured_image_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='tour',
+            name='featured_image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='tour',
+            name='featured_image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(fill_dimensions, migrations.RunPython.noop),
+    ]
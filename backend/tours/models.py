@@ -1,6 +1,8 @@
 # backend/tours/models.py - ИСПРАВЛЕННАЯ ВЕРСИЯ БЕЗ КОНФЛИКТОВ
 import logging
 import os
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.urls import reverse
 from django.utils.text import slugify
@@ -9,8 +11,25 @@ from ckeditor_uploader.fields import RichTextUploadingField
 from parler.models import TranslatableModel, TranslatedFields
 from taggit.managers import TaggableManager
 
+from core.image_changes import ImageChangeTrackingMixin
+from core.url_cache import cached_absolute_url
+
+from .geohash import encode as encode_geohash
+
 logger = logging.getLogger('tours.models')
 
+# Туры со статичными страницами: slug -> имя URL
+STATIC_TOUR_URL_NAMES = {
+    'barolo-wine-tasting-tour-from-milan-alba': 'alba_barolo_tour',
+    'barolo-barbaresco-wine-tasting-from-milan-visit-alba': 'barolo_barbaresco_from_milan',
+    'kick-off-walking-tour-in-milano': 'kick_off_walking_tour_in_milano',
+    'como-city-walking-tour-with-the-boat-cruise-small-group-tour': 'como_city_walking_tour',
+    'lake-como-and-lugano-small-group-tour-from-milan': 'lake_como_and_lugano_tour',
+    'bellagio-varenna-from-milan': 'bellagio_varenna_tour',
+    'from-milan-lake-como-and-lugano-tour-with-morcote': 'lake_como_lugano_morcote_tour',
+}
+
+
 class TourCategory(TranslatableModel):
     """Категории туров (Wine Tours, Lake Como Tours, etc.)"""
     translations = TranslatedFields(
@@ -61,8 +80,9 @@ class TourDifficulty(models.Model):
         return f"{self.name} (Level {self.level})"
 
 
-class Tour(TranslatableModel):
+class Tour(ImageChangeTrackingMixin, TranslatableModel):
     """Основная модель тура"""
+    tracked_image_fields = ('featured_image',)
     
     STATUS_CHOICES = [
         ('draft', 'Draft'),
@@ -129,6 +149,10 @@ class Tour(TranslatableModel):
         upload_to='tours/featured/', 
         help_text="Main tour image (recommended: 1200x800px)"
     )
+    # Отпечаток файла: по нему видно, что изображение действительно заменили
+    featured_image_hash = models.CharField(max_length=64, blank=True, editable=False)
+    featured_image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    featured_image_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
     
     # Рейтинг и отзывы
     rating = models.DecimalField(
@@ -158,6 +182,15 @@ class Tour(TranslatableModel):
         indexes = [
             models.Index(fields=['status', 'is_featured']),
             models.Index(fields=['category', 'status']),
+            # Keyset пагинация списков: порядок из Meta.ordering + id
+            models.Index(
+                fields=['status', '-is_featured', 'sort_order', '-created_at', '-id'],
+                name='tour_keyset_idx',
+            ),
+            models.Index(
+                fields=['category', 'status', '-is_featured', 'sort_order', '-created_at', '-id'],
+                name='tour_cat_keyset_idx',
+            ),
         ]
     
     def __str__(self):
@@ -229,11 +262,21 @@ class Tour(TranslatableModel):
             blank=True,
             help_text="SEO keywords, separated by commas"
         ),
+        
+        # Полнотекстовый поиск (см. core.search)
+        search_vector=SearchVectorField(null=True, editable=False),
+        meta={
+            'indexes': [GinIndex(fields=['search_vector'], name='tour_search_gin')],
+        },
     )
     
     # Методы модели
     def get_absolute_url(self):
-        """Получаем URL тура"""
+        """Получаем URL тура (из общего кэша путей)"""
+        return cached_absolute_url(self, self.build_absolute_url)
+    
+    def build_absolute_url(self):
+        """Вычисляем URL тура для активного языка"""
         slug = self.safe_translation_getter('slug', any_language=True)
         if not slug:
             # Если нет slug, генерируем его из title
@@ -243,20 +286,9 @@ class Tour(TranslatableModel):
             else:
                 slug = f"tour-{self.pk}"
         
-        # Проверяем, есть ли статичный URL для этого тура
-        static_tours_mapping = {
-            'barolo-wine-tasting-tour-from-milan-alba': 'alba_barolo_tour',
-            'barolo-barbaresco-wine-tasting-from-milan-visit-alba': 'barolo_barbaresco_from_milan',
-            'kick-off-walking-tour-in-milano': 'kick_off_walking_tour_in_milano',
-            'como-city-walking-tour-with-the-boat-cruise-small-group-tour': 'como_city_walking_tour',
-            'lake-como-and-lugano-small-group-tour-from-milan': 'lake_como_and_lugano_tour',
-            'bellagio-varenna-from-milan': 'bellagio_varenna_tour',
-            'from-milan-lake-como-and-lugano-tour-with-morcote': 'lake_como_lugano_morcote_tour',
-        }
-        
         # Если есть статичный URL, используем его
-        if slug in static_tours_mapping:
-            return reverse(static_tours_mapping[slug])
+        if slug in STATIC_TOUR_URL_NAMES:
+            return reverse(STATIC_TOUR_URL_NAMES[slug])
         
         # Иначе используем динамический URL
         return reverse('tour_detail', kwargs={'slug': slug})
@@ -290,16 +322,42 @@ class Tour(TranslatableModel):
         self.save(update_fields=['booking_count'])
     
     def get_related_tours(self, limit=4):
-        """Похожие туры"""
-        return Tour.objects.filter(
-            category=self.category,
-            status='published'
-        ).exclude(pk=self.pk).order_by('-is_featured', 'sort_order')[:limit]
+        """Похожие туры из предрасчитанного графа (см. tours.similarity)"""
+        related = list(
+            Tour.objects.filter(
+                neighbour_links__tour=self,
+                status='published'
+            ).select_related('category').order_by('neighbour_links__rank')[:limit]
+        )
+        if related:
+            return related
+        
+        # Граф еще не построен - старый запрос по категории
+        return list(
+            Tour.objects.filter(
+                category=self.category,
+                status='published'
+            ).exclude(pk=self.pk).select_related('category').order_by('-is_featured', 'sort_order')[:limit]
+        )
     
     def save(self, *args, **kwargs):
         """Кастомная логика сохранения"""
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'featured_image' not in update_fields:
+            # Точечное сохранение (счетчики) - без работы с файлами и slug
+            self._changed_images = []
+            super().save(*args, **kwargs)
+            return
+        
         logger.info(f"🎯 Сохраняем тур ID={self.pk}")
         
+        # Метаданные файла записываем, только если изображение действительно новое
+        self._changed_images = self.detect_image_changes()
+        if update_fields is not None and self._changed_images:
+            kwargs['update_fields'] = {
+                *update_fields, 'featured_image_hash', 'featured_image_width', 'featured_image_height'
+            }
+        
         # Сначала сохраняем объект
         super().save(*args, **kwargs)
         
@@ -312,9 +370,30 @@ class Tour(TranslatableModel):
             super().save(*args, **kwargs)
             logger.info(f"🔗 Сгенерирован slug: {self.slug}")
         
+        self.remember_images()
         logger.info(f"✅ Тур сохранен, ID={self.pk}")
 
 
+class TourSimilarity(models.Model):
+    """Предрасчитанные похожие туры: top-K соседей для каждого тура"""
+    tour = models.ForeignKey(Tour, on_delete=models.CASCADE, related_name='similarities')
+    related_tour = models.ForeignKey(Tour, on_delete=models.CASCADE, related_name='neighbour_links')
+    score = models.FloatField(default=0)
+    rank = models.PositiveSmallIntegerField(default=0, help_text="0 = most similar")
+    
+    class Meta:
+        verbose_name = "Tour Similarity"
+        verbose_name_plural = "Tour Similarities"
+        ordering = ['tour', 'rank']
+        unique_together = [('tour', 'related_tour')]
+        indexes = [
+            models.Index(fields=['tour', 'rank']),
+        ]
+    
+    def __str__(self):
+        return f"{self.tour_id} -> {self.related_tour_id} ({self.score:.2f})"
+
+
 class TourImage(models.Model):
     """Галерея изображений для тура"""
     tour = models.ForeignKey(Tour, on_delete=models.CASCADE, related_name='images')
@@ -417,6 +496,10 @@ class TourMeetingPoint(TranslatableModel):
     # Координаты
     latitude = models.DecimalField(max_digits=10, decimal_places=8, blank=True, null=True)
     longitude = models.DecimalField(max_digits=11, decimal_places=8, blank=True, null=True)
+    geohash = models.CharField(
+        max_length=12, blank=True, db_index=True, editable=False,
+        help_text="Geohash of the coordinates (filled on save)"
+    )
     
     # Ссылки
     google_maps_url = models.URLField(blank=True)
@@ -443,6 +526,122 @@ class TourMeetingPoint(TranslatableModel):
         name = self.safe_translation_getter('name', any_language=True)
         tour_title = self.tour.safe_translation_getter('title', any_language=True)
         return f"{name or 'Meeting Point'} - {tour_title or f'Tour {self.tour.pk}'} ({self.meeting_time})"
+    
+    def update_geohash(self):
+        """Пересчитать geohash по координатам"""
+        if self.latitude is None or self.longitude is None:
+            self.geohash = ''
+        else:
+            self.geohash = encode_geohash(self.latitude, self.longitude)
+    
+    def save(self, *args, **kwargs):
+        self.update_geohash()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitude', 'longitude'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'geohash'}
+        super().save(*args, **kwargs)
+
+
+class TourDeparture(models.Model):
+    """Отправление тура на конкретную дату (календарь доступности)"""
+    STATUS_CHOICES = [
+        ('open', 'Open'),
+        ('closed', 'Closed'),
+        ('cancelled', 'Cancelled'),
+    ]
+    
+    tour = models.ForeignKey(Tour, on_delete=models.CASCADE, related_name='departures')
+    date = models.DateField()
+    start_time = models.TimeField(null=True, blank=True, help_text="Departure time (optional)")
+    
+    capacity = models.PositiveIntegerField(
+        blank=True,
+        help_text="Seats for this departure. Leave blank to use the tour's max group size."
+    )
+    seats_booked = models.PositiveIntegerField(default=0)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='open')
+    
+    # Цена конкретного отправления (перекрывает сезонные правила)
+    price_adult = models.DecimalField(
+        max_digits=8, decimal_places=2, null=True, blank=True,
+        help_text="Override adult price for this date (optional)"
+    )
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = "Departure"
+        verbose_name_plural = "Departures"
+        ordering = ['date', 'start_time']
+        unique_together = [('tour', 'date', 'start_time')]
+        indexes = [
+            models.Index(fields=['tour', 'status', 'date']),
+            models.Index(fields=['date', 'status']),
+        ]
+    
+    def __str__(self):
+        time = f" {self.start_time:%H:%M}" if self.start_time else ""
+        return f"Tour {self.tour_id} - {self.date}{time} ({self.seats_left}/{self.capacity})"
+    
+    @property
+    def seats_left(self):
+        return max((self.capacity or 0) - self.seats_booked, 0)
+    
+    @property
+    def is_available(self):
+        return self.status == 'open' and self.seats_left > 0
+    
+    def save(self, *args, **kwargs):
+        if self.capacity is None:
+            self.capacity = self.tour.max_group_size
+        super().save(*args, **kwargs)
+
+
+class TourPriceRule(models.Model):
+    """Сезонное правило цены для диапазона дат"""
+    tour = models.ForeignKey(Tour, on_delete=models.CASCADE, related_name='price_rules')
+    name = models.CharField(max_length=100, help_text="e.g. 'High season', 'Harvest weekends'")
+    
+    start_date = models.DateField()
+    end_date = models.DateField()
+    weekdays = models.CharField(
+        max_length=20,
+        blank=True,
+        help_text="Comma-separated weekdays, 0=Monday ... 6=Sunday. Leave blank for every day."
+    )
+    
+    price_adult = models.DecimalField(max_digits=8, decimal_places=2)
+    price_child = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True)
+    price_private = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True)
+    
+    priority = models.IntegerField(default=0, help_text="Higher priority wins when rules overlap")
+    is_active = models.BooleanField(default=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = "Price Rule"
+        verbose_name_plural = "Price Rules"
+        ordering = ['-priority', 'start_date']
+        indexes = [
+            models.Index(fields=['tour', 'start_date', 'end_date']),
+        ]
+    
+    def __str__(self):
+        return f"{self.name}: {self.start_date} - {self.end_date} (€{self.price_adult:.0f})"
+    
+    def get_weekdays_list(self):
+        """Список дней недели как числа"""
+        return [int(day) for day in self.weekdays.split(',') if day.strip().isdigit()]
+    
+    def applies_to(self, date):
+        """Действует ли правило на дату"""
+        if not self.is_active or not (self.start_date <= date <= self.end_date):
+            return False
+        weekdays = self.get_weekdays_list()
+        return not weekdays or date.weekday() in weekdays
 
 
 class BookingCode(models.Model):
@@ -0,0 +1,108 @@
+# backend/tours/nearby.py
+"""
+Поиск туров, которые отправляются рядом с точкой.
+
+У каждой точки встречи хранится geohash. Запрос берет ячейку вокруг
+точки поиска и 8 соседних (размер ячейки >= радиуса), достает кандидатов
+по префиксу хэша и уточняет расстояние по формуле гаверсинуса. Кандидаты
+каждой ячейки кэшируются и сбрасываются при изменении точек встречи или
+статуса тура.
+"""
+import logging
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+from . import geohash
+from .models import TourMeetingPoint
+
+logger = logging.getLogger("tours.nearby")
+
+NEARBY_MAX_RADIUS_KM = getattr(settings, "TOURS_NEARBY_MAX_RADIUS_KM", 300)
+NEARBY_CELL_CACHE_TIMEOUT = getattr(settings, "TOURS_NEARBY_CACHE_TIMEOUT", 60 * 60 * 24)
+
+# Самая мелкая ячейка для запросов (~1.2 x 0.6 км)
+MAX_QUERY_PRECISION = 6
+
+
+def query_precision(radius_km, latitude):
+    """Самая мелкая точность, у которой ячейка не меньше радиуса"""
+    for precision in range(MAX_QUERY_PRECISION, 0, -1):
+        if geohash.cell_size_km(precision, latitude) >= radius_km:
+            return precision
+    return 1
+
+
+def _cell_key(cell):
+    return f"tours:nearby:cell:{cell}"
+
+
+def _cell_candidates(cells):
+    """{ячейка: [(точка, тур, lat, lon), ...]} - промахи кэша одним запросом"""
+    keys = {_cell_key(cell): cell for cell in cells}
+    found = {keys[key]: value for key, value in cache.get_many(list(keys)).items()}
+
+    missing = [cell for cell in cells if cell not in found]
+    if missing:
+        for cell in missing:
+            found[cell] = []
+        rows = TourMeetingPoint.objects.filter(
+            reduce(or_, [Q(geohash__startswith=cell) for cell in missing]),
+            tour__status="published",
+        ).values_list("id", "tour_id", "latitude", "longitude", "geohash")
+        for point_id, tour_id, latitude, longitude, point_hash in rows:
+            cell = point_hash[: len(missing[0])]
+            found[cell].append((point_id, tour_id, float(latitude), float(longitude)))
+        cache.set_many(
+            {_cell_key(cell): found[cell] for cell in missing},
+            NEARBY_CELL_CACHE_TIMEOUT,
+        )
+
+    return found
+
+
+def tours_near(latitude, longitude, radius_km, limit=20):
+    """
+    Туры с точкой встречи в радиусе radius_km от (latitude, longitude).
+
+    Возвращает [(tour_id, расстояние_км, id_точки), ...] по возрастанию
+    расстояния, по одной (ближайшей) точке на тур.
+    """
+    radius_km = min(float(radius_km), NEARBY_MAX_RADIUS_KM)
+    precision = query_precision(radius_km, latitude)
+    cells = geohash.surrounding_cells(latitude, longitude, precision)
+
+    nearest = {}
+    for candidates in _cell_candidates(sorted(cells)).values():
+        for point_id, tour_id, point_lat, point_lon in candidates:
+            distance = geohash.haversine_km(latitude, longitude, point_lat, point_lon)
+            if distance <= radius_km and (
+                tour_id not in nearest or distance < nearest[tour_id][1]
+            ):
+                nearest[tour_id] = (tour_id, distance, point_id)
+
+    return sorted(nearest.values(), key=lambda item: (item[1], item[0]))[:limit]
+
+
+def invalidate_cells(hashes):
+    """Сбросить ячейки всех точностей, в которые попадают хэши точек"""
+    keys = {
+        _cell_key(point_hash[:precision])
+        for point_hash in hashes
+        if point_hash
+        for precision in range(1, MAX_QUERY_PRECISION + 1)
+    }
+    if keys:
+        cache.delete_many(list(keys))
+
+
+def invalidate_tour_cells(tour_ids):
+    """Статус тура поменялся - сбросить ячейки его точек встречи"""
+    invalidate_cells(
+        TourMeetingPoint.objects.filter(tour_id__in=tour_ids)
+        .exclude(geohash="")
+        .values_list("geohash", flat=True)
+    )
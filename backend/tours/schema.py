@@ -0,0 +1,192 @@
+# backend/tours/schema.py
+"""
+JSON-LD (schema.org) для страницы тура.
+
+Документ с узлами TouristTrip/Product (цены, рейтинг, маршрут по точкам
+встречи) и FAQPage собирается один раз на пару (тур, язык) и хранится в
+кэше готовой строкой. Сигналы сбрасывают его при изменении тура, его
+переводов, FAQ или точек встречи.
+"""
+import json
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
+from django.utils import translation
+from django.utils.html import strip_tags
+
+from .models import TourFAQ, TourMeetingPoint
+
+logger = logging.getLogger("tours.schema")
+
+TOUR_SCHEMA_CACHE_TIMEOUT = getattr(
+    settings, "TOUR_SCHEMA_CACHE_TIMEOUT", 60 * 60 * 24 * 7
+)
+
+ORGANIZATION_NAME = "Abroads Tours"
+
+
+def _languages():
+    return [code for code, _name in settings.LANGUAGES]
+
+
+def _site_url():
+    return getattr(settings, "SITE_URL", "http://localhost:8000")
+
+
+def tour_schema_cache_key(tour_id, language):
+    return f"tours:jsonld:{tour_id}:{language}"
+
+
+def _iso_duration(tour):
+    duration = f"PT{tour.duration_hours}H"
+    if tour.duration_minutes:
+        duration += f"{tour.duration_minutes}M"
+    return duration
+
+
+def _offers(tour, url):
+    prices = [
+        ("Adult", tour.price_adult),
+        ("Child", tour.price_child),
+        ("Private tour", tour.price_private),
+    ]
+    return [
+        {
+            "@type": "Offer",
+            "name": name,
+            "price": f"{price:.2f}",
+            "priceCurrency": "EUR",
+            "availability": "https://schema.org/InStock",
+            "url": url,
+        }
+        for name, price in prices
+        if price is not None
+    ]
+
+
+def _itinerary(meeting_points):
+    items = []
+    for position, point in enumerate(meeting_points, 1):
+        place = {
+            "@type": "Place",
+            "name": point.safe_translation_getter("name", any_language=True),
+            "address": point.safe_translation_getter("address", any_language=True),
+        }
+        if point.latitude is not None and point.longitude is not None:
+            place["geo"] = {
+                "@type": "GeoCoordinates",
+                "latitude": float(point.latitude),
+                "longitude": float(point.longitude),
+            }
+        items.append({"@type": "ListItem", "position": position, "item": place})
+    return {"@type": "ItemList", "itemListElement": items}
+
+
+def _faq_page(faqs):
+    return {
+        "@type": "FAQPage",
+        "mainEntity": [
+            {
+                "@type": "Question",
+                "name": faq.safe_translation_getter("question", any_language=True),
+                "acceptedAnswer": {
+                    "@type": "Answer",
+                    "text": strip_tags(
+                        faq.safe_translation_getter("answer", any_language=True) or ""
+                    ).strip(),
+                },
+            }
+            for faq in faqs
+        ],
+    }
+
+
+def build_tour_schema(tour):
+    """Документ JSON-LD для тура на активном языке"""
+    site_url = _site_url()
+    url = f"{site_url}{tour.get_absolute_url()}"
+    trip_id = f"{url}#trip"
+
+    prefetch_related_objects(
+        [tour],
+        Prefetch(
+            "meeting_points",
+            queryset=TourMeetingPoint.objects.order_by("sort_order").prefetch_related(
+                "translations"
+            ),
+            to_attr="schema_meeting_points",
+        ),
+        Prefetch(
+            "faqs",
+            queryset=TourFAQ.objects.filter(is_active=True)
+            .order_by("sort_order")
+            .prefetch_related("translations"),
+            to_attr="schema_faqs",
+        ),
+    )
+
+    name = tour.safe_translation_getter("title", any_language=True)
+    description = tour.safe_translation_getter("short_description", any_language=True)
+    image = f"{site_url}{tour.featured_image.url}" if tour.featured_image else None
+    offers = _offers(tour, url)
+
+    trip = {
+        "@type": ["TouristTrip", "Product"],
+        "@id": trip_id,
+        "name": name,
+        "description": description,
+        "url": url,
+        "duration": _iso_duration(tour),
+        "provider": {"@type": "Organization", "name": ORGANIZATION_NAME, "url": f"{site_url}/"},
+        "brand": {"@type": "Brand", "name": ORGANIZATION_NAME},
+        "offers": offers,
+    }
+    if image:
+        trip["image"] = image
+    if tour.tour_type != "custom":
+        trip["touristType"] = tour.get_tour_type_display()
+    if tour.location:
+        trip["location"] = {"@type": "Place", "name": tour.location}
+    if tour.reviews_count:
+        trip["aggregateRating"] = {
+            "@type": "AggregateRating",
+            "ratingValue": f"{tour.rating:.2f}",
+            "reviewCount": tour.reviews_count,
+            "bestRating": "5",
+        }
+    if tour.schema_meeting_points:
+        trip["itinerary"] = _itinerary(tour.schema_meeting_points)
+
+    graph = [trip]
+    if tour.schema_faqs:
+        faq_page = _faq_page(tour.schema_faqs)
+        faq_page["@id"] = f"{url}#faq"
+        faq_page["about"] = {"@id": trip_id}
+        graph.append(faq_page)
+
+    return {"@context": "https://schema.org", "@graph": graph}
+
+
+def _dumps(document):
+    # </script> внутри строк не должен закрыть тег
+    return json.dumps(document, ensure_ascii=False).replace("</", "<\\/")
+
+
+def get_tour_schema_json(tour, language):
+    """Строка JSON-LD для вставки в <script type="application/ld+json">"""
+    key = tour_schema_cache_key(tour.pk, language)
+    schema_json = cache.get(key)
+    if schema_json is None:
+        with translation.override(language):
+            schema_json = _dumps(build_tour_schema(tour))
+        cache.set(key, schema_json, TOUR_SCHEMA_CACHE_TIMEOUT)
+    return schema_json
+
+
+def invalidate_tour_schema(tour_id):
+    """Сбросить JSON-LD тура на всех языках после коммита транзакции"""
+    keys = [tour_schema_cache_key(tour_id, language) for language in _languages()]
+    transaction.on_commit(lambda: cache.delete_many(keys))
@@ -0,0 +1,50 @@
+# backend/tours/search.py
+"""Поиск по турам (инфраструктура - core.search)"""
+from django.contrib.contenttypes.models import ContentType
+from taggit.models import TaggedItem
+
+from core.search import attach_headlines, ranked_search, update_search_vectors
+
+from .models import Tour
+
+# (поле перевода, вес, HTML?)
+TOUR_SEARCH_FIELDS = [
+    ("title", "A", False),
+    ("short_description", "B", False),
+    ("tour_highlights", "C", True),
+    ("what_experience", "C", True),
+    ("why_unique", "D", True),
+]
+
+
+def _tour_extra(tour_ids):
+    """Локация и теги тура - общий текст для векторов всех языков"""
+    extra = {
+        tour_id: [(location, "B")]
+        for tour_id, location in Tour.objects.filter(pk__in=tour_ids).values_list(
+            "pk", "location"
+        )
+    }
+    for object_id, name in TaggedItem.objects.filter(
+        content_type=ContentType.objects.get_for_model(Tour),
+        object_id__in=tour_ids,
+    ).values_list("object_id", "tag__name"):
+        extra.setdefault(object_id, []).append((name, "B"))
+    return extra
+
+
+def update_tour_search_vectors(tour_ids):
+    update_search_vectors(Tour, tour_ids, TOUR_SEARCH_FIELDS, _tour_extra)
+
+
+def search_tours(query):
+    """Опубликованные туры по релевантности (по одному на тур)"""
+    return ranked_search(
+        Tour.objects.filter(status="published"),
+        query,
+        fallback_fields=("title", "short_description"),
+    )
+
+
+def attach_tour_headlines(tours, query, language):
+    return attach_headlines(tours, query, language, "short_description", html_field=False)
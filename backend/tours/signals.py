@@ -0,0 +1,221 @@
+# backend/tours/signals.py
+import logging
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+from parler.signals import post_translation_save
+
+from core.autocomplete import schedule_autocomplete_update
+from core.image_jobs import DERIVATIVES_PIPELINE, schedule_image_job
+from core.media_health import schedule_media_record
+from core.recompute import mark_dirty, register
+from core.url_cache import invalidate_absolute_urls, warm_absolute_urls
+
+from .availability import invalidate_calendar, invalidate_month
+from .models import (
+    Tour,
+    TourCategory,
+    TourDeparture,
+    TourFAQ,
+    TourImage,
+    TourMeetingPoint,
+    TourPriceRule,
+    TourSimilarity,
+)
+from .nearby import invalidate_cells, invalidate_tour_cells
+from .schema import invalidate_tour_schema
+from .search import update_tour_search_vectors
+
+logger = logging.getLogger("tours.signals")
+
+# Сохранения только счетчиков не влияют на похожесть туров
+COUNTER_FIELDS = {"views_count", "booking_count"}
+
+
+def _process_similarity(marked):
+    from .cache import refresh_similar_tours_cache
+    from .similarity import update_tours_similarity
+
+    tour_ids = marked["tour_similarity"]
+    changed = update_tours_similarity(tour_ids)
+    # Ответы самих туров и туров, у которых поменялись соседи
+    refresh_similar_tours_cache(changed | tour_ids)
+
+
+register("tour_similarity", ("tour_similarity",), _process_similarity)
+
+
+def schedule_similarity_update(tour_ids):
+    """Отметить туры для пересчета графа похожих туров воркером (core.recompute)"""
+    mark_dirty("tour_similarity", tour_ids)
+
+
+def _schedule_cache_refresh(tour_ids):
+    from .cache import refresh_similar_tours_cache
+
+    tour_ids = set(tour_ids)
+    if tour_ids:
+        transaction.on_commit(lambda: refresh_similar_tours_cache(tour_ids))
+
+
+def invalidate_tour_caches(tour_ids):
+    """
+    Все кэши, зависящие от полей самого тура. Вызывается сигналом
+    сохранения и админ-действиями на queryset.update() (сигналов нет).
+    """
+    tour_ids = set(tour_ids)
+    if not tour_ids:
+        return
+    for tour_id in tour_ids:
+        # Базовые цены и вместимость тура попадают в календарь
+        invalidate_calendar(tour_id)
+        invalidate_tour_schema(tour_id)
+    # Статус тура решает, попадают ли его точки в поиск рядом
+    invalidate_tour_cells(tour_ids)
+    transaction.on_commit(
+        lambda: warm_absolute_urls(Tour.objects.filter(pk__in=tour_ids))
+    )
+    schedule_autocomplete_update("tour", tour_ids)
+    # Ответ самого тура сразу, списки соседей - после пересчета графа
+    _schedule_cache_refresh(tour_ids)
+    schedule_similarity_update(tour_ids)
+
+
+@receiver(post_save, sender=Tour)
+def tour_saved(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= COUNTER_FIELDS:
+        return
+    invalidate_tour_caches([instance.pk])
+    # Локация хранится в самом туре (переводы обновятся своим сигналом)
+    update_tour_search_vectors([instance.pk])
+    if "featured_image" in instance.__dict__.pop("_changed_images", ()):
+        schedule_media_record(instance.featured_image)
+        # Варианты для <picture> (core.derivatives)
+        schedule_image_job(instance.featured_image, DERIVATIVES_PIPELINE)
+
+
+@receiver(pre_save, sender=TourImage)
+def tour_image_pre_save(sender, instance, **kwargs):
+    """Новый файл еще не записан в хранилище (_committed=False)"""
+    instance._image_uploaded = bool(instance.image) and not instance.image._committed
+
+
+@receiver(post_save, sender=TourImage)
+def tour_image_saved(sender, instance, **kwargs):
+    schedule_media_record(instance.image)
+    if instance.__dict__.pop("_image_uploaded", False):
+        schedule_image_job(instance.image, DERIVATIVES_PIPELINE)
+
+
+@receiver(post_delete, sender=Tour)
+def tour_deleted(sender, instance, **kwargs):
+    invalidate_absolute_urls(Tour, instance.pk)
+    schedule_autocomplete_update("tour", [instance.pk])
+    invalidate_tour_schema(instance.pk)
+    schedule_similarity_update([instance.pk])
+
+
+@receiver(m2m_changed, sender=Tour.tags.through)
+def tour_tags_changed(sender, instance, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear") and isinstance(
+        instance, Tour
+    ):
+        update_tour_search_vectors([instance.pk])
+        schedule_similarity_update([instance.pk])
+
+
+@receiver(post_translation_save, sender=Tour)
+def tour_translation_saved(sender, instance, **kwargs):
+    """Переводы сохраняются после тура - обновляем путь и карточки, где он показан"""
+    tour_id = instance.master_id
+    transaction.on_commit(
+        lambda: warm_absolute_urls(Tour.objects.filter(pk=tour_id))
+    )
+    invalidate_tour_schema(tour_id)
+    update_tour_search_vectors([tour_id])
+    schedule_autocomplete_update("tour", [tour_id])
+
+    referencing = TourSimilarity.objects.filter(
+        related_tour_id=instance.master_id
+    ).values_list("tour_id", flat=True)
+    _schedule_cache_refresh({instance.master_id, *referencing})
+
+
+@receiver(post_translation_save, sender=TourCategory)
+def tour_category_translation_saved(sender, instance, **kwargs):
+    """Название категории попадает в карточки похожих туров и подсказки"""
+    schedule_autocomplete_update("tour_category", [instance.master_id])
+    _schedule_cache_refresh(
+        TourSimilarity.objects.filter(
+            related_tour__category_id=instance.master_id
+        ).values_list("tour_id", flat=True)
+    )
+
+
+@receiver(post_save, sender=TourCategory)
+@receiver(post_delete, sender=TourCategory)
+def tour_category_changed(sender, instance, **kwargs):
+    schedule_autocomplete_update("tour_category", [instance.pk])
+
+
+@receiver(pre_save, sender=TourDeparture)
+def departure_moving(sender, instance, **kwargs):
+    """Запоминаем старую дату, чтобы сбросить и прежний месяц"""
+    instance._previous_date = None
+    if instance.pk:
+        instance._previous_date = (
+            TourDeparture.objects.filter(pk=instance.pk)
+            .values_list("date", flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=TourDeparture)
+@receiver(post_delete, sender=TourDeparture)
+def departure_changed(sender, instance, **kwargs):
+    invalidate_month(instance.tour_id, instance.date)
+    previous_date = getattr(instance, "_previous_date", None)
+    if previous_date and previous_date != instance.date:
+        invalidate_month(instance.tour_id, previous_date)
+
+
+@receiver(post_save, sender=TourPriceRule)
+@receiver(post_delete, sender=TourPriceRule)
+def price_rule_changed(sender, instance, **kwargs):
+    invalidate_calendar(instance.tour_id)
+
+
+@receiver(pre_save, sender=TourMeetingPoint)
+def meeting_point_moving(sender, instance, **kwargs):
+    """Запоминаем старый geohash, чтобы сбросить и прежние ячейки"""
+    instance._previous_geohash = ""
+    if instance.pk:
+        instance._previous_geohash = (
+            TourMeetingPoint.objects.filter(pk=instance.pk)
+            .values_list("geohash", flat=True)
+            .first()
+            or ""
+        )
+
+
+@receiver(post_save, sender=TourMeetingPoint)
+@receiver(post_delete, sender=TourMeetingPoint)
+def meeting_point_changed(sender, instance, **kwargs):
+    invalidate_cells(
+        {instance.geohash, getattr(instance, "_previous_geohash", "")}
+    )
+    invalidate_tour_schema(instance.tour_id)
+
+
+@receiver(post_save, sender=TourFAQ)
+@receiver(post_delete, sender=TourFAQ)
+def faq_changed(sender, instance, **kwargs):
+    """FAQ и точки встречи входят в JSON-LD тура"""
+    invalidate_tour_schema(instance.tour_id)
+
+
+@receiver(post_translation_save, sender=TourFAQ)
+@receiver(post_translation_save, sender=TourMeetingPoint)
+def tour_child_translation_saved(sender, instance, **kwargs):
+    invalidate_tour_schema(instance.master.tour_id)
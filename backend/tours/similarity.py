@@ -0,0 +1,197 @@
+# backend/tours/similarity.py
+"""
+Офлайн-расчет графа похожих туров.
+
+Каждая пара опубликованных туров получает оценку по категории, тегам,
+локации, типу тура и ценовому диапазону. Для каждого тура в таблице
+TourSimilarity хранятся top-K соседей, поэтому детальная страница и
+/ajax/similar/<id>/ читают готовый список одним запросом.
+
+Сохранения туров только отмечают их в очереди core.recompute
+(tours.signals.schedule_similarity_update); затронутые списки
+пересчитывает воркер process_recompute_queue (update_tours_similarity).
+"""
+import logging
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Tour, TourSimilarity
+
+logger = logging.getLogger("tours.similarity")
+
+# Количество соседей, которое храним для каждого тура
+TOP_K = getattr(settings, "TOUR_SIMILARITY_TOP_K", 8)
+
+# Веса признаков
+WEIGHTS = {
+    "category": 3.0,
+    "tags": 3.0,
+    "location": 2.0,
+    "tour_type": 1.5,
+    "price": 1.0,
+}
+
+# Границы ценовых диапазонов (EUR за взрослого)
+PRICE_BANDS = (50, 100, 150, 250, 400)
+
+
+def _price_band(price):
+    """Номер ценового диапазона для цены"""
+    if price is None:
+        return None
+    for band, limit in enumerate(PRICE_BANDS):
+        if price < limit:
+            return band
+    return len(PRICE_BANDS)
+
+
+def _location_tokens(location):
+    """'Alba, Piedmont, Italy' -> {'alba', 'piedmont', 'italy'}"""
+    return {part.strip().lower() for part in (location or "").split(",") if part.strip()}
+
+
+def _jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def tour_features(tour):
+    """Признаки тура для расчета похожести (теги должны быть предзагружены)"""
+    return {
+        "category": tour.category_id,
+        "tags": {tag.pk for tag in tour.tags.all()},
+        "location": _location_tokens(tour.location),
+        "tour_type": tour.tour_type,
+        "price_band": _price_band(tour.price_adult),
+    }
+
+
+def score_pair(a, b):
+    """Оценка похожести двух туров по их признакам"""
+    score = 0.0
+
+    if a["category"] and a["category"] == b["category"]:
+        score += WEIGHTS["category"]
+
+    score += WEIGHTS["tags"] * _jaccard(a["tags"], b["tags"])
+    score += WEIGHTS["location"] * _jaccard(a["location"], b["location"])
+
+    if a["tour_type"] != "custom" and a["tour_type"] == b["tour_type"]:
+        score += WEIGHTS["tour_type"]
+
+    if a["price_band"] is not None and b["price_band"] is not None:
+        distance = abs(a["price_band"] - b["price_band"])
+        if distance == 0:
+            score += WEIGHTS["price"]
+        elif distance == 1:
+            score += WEIGHTS["price"] / 2
+
+    return score
+
+
+def _load_features():
+    """Признаки всех опубликованных туров одним проходом"""
+    tours = (
+        Tour.objects.filter(status="published")
+        .only("id", "category_id", "location", "tour_type", "price_adult")
+        .prefetch_related("tags")
+    )
+    return {tour.pk: tour_features(tour) for tour in tours}
+
+
+def _top_neighbours(tour_id, features):
+    """Top-K соседей тура в виде [(related_id, score), ...]"""
+    own = features[tour_id]
+    scored = [
+        (other_id, score_pair(own, other))
+        for other_id, other in features.items()
+        if other_id != tour_id
+    ]
+    scored = [item for item in scored if item[1] > 0]
+    scored.sort(key=lambda item: (-item[1], item[0]))
+    return scored[:TOP_K]
+
+
+def _store_neighbours(tour_id, neighbours):
+    TourSimilarity.objects.filter(tour_id=tour_id).delete()
+    TourSimilarity.objects.bulk_create(
+        [
+            TourSimilarity(
+                tour_id=tour_id, related_tour_id=related_id, score=score, rank=rank
+            )
+            for rank, (related_id, score) in enumerate(neighbours)
+        ]
+    )
+
+
+def rebuild_similarity_graph():
+    """Полный пересчет графа для всех опубликованных туров"""
+    features = _load_features()
+
+    with transaction.atomic():
+        TourSimilarity.objects.exclude(tour_id__in=features.keys()).delete()
+        for tour_id in features:
+            _store_neighbours(tour_id, _top_neighbours(tour_id, features))
+
+    logger.info(f"🔗 Граф похожих туров пересчитан: {len(features)} туров")
+    return set(features)
+
+
+def update_tours_similarity(tour_ids):
+    """
+    Инкрементальный пересчет после изменения туров.
+
+    Пересчитываются сами измененные туры и только те соседи, в чьих
+    списках измененный тур был или может появиться. Возвращает множество
+    id туров, у которых обновился список соседей.
+    """
+    changed_ids = set(tour_ids)
+    features = _load_features()
+
+    with transaction.atomic():
+        # Туры, которые ссылались на измененные (их списки могут поменяться)
+        affected = set(
+            TourSimilarity.objects.filter(related_tour_id__in=changed_ids).values_list(
+                "tour_id", flat=True
+            )
+        )
+
+        # Снятые с публикации или удаленные туры выпадают из графа
+        removed = changed_ids - set(features)
+        if removed:
+            TourSimilarity.objects.filter(tour_id__in=removed).delete()
+            TourSimilarity.objects.filter(related_tour_id__in=removed).delete()
+
+        # Минимальная оценка в каждом сохраненном списке
+        thresholds = {}
+        counts = {}
+        for row in TourSimilarity.objects.values("tour_id", "score"):
+            tour_id = row["tour_id"]
+            counts[tour_id] = counts.get(tour_id, 0) + 1
+            thresholds[tour_id] = min(thresholds.get(tour_id, row["score"]), row["score"])
+
+        present = changed_ids & set(features)
+        for tour_id in features:
+            if tour_id in present or tour_id in affected:
+                continue
+            if counts.get(tour_id, 0) < TOP_K:
+                affected.add(tour_id)
+                continue
+            best = max(
+                (score_pair(features[tour_id], features[c]) for c in present),
+                default=0,
+            )
+            if best > thresholds.get(tour_id, 0):
+                affected.add(tour_id)
+
+        to_update = (present | affected) & set(features)
+        for tour_id in to_update:
+            _store_neighbours(tour_id, _top_neighbours(tour_id, features))
+
+    logger.info(
+        f"🔗 Граф похожих туров обновлен: изменено {sorted(changed_ids)}, "
+        f"пересчитано {len(to_update)}"
+    )
+    return to_update | removed
@@ -0,0 +1,516 @@
+# backend/tours/tests.py
+"""
+Тесты туров: python manage.py test tours --settings=config.test_settings
+
+tours.urls не подключены в config.urls (страницы туров отдает core), поэтому
+тесты API подключают их сами (ROOT_URLCONF этого модуля).
+"""
+import io
+import json
+from datetime import date, time
+from decimal import Decimal
+from unittest import mock
+
+from django.conf.urls.i18n import i18n_patterns
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import include, path
+
+from config.urls import urlpatterns as site_urlpatterns
+from core.autocomplete import autocomplete, rebuild_autocomplete_index
+from core.models import RecomputeTask
+from core.recompute import process_recompute_queue
+from core.url_cache import url_cache_key
+
+from . import geohash
+from .admin import TourAdmin
+from .availability import get_month_grid, price_for_date
+from .catalogue import import_tour_records, iter_tour_records, read_records, write_records
+from .nearby import tours_near
+from .cache import similar_tours_cache_key
+from .models import (
+    Tour,
+    TourCategory,
+    TourDeparture,
+    TourFAQ,
+    TourMeetingPoint,
+    TourPriceRule,
+    TourSimilarity,
+)
+from .schema import get_tour_schema_json, tour_schema_cache_key
+from .similarity import rebuild_similarity_graph
+
+urlpatterns = [
+    *site_urlpatterns,
+    *i18n_patterns(path("tours-api/", include("tours.urls")), prefix_default_language=False),
+]
+
+
+def create_tour(author, title, **kwargs):
+    """Опубликованный тур с английским переводом"""
+    values = {"author": author, "price_adult": 100, "status": "published"}
+    values.update(kwargs)
+    slug = values.pop("slug", None) or title.lower().replace(" ", "-")
+    tour = Tour(**values)
+    tour.set_current_language("en")
+    tour.title = title
+    tour.slug = slug
+    tour.short_description = title
+    tour.save()
+    return tour
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class TourTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user("author", password="secret")
+
+    def setUp(self):
+        cache.clear()
+
+
+class GeohashTests(TestCase):
+    def test_encode_known_hashes(self):
+        self.assertEqual(geohash.encode(57.64911, 10.40744, 11), "u4pruydqqvj")
+        self.assertEqual(geohash.encode(42.6, -5.6, 5), "ezs42")
+
+    def test_neighbour_across_the_cell_edge(self):
+        precision = 5
+        _, lon_step = geohash.cell_size(precision)
+        edge = -180 + ((9.19 + 180) // lon_step + 1) * lon_step
+        inside, outside = (45.46, edge - 1e-6), (45.46, edge + 1e-6)
+
+        cells = geohash.surrounding_cells(*inside, precision)
+
+        self.assertEqual(len(cells), 9)
+        self.assertIn(geohash.encode(*inside, precision), cells)
+        self.assertNotEqual(geohash.encode(*outside, precision), geohash.encode(*inside, precision))
+        self.assertIn(geohash.encode(*outside, precision), cells)
+
+    def test_neighbours_wrap_the_antimeridian(self):
+        cells = geohash.surrounding_cells(0, 179.999, 4)
+        self.assertIn(geohash.encode(0, -179.999, 4), cells)
+
+
+class NearbyTests(TourTestCase):
+    def add_point(self, tour, latitude, longitude):
+        point = TourMeetingPoint(
+            tour=tour, meeting_time=time(9), latitude=latitude, longitude=longitude
+        )
+        point.set_current_language("en")
+        point.name = tour.title
+        point.address = tour.title
+        point.save()
+        return point
+
+    def setUp(self):
+        super().setUp()
+        self.duomo = create_tour(self.author, "Duomo")
+        self.navigli = create_tour(self.author, "Navigli")
+        self.como = create_tour(self.author, "Como")
+        self.add_point(self.duomo, "45.4642", "9.1900")
+        self.navigli_point = self.add_point(self.navigli, "45.4520", "9.1750")
+        self.como_point = self.add_point(self.como, "45.8081", "9.0852")
+        self.add_point(create_tour(self.author, "Draft", status="draft"), "45.4641", "9.1901")
+
+    def test_tours_within_radius_by_distance(self):
+        nearby = tours_near(45.4642, 9.1900, 10)
+
+        self.assertEqual([tour_id for tour_id, _, _ in nearby], [self.duomo.pk, self.navigli.pk])
+        self.assertLess(nearby[0][1], 0.01)
+        self.assertAlmostEqual(nearby[1][1], 1.8, delta=0.2)
+        self.assertEqual(
+            [tour_id for tour_id, _, _ in tours_near(45.4642, 9.1900, 50)],
+            [self.duomo.pk, self.navigli.pk, self.como.pk],
+        )
+
+    def test_nearest_point_of_each_tour(self):
+        closer = self.add_point(self.como, "45.4700", "9.1900")
+
+        nearby = tours_near(45.4642, 9.1900, 10)
+
+        self.assertIn((self.como.pk, closer.pk), [(item[0], item[2]) for item in nearby])
+
+    def test_moved_point_refreshes_cached_cells(self):
+        tours_near(45.4642, 9.1900, 10)
+
+        self.como_point.latitude, self.como_point.longitude = "45.4650", "9.1890"
+        self.como_point.save()
+
+        self.assertIn(self.como.pk, [tour_id for tour_id, _, _ in tours_near(45.4642, 9.1900, 10)])
+
+    def test_api_returns_cards_with_distance(self):
+        response = self.client.get(
+            "/tours-api/ajax/nearby/", {"lat": "45.4642", "lon": "9.19", "radius": "5"}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        tours = response.json()["tours"]
+        self.assertEqual([card["id"] for card in tours], [self.duomo.pk, self.navigli.pk])
+        self.assertEqual(tours[1]["meeting_point_id"], self.navigli_point.pk)
+
+class NearbyApiTests(TourTestCase):
+    def test_non_finite_values_are_rejected(self):
+        for params in (
+            {"lat": "45.4", "lon": "9.1", "radius": "nan"},
+            {"lat": "45.4", "lon": "9.1", "radius": "inf"},
+            {"lat": "nan", "lon": "9.1"},
+            {"lat": "45.4", "lon": "-inf"},
+        ):
+            response = self.client.get("/tours-api/ajax/nearby/", params)
+            self.assertEqual(response.status_code, 400, params)
+
+
+class SimilarToursApiTests(TourTestCase):
+    def setUp(self):
+        super().setUp()
+        self.alba = create_tour(self.author, "Alba truffles", location="Alba, Piedmont, Italy")
+        self.barolo = create_tour(self.author, "Barolo wine", location="Barolo, Piedmont, Italy")
+        rebuild_similarity_graph()
+        self.url = f"/tours-api/ajax/similar/{self.alba.pk}/"
+
+    def test_cached_response_with_etag(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [card["id"] for card in response.json()["tours"]], [self.barolo.pk]
+        )
+        self.assertTrue(response["ETag"])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url).content, response.content)
+
+    def test_matching_etag_is_not_modified(self):
+        etag = self.client.get(self.url)["ETag"]
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["ETag"], etag)
+
+    def test_etag_changes_with_neighbours(self):
+        etag = self.client.get(self.url)["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.barolo.status = "draft"
+            self.barolo.save()
+        process_recompute_queue()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"tours": []})
+
+    def test_unpublished_tour_is_not_found(self):
+        response = self.client.get(f"/tours-api/ajax/similar/{self.alba.pk + 100}/")
+        self.assertEqual(response.status_code, 404)
+
+class SimilarityTests(TourTestCase):
+    def neighbours(self, tour):
+        return list(
+            TourSimilarity.objects.filter(tour=tour)
+            .order_by("rank")
+            .values_list("related_tour_id", flat=True)
+        )
+
+    def test_graph_ranks_closest_tours_first(self):
+        alba = create_tour(self.author, "Alba truffles", location="Alba, Piedmont, Italy")
+        barolo = create_tour(self.author, "Barolo wine", location="Barolo, Piedmont, Italy")
+        lake = create_tour(
+            self.author, "Lake Como", location="Como, Lombardy, Italy", price_adult=500
+        )
+        draft = create_tour(
+            self.author, "Draft", location="Alba, Piedmont, Italy", status="draft"
+        )
+
+        self.assertEqual(rebuild_similarity_graph(), {alba.pk, barolo.pk, lake.pk})
+        self.assertEqual(self.neighbours(alba), [barolo.pk, lake.pk])
+        self.assertEqual(self.neighbours(draft), [])
+        self.assertFalse(TourSimilarity.objects.filter(related_tour=draft).exists())
+
+    def test_saves_only_mark_tours_for_the_worker(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            alba = create_tour(self.author, "Alba truffles", location="Alba, Piedmont, Italy")
+            barolo = create_tour(self.author, "Barolo wine", location="Barolo, Piedmont, Italy")
+
+        self.assertFalse(TourSimilarity.objects.exists())
+        self.assertEqual(
+            set(
+                RecomputeTask.objects.filter(kind="tour_similarity").values_list(
+                    "object_id", flat=True
+                )
+            ),
+            {alba.pk, barolo.pk},
+        )
+
+        process_recompute_queue()
+        self.assertEqual(self.neighbours(alba), [barolo.pk])
+        self.assertEqual(self.neighbours(barolo), [alba.pk])
+        self.assertFalse(RecomputeTask.objects.filter(kind="tour_similarity").exists())
+
+    def test_unpublished_tour_leaves_the_graph(self):
+        alba = create_tour(self.author, "Alba truffles", location="Alba, Piedmont, Italy")
+        barolo = create_tour(self.author, "Barolo wine", location="Barolo, Piedmont, Italy")
+        process_recompute_queue()
+
+        barolo.status = "draft"
+        barolo.save()
+        process_recompute_queue()
+
+        self.assertEqual(self.neighbours(alba), [])
+        self.assertEqual(self.neighbours(barolo), [])
+
+
+class TourSchemaTests(TourTestCase):
+    def setUp(self):
+        super().setUp()
+        self.tour = create_tour(
+            self.author, "Lake Como", price_child=60, duration_hours=8, duration_minutes=30
+        )
+        faq = TourFAQ(tour=self.tour)
+        faq.set_current_language("en")
+        faq.question = "Is lunch included?"
+        faq.answer = "<p>Yes, <b>lunch</b> is included</p>"
+        faq.save()
+        point = TourMeetingPoint(
+            tour=self.tour, meeting_time=time(8, 55), latitude="45.4642", longitude="9.19"
+        )
+        point.set_current_language("en")
+        point.name = "Duomo"
+        point.address = "Piazza del Duomo, Milan"
+        point.save()
+
+    def schema(self, language="en"):
+        with self.captureOnCommitCallbacks(execute=True):
+            return json.loads(get_tour_schema_json(Tour.objects.get(pk=self.tour.pk), language))
+
+    def test_document(self):
+        trip, faq_page = self.schema()["@graph"]
+
+        self.assertEqual(trip["name"], "Lake Como")
+        self.assertEqual(trip["duration"], "PT8H30M")
+        self.assertEqual(
+            [(offer["name"], offer["price"]) for offer in trip["offers"]],
+            [("Adult", "100.00"), ("Child", "60.00")],
+        )
+        place = trip["itinerary"]["itemListElement"][0]["item"]
+        self.assertEqual((place["name"], place["geo"]["latitude"]), ("Duomo", 45.4642))
+        answer = faq_page["mainEntity"][0]["acceptedAnswer"]
+        self.assertEqual(answer["text"], "Yes, lunch is included")
+        self.assertEqual(faq_page["about"], {"@id": trip["@id"]})
+
+    def test_script_end_tag_is_escaped(self):
+        self.tour.set_current_language("en")
+        self.tour.title = "</script><script>alert(1)</script>"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tour.save()
+
+        schema_json = get_tour_schema_json(Tour.objects.get(pk=self.tour.pk), "en")
+
+        self.assertNotIn("</", schema_json)
+        self.assertEqual(json.loads(schema_json)["@graph"][0]["name"], self.tour.title)
+
+    def test_cached_per_language_and_reset_by_faq_changes(self):
+        self.schema()
+        self.assertIsNotNone(cache.get(tour_schema_cache_key(self.tour.pk, "en")))
+        self.assertIsNone(cache.get(tour_schema_cache_key(self.tour.pk, "fr")))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tour.faqs.get().delete()
+
+        self.assertIsNone(cache.get(tour_schema_cache_key(self.tour.pk, "en")))
+        self.assertEqual(len(self.schema()["@graph"]), 1)
+
+class AdminStatusActionTests(TourTestCase):
+    def setUp(self):
+        super().setUp()
+        messages = mock.patch("tours.admin.messages")
+        messages.start()
+        self.addCleanup(messages.stop)
+        self.tour = create_tour(self.author, "Lake Como", status="draft")
+        self.model_admin = TourAdmin(Tour, admin.site)
+        self.request = RequestFactory().post("/admin/tours/tour/")
+        rebuild_autocomplete_index()
+        cache.set(tour_schema_cache_key(self.tour.pk, "en"), "stale")
+        cache.set(similar_tours_cache_key(self.tour.pk, "en"), "stale")
+
+    def run_action(self, action):
+        with self.captureOnCommitCallbacks(execute=True):
+            action(self.request, Tour.objects.filter(pk=self.tour.pk))
+
+    def test_publish_refreshes_tour_caches(self):
+        self.assertEqual(autocomplete("como", "en"), [])
+
+        self.run_action(self.model_admin.publish_tours)
+
+        self.assertIsNone(cache.get(tour_schema_cache_key(self.tour.pk, "en")))
+        self.assertEqual(
+            json.loads(cache.get(similar_tours_cache_key(self.tour.pk, "en"))["body"]),
+            {"tours": []},
+        )
+        self.assertEqual(
+            cache.get(url_cache_key("tours.tour", self.tour.pk, "en")),
+            self.tour.get_absolute_url(),
+        )
+        self.assertEqual([doc["label"] for doc in autocomplete("como", "en")], ["Lake Como"])
+        self.assertTrue(
+            RecomputeTask.objects.filter(kind="tour_similarity", object_id=self.tour.pk).exists()
+        )
+
+    def test_draft_drops_tour_from_caches(self):
+        self.run_action(self.model_admin.publish_tours)
+        self.run_action(self.model_admin.draft_tours)
+
+        self.assertIsNone(cache.get(similar_tours_cache_key(self.tour.pk, "en")))
+        self.assertEqual(autocomplete("como", "en"), [])
+
+
+class PriceRuleTests(TourTestCase):
+    def setUp(self):
+        super().setUp()
+        self.tour = create_tour(
+            self.author, "Lake Como", price_adult=100, price_child=60, price_private=400
+        )
+
+    def rule(self, **kwargs):
+        values = {
+            "tour": self.tour,
+            "name": "High season",
+            "start_date": date(2030, 7, 1),
+            "end_date": date(2030, 7, 31),
+            "price_adult": Decimal("150"),
+        }
+        values.update(kwargs)
+        return TourPriceRule(**values)
+
+    def test_base_prices_outside_rules(self):
+        prices = price_for_date(self.tour, date(2030, 6, 30), [self.rule()])
+        self.assertEqual(prices, {"adult": 100, "child": 60, "private": 400})
+
+    def test_rule_overrides_and_keeps_unset_prices(self):
+        prices = price_for_date(self.tour, date(2030, 7, 10), [self.rule()])
+        self.assertEqual(prices, {"adult": Decimal("150"), "child": 60, "private": 400})
+
+    def test_zero_rule_price_is_kept(self):
+        rule = self.rule(price_child=Decimal("0"), price_private=Decimal("0"))
+        prices = price_for_date(self.tour, date(2030, 7, 10), [rule])
+        self.assertEqual(prices["child"], 0)
+        self.assertEqual(prices["private"], 0)
+
+    def test_rule_weekdays_and_first_matching_rule(self):
+        weekends = self.rule(name="Weekends", weekdays="5,6", price_adult=Decimal("180"))
+        rules = [weekends, self.rule()]
+        # 2030-07-06 - суббота, 2030-07-08 - понедельник
+        self.assertEqual(price_for_date(self.tour, date(2030, 7, 6), rules)["adult"], 180)
+        self.assertEqual(price_for_date(self.tour, date(2030, 7, 8), rules)["adult"], 150)
+
+    def test_departure_price_wins(self):
+        departure = TourDeparture(tour=self.tour, date=date(2030, 7, 10), price_adult=Decimal("90"))
+        prices = price_for_date(self.tour, date(2030, 7, 10), [self.rule()], departure)
+        self.assertEqual(prices["adult"], 90)
+
+    def test_month_grid_follows_rule_changes(self):
+        TourDeparture.objects.create(
+            tour=self.tour, date=date(2030, 7, 10), start_time=time(9), capacity=10
+        )
+
+        def price():
+            grid = get_month_grid(self.tour.pk, 2030, 7)
+            days = [day for week in grid["weeks"] for day in week if day["date"] == "2030-07-10"]
+            return days[0]["departures"][0]["price_adult"]
+
+        self.assertEqual(price(), 100.0)
+        rule = self.rule()
+        rule.save()
+        self.assertEqual(price(), 150.0)
+        rule.delete()
+        self.assertEqual(price(), 100.0)
+
+
+class CatalogueTests(TourTestCase):
+    def setUp(self):
+        super().setUp()
+        category = TourCategory()
+        category.set_current_language("en")
+        category.name = "Lakes"
+        category.slug = "lakes"
+        category.save()
+
+        self.tour = create_tour(
+            self.author, "Lake Como", category=category, location="Como, Italy", price_child=0
+        )
+        self.tour.set_current_language("fr")
+        self.tour.title = "Lac de Côme"
+        self.tour.slug = "lac-de-come"
+        self.tour.short_description = "Lac"
+        self.tour.save()
+        self.tour.tags.add("boat", "lake")
+
+        faq = TourFAQ(tour=self.tour, sort_order=1)
+        faq.set_current_language("en")
+        faq.question = "Is lunch included?"
+        faq.answer = "<p>Yes</p>"
+        faq.save()
+        point = TourMeetingPoint(
+            tour=self.tour, meeting_time=time(8, 55), latitude="45.81", longitude="9.08"
+        )
+        point.set_current_language("en")
+        point.name = "Pier"
+        point.address = "Piazza Cavour, Como"
+        point.save()
+
+    def export(self, fmt):
+        stream = io.StringIO()
+        write_records(iter_tour_records(), stream, fmt)
+        stream.seek(0)
+        return list(read_records(stream, fmt))
+
+    def test_round_trip(self):
+        for fmt in ("jsonl", "csv"):
+            with self.subTest(fmt=fmt):
+                records = self.export(fmt)
+                before = list(iter_tour_records())
+
+                stats = import_tour_records(records, self.author)
+
+                self.assertEqual((stats["created"], stats["updated"], stats["failed"]), (0, 1, []))
+                self.assertEqual(list(iter_tour_records()), before)
+
+    def test_import_recreates_deleted_tour(self):
+        before = list(iter_tour_records())
+        records = self.export("jsonl")
+        Tour.objects.all().delete()
+
+        stats = import_tour_records(records, self.author)
+
+        self.assertEqual(stats["created"], 1)
+        self.assertEqual(list(iter_tour_records()), before)
+
+    def test_rows_with_invalid_values_are_reported(self):
+        good = self.export("csv")[0]
+        bad = {**good, "slug": "broken", "price_adult": "abc", "translations": {}}
+        Tour.objects.all().delete()
+
+        stats = import_tour_records([bad, good], self.author)
+
+        self.assertEqual(stats["created"], 1)
+        self.assertEqual(len(stats["failed"]), 1)
+        self.assertTrue(stats["failed"][0].startswith("broken: "))
+        self.assertEqual(Tour.objects.count(), 1)
+
+    def test_slug_of_another_language_is_not_overwritten(self):
+        record = {
+            "slug": "lac-de-come",
+            "price_adult": "999",
+            "translations": {"en": {"title": "Other", "slug": "lac-de-come"}},
+        }
+
+        stats = import_tour_records([record], self.author)
+
+        self.assertEqual((stats["created"], stats["updated"]), (0, 0))
+        self.assertEqual(len(stats["failed"]), 1)
+        self.tour.refresh_from_db()
+        self.assertEqual(self.tour.price_adult, 100)
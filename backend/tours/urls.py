@@ -57,6 +57,16 @@ urlpatterns = [
     # AJAX для похожих туров
     path('ajax/similar/<int:tour_id>/', views.get_similar_tours, name='ajax_similar_tours'),
     
+    # AJAX календарь доступности
+    path(
+        'ajax/calendar/<int:tour_id>/<int:year>/<int:month>/',
+        views.get_tour_calendar,
+        name='ajax_tour_calendar',
+    ),
+    
+    # AJAX поиск туров рядом с точкой
+    path('ajax/nearby/', views.get_nearby_tours, name='ajax_nearby_tours'),
+    
     # ДИНАМИЧЕСКИЕ КАТЕГОРИИ ТУРОВ
     path('category/<slug:slug>/', views.TourCategoryView.as_view(), name='tour_category'),
     
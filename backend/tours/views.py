@@ -1,41 +1,58 @@
 # backend/tours/views.py - ИСПРАВЛЕННАЯ ВЕРСИЯ
 import logging
+import math
 
 from django.conf import settings
-from django.http import Http404, JsonResponse
+from django.http import Http404, HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response, patch_cache_control
 from django.utils.translation import get_language
 from django.views.generic import DetailView, ListView
 
+from core.media_health import attach_media_info
+from core.pagination import KeysetPaginationMixin
+from core.url_cache import prime_absolute_urls
+
+from .availability import (
+    CALENDAR_YEARS,
+    annotate_next_departure,
+    get_month_grid,
+    next_available_departures,
+)
+from .cache import get_similar_tours_payload, serialize_tour_card
 from .models import Tour, TourCategory, TourDifficulty
+from .nearby import NEARBY_MAX_RADIUS_KM, tours_near
+from .schema import get_tour_schema_json
 
 # Настройка логгера
 logger = logging.getLogger("tours")
 
 
-class TourListView(ListView):
+# Порядок туров в списках - он же ключ keyset пагинации
+TOUR_KEYSET_ORDERING = ("-is_featured", "sort_order", "-created_at", "-id")
+
+
+class TourListView(KeysetPaginationMixin, ListView):
     """Простой список всех туров"""
 
     model = Tour
     template_name = "tours/tour_list.html"
     context_object_name = "tours"
-    paginate_by = 12
+    page_size = 12
+    keyset_ordering = TOUR_KEYSET_ORDERING
 
     def get_queryset(self):
         """Возвращаем только опубликованные туры"""
         logger.info("📋 Получаем список туров")
 
-        queryset = (
+        return annotate_next_departure(
             Tour.objects.filter(status="published")
             .select_related("author", "category", "difficulty")
             .prefetch_related("tags", "images")
-            .order_by("-is_featured", "sort_order", "-created_at")
         )
 
-        total_tours = queryset.count()
-        logger.info(f"📋 Найдено туров: {total_tours}")
-
-        return queryset
+    def get_total_cache_key(self):
+        return "tours:total:list"
 
     def get_context_data(self, **kwargs):
         """Добавляем контекст для страницы списка туров"""
@@ -46,6 +63,11 @@ class TourListView(ListView):
 
         logger.info(f"📋 Отображаем {len(tours)} туров на странице")
 
+        # Пути всех карточек одним запросом к кэшу
+        prime_absolute_urls(tours)
+        # Варианты изображений (<picture>) - одним запросом к таблице медиа
+        attach_media_info(tours)
+
         # Категории для навигации
         context["categories"] = TourCategory.objects.filter(is_active=True).order_by(
             "sort_order"
@@ -61,13 +83,14 @@ class TourListView(ListView):
         return context
 
 
-class TourCategoryView(ListView):
+class TourCategoryView(KeysetPaginationMixin, ListView):
     """Туры определенной категории"""
 
     model = Tour
     template_name = "tours/category.html"
     context_object_name = "tours"
-    paginate_by = 12
+    page_size = 12
+    keyset_ordering = TOUR_KEYSET_ORDERING
 
     def get_queryset(self):
         """Получаем туры категории"""
@@ -81,17 +104,14 @@ class TourCategoryView(ListView):
         category_name = self.category.safe_translation_getter("name", any_language=True)
         logger.info(f"📂 Категория найдена: '{category_name}' (ID={self.category.id})")
 
-        queryset = (
+        return annotate_next_departure(
             Tour.objects.filter(category=self.category, status="published")
             .select_related("author", "category", "difficulty")
             .prefetch_related("tags", "images")
-            .order_by("-is_featured", "sort_order", "-created_at")
         )
 
-        total_tours = queryset.count()
-        logger.info(f"📋 Туров в категории: {total_tours}")
-
-        return queryset
+    def get_total_cache_key(self):
+        return f"tours:total:category:{self.category.pk}"
 
     def get_context_data(self, **kwargs):
         """Формируем контекст для категории"""
@@ -99,6 +119,8 @@ class TourCategoryView(ListView):
 
         context = super().get_context_data(**kwargs)
         context["category"] = self.category
+        prime_absolute_urls(context.get("tours", []))
+        attach_media_info(context.get("tours", []))
 
         category_name = self.category.safe_translation_getter("name", any_language=True)
         category_description = self.category.safe_translation_getter(
@@ -182,7 +204,7 @@ class TourDetailView(DetailView):
         logger.info("🔧 Формируем контекст для детальной страницы тура")
 
         context = super().get_context_data(**kwargs)
-        tour = self.get_object()
+        tour = self.object
 
         # SEO
         context["page_title"] = tour.safe_translation_getter(
@@ -194,14 +216,17 @@ class TourDetailView(DetailView):
 
         # Похожие туры
         logger.info("🔗 Получаем похожие туры")
-        related_tours = tour.get_related_tours(limit=4)
+        related_tours = prime_absolute_urls(tour.get_related_tours(limit=4))
         context["related_tours"] = related_tours
         logger.info(f"🔗 Найдено похожих туров: {len(related_tours)}")
 
         # Изображения для галереи (первые 4 для основной сетки)
-        context["gallery_images"] = tour.images.filter(is_featured=True).order_by(
-            "sort_order"
-        )[:4]
+        context["gallery_images"] = list(
+            tour.images.filter(is_featured=True).order_by("sort_order")[:4]
+        )
+        # Варианты изображений (<picture>) по манифесту, без обращения к диску
+        attach_media_info([tour, *related_tours])
+        attach_media_info(context["gallery_images"], "image")
         context["all_images"] = tour.images.all().order_by("sort_order")
 
         # FAQ (активные)
@@ -217,6 +242,12 @@ class TourDetailView(DetailView):
             "sort_order"
         )
 
+        # Ближайшие доступные даты из календаря отправлений
+        context["next_departures"] = next_available_departures(tour, limit=5)
+
+        # JSON-LD из кэша (тур, язык)
+        context["tour_schema_json"] = get_tour_schema_json(tour, get_language())
+
         # Код бронирования
         try:
             context["booking_code"] = tour.booking_code
@@ -228,43 +259,68 @@ class TourDetailView(DetailView):
 
 
 def get_similar_tours(request, tour_id):
-    """AJAX для получения похожих туров"""
+    """AJAX для получения похожих туров (готовый JSON из кэша)"""
     try:
-        tour = get_object_or_404(Tour, id=tour_id, status="published")
-        similar_tours = tour.get_related_tours(limit=4)
-
-        data = []
-        for similar_tour in similar_tours:
-            data.append(
-                {
-                    "id": similar_tour.id,
-                    "title": similar_tour.safe_translation_getter(
-                        "title", any_language=True
-                    ),
-                    "short_description": similar_tour.safe_translation_getter(
-                        "short_description", any_language=True
-                    ),
-                    "price": float(similar_tour.price_adult),
-                    "duration": similar_tour.get_duration_display(),
-                    "rating": float(similar_tour.rating),
-                    "featured_image": (
-                        similar_tour.featured_image.url
-                        if similar_tour.featured_image
-                        else None
-                    ),
-                    "url": similar_tour.get_absolute_url(),
-                    "location": similar_tour.location or (
-                        similar_tour.category.safe_translation_getter(
-                            "name", any_language=True
-                        )
-                        if similar_tour.category
-                        else None
-                    ),
-                }
-            )
-
-        return JsonResponse({"tours": data})
-
+        payload = get_similar_tours_payload(tour_id, get_language())
     except Exception as e:
         logger.error(f"❌ Ошибка получения похожих туров: {e}")
         return JsonResponse({"error": "Error loading similar tours"}, status=500)
+
+    if payload is None:
+        return JsonResponse({"error": "Tour not found"}, status=404)
+
+    response = HttpResponse(payload["body"], content_type="application/json")
+    response["ETag"] = payload["etag"]
+    patch_cache_control(response, public=True, max_age=300)
+    return get_conditional_response(request, etag=payload["etag"], response=response)
+
+
+def get_tour_calendar(request, tour_id, year, month):
+    """AJAX: месячная сетка доступности и цен тура"""
+    if not 1 <= month <= 12:
+        return JsonResponse({"error": "Invalid month"}, status=400)
+    if year not in CALENDAR_YEARS:
+        return JsonResponse({"error": "Invalid year"}, status=400)
+
+    grid = get_month_grid(tour_id, year, month)
+    if grid is None:
+        return JsonResponse({"error": "Tour not found"}, status=404)
+
+    return JsonResponse(grid)
+
+
+def get_nearby_tours(request):
+    """AJAX: туры с точкой встречи в радиусе ?radius= км от ?lat=&lon="""
+    try:
+        latitude = float(request.GET["lat"])
+        longitude = float(request.GET["lon"])
+        radius = float(request.GET.get("radius", 25))
+        limit = max(1, min(int(request.GET.get("limit", 20)), 50))
+    except (KeyError, ValueError):
+        return JsonResponse({"error": "lat and lon are required"}, status=400)
+
+    if not all(math.isfinite(value) for value in (latitude, longitude, radius)):
+        return JsonResponse({"error": "Invalid coordinates or radius"}, status=400)
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180) or radius <= 0:
+        return JsonResponse({"error": "Invalid coordinates or radius"}, status=400)
+
+    nearby = tours_near(latitude, longitude, radius, limit=limit)
+    tours = Tour.objects.filter(pk__in=[tour_id for tour_id, _, _ in nearby])
+    tours = tours.select_related("category").prefetch_related(
+        "translations", "category__translations"
+    ).in_bulk()
+    prime_absolute_urls(tours.values())
+
+    results = []
+    for tour_id, distance, meeting_point_id in nearby:
+        if tour_id in tours:
+            card = serialize_tour_card(tours[tour_id])
+            card["distance_km"] = round(distance, 1)
+            card["meeting_point_id"] = meeting_point_id
+            results.append(card)
+
+    response = JsonResponse(
+        {"tours": results, "radius_km": min(radius, NEARBY_MAX_RADIUS_KM)}
+    )
+    patch_cache_control(response, public=True, max_age=300)
+    return response